@@ -30,23 +30,58 @@ Features:
     - Session management via Set-Cookie headers
     - Error handling (401 Unauthorized for invalid credentials)
     - Concurrency support (handled by backend threading)
+    - Sessions, peers, channels and members live in a pluggable
+      :class:`StateStore <daemon.statestore.StateStore>` (see configure_state)
+      so pre-forked workers can share them
 """
 
 import json
 import argparse
+import asyncio
 import datetime
+import logging
+import threading
+import time
+from urllib.parse import unquote
 from daemon.weaprous import WeApRous
+from daemon.statestore import LocalStateStore
+from daemon.notifier import Notifier
+from daemon.streaming import stream_events
+from daemon.websocket import CLOSE_POLICY_VIOLATION
 
 PORT = 9000  # Default port
 
 app = WeApRous()
+log = logging.getLogger("apps.app")
+chat_log = logging.getLogger("apps.chat")
 
 # ============================================================================
 # Task 1A: Authentication Routes
 # ============================================================================
 
+# State namespaces kept in the state store
+NS_SESSIONS = "sessions"    # sessionid -> {username, created_at, expires_at}
+NS_PEERS = "peers"          # username -> {"ip": "...", "port": 1234, "last_seen": "..."}
+NS_CHANNELS = "channels"    # channel -> EventLog of {seq, from, type, to, message, timestamp}
+NS_MEMBERS = "members"      # channel -> set(usernames)
+
+#: Longest a /channel/messages long poll stays parked, in seconds.
+LONG_POLL_MAX_TIMEOUT = 30.0
+#: Messages per /channel/messages page by default, and at most.
+PAGE_LIMIT = 100
+PAGE_MAX_LIMIT = 500
+#: Retention of every channel history (an EventLog ring buffer), oldest
+#: messages are evicted beyond these limits, see configure_history().
+HISTORY_MAX_MESSAGES = 10000
+HISTORY_MAX_BYTES = 4 * 1024 * 1024
+HISTORY_MAX_AGE = None      # giây, None: không giới hạn
+#: Idle seconds between two heartbeats of a /channel/<name>/events stream.
+SSE_HEARTBEAT = 15.0
+#: Reconnection delay advertised to EventSource clients, in milliseconds.
+SSE_RETRY = 2000
+
 # Simulated database (in production: Redis, PostgreSQL, etc.)
-SESSIONS = {
+DEFAULT_SESSIONS = {
     "abc123def456": {
         "username": "admin",
         "created_at": "2025-11-12 10:00:00",
@@ -54,12 +89,56 @@ SESSIONS = {
     }
 }
 
+#: Active state backend, replaced by configure_state() before serving.
+STATE = None
+
+#: Wakes the requests waiting for new messages of a channel (key: channel).
+CHANNEL_CHANGES = Notifier()
+
+#: Wakes the push of a WebSocket when it closes (key: the WebSocket).
+WS_CLOSED = Notifier()
+
+
+def configure_state(store):
+    """
+    Select the state backend used by every route and seed the default session.
+
+    :param store (StateStore): a LocalStateStore for a single process, or a
+                               SharedStateStore shared by pre-forked workers.
+    """
+    global STATE
+    STATE = store
+    STATE.execute([
+        ("create", NS_SESSIONS, sessionid, session)
+        for sessionid, session in DEFAULT_SESSIONS.items()
+    ])
+
+
+configure_state(LocalStateStore())
+
+
+def configure_history(max_messages=None, max_bytes=None, max_age=None):
+    """
+    Set the retention of the channels created from now on.
+
+    :param max_messages (int): messages kept per channel.
+    :param max_bytes (int): estimated message bytes kept per channel.
+    :param max_age (float): seconds a message is kept.
+    """
+    global HISTORY_MAX_MESSAGES, HISTORY_MAX_BYTES, HISTORY_MAX_AGE
+    if max_messages is not None:
+        HISTORY_MAX_MESSAGES = max_messages
+    if max_bytes is not None:
+        HISTORY_MAX_BYTES = max_bytes
+    if max_age is not None:
+        HISTORY_MAX_AGE = max_age
+
 @app.route('/', methods=['GET'])
 def index(request=None, body=""):
     """
     Task 1B: Cookie-based access control with session validation
     """
-    print("[App] GET / - checking authentication via cookie")
+    log.debug("GET / - checking authentication via cookie")
     
     # Check if auth cookie exists
     if request and hasattr(request, 'cookies') and request.cookies:
@@ -67,12 +146,12 @@ def index(request=None, body=""):
         sessionid = request.cookies.get('sessionid', '')
         username = request.cookies.get('username', '')
         
-        print(f"[App] Cookies found: auth={auth_cookie}, sessionid={sessionid}, username={username}")
+        log.debug("Cookies found: auth=%s, sessionid=%s, username=%s", auth_cookie, sessionid, username)
         
         # Task 1B: Check auth flag AND validate sessionid
-        if auth_cookie == 'true' and sessionid in SESSIONS:
-            session_data = SESSIONS[sessionid]
-            print(f"[App] Valid session found for user: {session_data['username']}")
+        session_data = STATE.get(NS_SESSIONS, sessionid) if sessionid else None
+        if auth_cookie == 'true' and session_data:
+            log.debug("Valid session found for user: %s", session_data['username'])
             
             return (200, {
                 "page": "index",
@@ -82,21 +161,21 @@ def index(request=None, body=""):
                 "user": session_data['username']
             })
         elif auth_cookie == 'true':
-            print(f"[App] Invalid sessionid: {sessionid}")
+            log.info("Invalid sessionid: %s", sessionid)
             return (401, {
                 "status": "unauthorized",
                 "message": "Session invalid or expired",
                 "authenticated": False
             })
         else:
-            print(f"[App] Invalid auth cookie: {auth_cookie}")
+            log.info("Invalid auth cookie: %s", auth_cookie)
             return (401, {
                 "status": "unauthorized",
                 "message": "Invalid or missing auth cookie",
                 "authenticated": False
             })
     else:
-        print("[App] No auth cookie found")
+        log.debug("No auth cookie found")
         return (401, {
             "status": "unauthorized",
             "message": "Auth cookie required. Please login first.",
@@ -127,7 +206,7 @@ def login(request=None, body=""):
             - Status: 401 Unauthorized
             - Body: {"status": "unauthorized", "message": "..."}
     """
-    print("[App] POST /login - processing authentication request")
+    log.debug("POST /login - processing authentication request")
     
     try:
         # Get request body
@@ -137,19 +216,19 @@ def login(request=None, body=""):
         
         # Parse request body
         if not actual_body or not actual_body.strip():
-            print("[App] Login failed: Empty body")
+            log.info("Login failed: Empty body")
             return (401, {"status": "unauthorized", "message": "Missing credentials"})
         
         credentials = json.loads(actual_body)
         username = credentials.get("username", "")
         password = credentials.get("password", "")
         
-        print(f"[App] Login attempt: username='{username}'")
+        log.debug("Login attempt: username='%s'", username)
         
         # Task 1A: Validate credentials
         # Valid credentials: username=admin, password=password
         if username == "admin" and password == "password":
-            print("[App] Login successful - valid credentials")
+            log.info("Login successful - valid credentials")
             # Return with Set-Cookie header
             # Format: (status_code, data, cookies_dict)
             cookies = {
@@ -164,7 +243,7 @@ def login(request=None, body=""):
                 "auth": True
             }, cookies)
         else:
-            print(f"[App] Login failed - invalid credentials (username={username})")
+            log.info("Login failed - invalid credentials (username=%s)", username)
             return (401, {
                 "status": "unauthorized",
                 "message": "Invalid username or password",
@@ -172,13 +251,13 @@ def login(request=None, body=""):
             })
     
     except json.JSONDecodeError as e:
-        print(f"[App] Login failed: Invalid JSON - {e}")
+        log.info("Login failed: Invalid JSON - %s", e)
         return (401, {
             "status": "unauthorized",
             "message": "Invalid JSON format in request body"
         })
     except Exception as e:
-        print(f"[App] Login error: {e}")
+        log.exception("Login error: %s", e)
         return (500, {
             "status": "error",
             "message": "Internal server error during login"
@@ -191,31 +270,136 @@ def login(request=None, body=""):
 # Task 2.2 - Hybrid Chat Application (simple implementation)
 # ============================================================================
 
-# Lưu thông tin peer đã đăng ký
-CHAT_PEERS = {}          # username -> {"ip": "...", "port": 1234, "last_seen": "..."}
-# Lưu message theo channel
-CHAT_CHANNELS = {}       # channel -> [ {from, type, to, message, timestamp}, ... ]
-# Lưu thành viên channel
-CHAT_CHANNEL_MEMBERS = {}   # channel -> set(usernames)
+# Peers, messages and members are stored in STATE under NS_PEERS,
+# NS_CHANNELS and NS_MEMBERS.
+
+
+def _chat_ensure_channel_ops(name: str):
+    """Ops đảm bảo channel tồn tại trong NS_CHANNELS & NS_MEMBERS (gộp vào batch)."""
+    return [
+        # EventLog chỉ được tạo trong store khi channel chưa tồn tại
+        ("create_log", NS_CHANNELS, name,
+         HISTORY_MAX_MESSAGES, HISTORY_MAX_BYTES, HISTORY_MAX_AGE),
+        ("create", NS_MEMBERS, name, set()),
+    ]
+
 
+def _chat_now():
+    return datetime.datetime.utcnow().isoformat() + "Z"
 
-def _chat_ensure_channel(name: str):
-    """Đảm bảo channel tồn tại trong CHAT_CHANNELS & CHAT_CHANNEL_MEMBERS."""
-    if name not in CHAT_CHANNELS:
-        CHAT_CHANNELS[name] = []
-    if name not in CHAT_CHANNEL_MEMBERS:
-        CHAT_CHANNEL_MEMBERS[name] = set()
+
+def _chat_publish(kind, sender, receiver, channel, message):
+    """Tạo event (broadcast / direct), append vào channel (được đánh ``seq``), trả về event."""
+    event = {
+        "type": kind,
+        "from": sender,
+        "to": receiver,
+        "channel": channel,
+        "message": message,
+        "timestamp": _chat_now(),
+    }
+    event["seq"] = STATE.execute([
+        *_chat_ensure_channel_ops(channel),
+        ("append", NS_CHANNELS, channel, event),
+    ])[-1]
+    CHANNEL_CHANGES.notify(channel)
+    return event
+
+
+# Channel có thread theo dõi message do process khác publish (store dùng chung)
+_chat_watched = set()
+_chat_watched_lock = threading.Lock()
+
+
+def _chat_watch(channel):
+    """
+    Đảm bảo message do worker khác publish cũng đánh thức các request đang
+    chờ channel trong process này: một thread cho mỗi channel đang có người
+    chờ, chỉ khi STATE dùng chung giữa nhiều process.
+    """
+    if isinstance(STATE, LocalStateStore):
+        # Mọi message đều đi qua _chat_publish của process này
+        return
+    with _chat_watched_lock:
+        if channel in _chat_watched:
+            return
+        _chat_watched.add(channel)
+    threading.Thread(target=_chat_watch_channel, args=(channel,),
+                     name="chat-watch-{}".format(channel), daemon=True).start()
+
+
+def _chat_watch_channel(channel):
+    """Thread chờ seq của channel thay đổi trong store, tới khi hết người chờ."""
+    # Bắt đầu từ 0: lần chờ đầu đánh thức ngay, không bỏ sót message nào
+    # được publish trước khi thread chạy
+    last = 0
+    while True:
+        with _chat_watched_lock:
+            if not CHANNEL_CHANGES.waiting(channel):
+                _chat_watched.discard(channel)
+                return
+        try:
+            seq, _ = STATE.wait(NS_CHANNELS, channel, last, SSE_HEARTBEAT, 1)
+        except Exception as e:
+            chat_log.warning("Watching channel %s failed: %s", channel, e)
+            time.sleep(1)
+            continue
+        if seq != last:
+            last = seq
+            CHANNEL_CHANGES.notify(channel)
+
+
+async def _chat_execute(ops):
+    """
+    ``STATE.execute`` gọi từ coroutine: store dùng chung giữa các process
+    chạy trong executor, để round trip qua Unix socket không chặn event loop.
+    """
+    if isinstance(STATE, LocalStateStore):
+        return STATE.execute(ops)
+    return await asyncio.get_running_loop().run_in_executor(None, STATE.execute, ops)
+
+
+async def _chat_wait_messages(channel, after, limit, timeout):
+    """
+    Long poll: chờ tới khi channel có message sau ``after`` (hoặc bắt đầu
+    lại) hoặc hết ``timeout`` giây, không chiếm thread trong lúc chờ.
+
+    :rtype tuple: ``(last seq, messages)`` như op ``wait`` của STATE.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    ops = _chat_ensure_channel_ops(channel)
+    while True:
+        # Đăng ký trước khi đọc: message publish ngay sau lần đọc vẫn đánh thức
+        changed = CHANNEL_CHANGES.subscribe(channel)
+        try:
+            _chat_watch(channel)
+            last, messages = (await _chat_execute([
+                *ops,
+                ("wait", NS_CHANNELS, channel, after, 0, limit),
+            ]))[-1]
+            remaining = deadline - loop.time()
+            if messages or last != after or remaining <= 0:
+                return last, messages
+            ops = []
+            await CHANNEL_CHANGES.wait(changed, remaining)
+        finally:
+            CHANNEL_CHANGES.unsubscribe(channel, changed)
 
 
 def _chat_read_json_body(request, body: str):
     """
     Helper: lấy JSON body (dùng cho mọi route Task 2.2)
-    - Ưu tiên request.body nếu có
+    - Ưu tiên request.json (parse lazily một lần, cache trên request)
     - Hỗ trợ bytes / str
     """
-    raw = body
     if request is not None and getattr(request, "body", None):
-        raw = request.body
+        data = request.json
+        if data is None:
+            raise ValueError("Empty body")
+        return data
+
+    raw = body
 
     if not raw:
         raise ValueError("Empty body")
@@ -239,7 +423,7 @@ def chat_submit_info(request=None, body=""):
             "port": 9001
         }
     """
-    print("[Chat] /submit-info")
+    chat_log.debug("/submit-info")
 
     try:
         data = _chat_read_json_body(request, body)
@@ -253,20 +437,21 @@ def chat_submit_info(request=None, body=""):
                 "message": "username, ip, port are required"
             })
 
-        CHAT_PEERS[username] = {
+        peer = {
             "ip": ip,
             "port": int(port),
-            "last_seen": datetime.datetime.utcnow().isoformat() + "Z",
+            "last_seen": _chat_now(),
         }
+        STATE.put(NS_PEERS, username, peer)
 
-        print(f"[Chat] Registered peer {username} @ {ip}:{port}")
+        chat_log.info("Registered peer %s @ %s:%s", username, ip, port)
         return (200, {
             "status": "ok",
-            "peer": CHAT_PEERS[username]
+            "peer": peer
         })
 
     except Exception as e:
-        print("[Chat] /submit-info error:", e)
+        chat_log.warning("/submit-info error: %s", e)
         return (500, {"status": "error", "message": str(e)})
 
 
@@ -280,7 +465,7 @@ def chat_add_list(request=None, body=""):
             "channel": "general"
         }
     """
-    print("[Chat] /add-list")
+    chat_log.debug("/add-list")
 
     try:
         data = _chat_read_json_body(request, body)
@@ -294,26 +479,27 @@ def chat_add_list(request=None, body=""):
             })
 
         # Nếu peer chưa submit-info thì auto thêm với ip/port default
-        if username not in CHAT_PEERS:
-            CHAT_PEERS[username] = {
+        members = STATE.execute([
+            ("create", NS_PEERS, username, {
                 "ip": "0.0.0.0",
                 "port": 0,
-                "last_seen": datetime.datetime.utcnow().isoformat() + "Z",
-            }
+                "last_seen": _chat_now(),
+            }),
+            *_chat_ensure_channel_ops(channel),
+            ("add", NS_MEMBERS, channel, username),
+            ("members", NS_MEMBERS, channel),
+        ])[-1]
 
-        _chat_ensure_channel(channel)
-        CHAT_CHANNEL_MEMBERS[channel].add(username)
-
-        print(f"[Chat] {username} joined channel {channel}")
+        chat_log.info("%s joined channel %s", username, channel)
 
         return (200, {
             "status": "ok",
             "channel": channel,
-            "members": sorted(list(CHAT_CHANNEL_MEMBERS[channel]))
+            "members": sorted(members)
         })
 
     except Exception as e:
-        print("[Chat] /add-list error:", e)
+        chat_log.warning("/add-list error: %s", e)
         return (500, {"status": "error", "message": str(e)})
 
 
@@ -328,21 +514,27 @@ def chat_get_list(request=None, body=""):
             "channels": [...]
         }
     """
-    print("[Chat] /get-list")
+    chat_log.debug("/get-list")
+
+    peers, memberships, channels = STATE.execute([
+        ("items", NS_PEERS),
+        ("items", NS_MEMBERS),
+        ("keys", NS_CHANNELS),
+    ])
 
     peers_out = []
-    for username, info in CHAT_PEERS.items():
+    for username, info in peers.items():
         peers_out.append({
             "username": username,
             "ip": info.get("ip", "0.0.0.0"),
             "port": info.get("port", 0),
             "channels": [
-                ch for ch, members in CHAT_CHANNEL_MEMBERS.items()
+                ch for ch, members in memberships.items()
                 if username in members
             ]
         })
 
-    channels = sorted(CHAT_CHANNELS.keys())
+    channels = sorted(channels)
 
     return (200, {
         "status": "ok",
@@ -361,7 +553,7 @@ def chat_connect_peer(request=None, body=""):
         }
     Trả về thông tin IP/port của peer 'to'.
     """
-    print("[Chat] /connect-peer")
+    chat_log.debug("/connect-peer")
     try:
         data = _chat_read_json_body(request, body)
         from_user = data.get("from")
@@ -373,13 +565,13 @@ def chat_connect_peer(request=None, body=""):
                 "message": "from and to are required"
             })
 
-        if to_user not in CHAT_PEERS:
+        target = STATE.get(NS_PEERS, to_user)
+        if target is None:
             return (404, {
                 "status": "not_found",
                 "message": f"Peer {to_user} not found"
             })
 
-        target = CHAT_PEERS[to_user]
         return (200, {
             "status": "ok",
             "from": from_user,
@@ -391,7 +583,7 @@ def chat_connect_peer(request=None, body=""):
         })
 
     except Exception as e:
-        print("[Chat] /connect-peer error:", e)
+        chat_log.warning("/connect-peer error: %s", e)
         return (500, {"status": "error", "message": str(e)})
 
 # --------------------------- Chatting phase ---------------------------------
@@ -407,7 +599,7 @@ def chat_broadcast_peer(request=None, body=""):
             "message": "hello"
         }
     """
-    print("[Chat] /broadcast-peer")
+    chat_log.debug("/broadcast-peer")
 
     try:
         data = _chat_read_json_body(request, body)
@@ -421,18 +613,9 @@ def chat_broadcast_peer(request=None, body=""):
                 "message": "from and message are required"
             })
 
-        _chat_ensure_channel(channel)
-        event = {
-            "type": "broadcast",
-            "from": sender,
-            "to": None,
-            "channel": channel,
-            "message": message,
-            "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
-        }
-        CHAT_CHANNELS[channel].append(event)
+        event = _chat_publish("broadcast", sender, None, channel, message)
 
-        print(f"[Chat] broadcast in {channel} by {sender}: {message}")
+        chat_log.debug("broadcast in %s by %s: %s", channel, sender, message)
 
         return (200, {
             "status": "sent",
@@ -441,7 +624,7 @@ def chat_broadcast_peer(request=None, body=""):
         })
 
     except Exception as e:
-        print("[Chat] /broadcast-peer error:", e)
+        chat_log.warning("/broadcast-peer error: %s", e)
         return (500, {"status": "error", "message": str(e)})
 
 
@@ -457,7 +640,7 @@ def chat_send_peer(request=None, body=""):
             "message": "hi"
         }
     """
-    print("[Chat] /send-peer")
+    chat_log.debug("/send-peer")
 
     try:
         data = _chat_read_json_body(request, body)
@@ -472,18 +655,9 @@ def chat_send_peer(request=None, body=""):
                 "message": "from, to and message are required"
             })
 
-        _chat_ensure_channel(channel)
-        event = {
-            "type": "direct",
-            "from": sender,
-            "to": receiver,
-            "channel": channel,
-            "message": message,
-            "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
-        }
-        CHAT_CHANNELS[channel].append(event)
+        event = _chat_publish("direct", sender, receiver, channel, message)
 
-        print(f"[Chat] direct {sender} -> {receiver} in {channel}: {message}")
+        chat_log.debug("direct %s -> %s in %s: %s", sender, receiver, channel, message)
 
         return (200, {
             "status": "sent",
@@ -492,37 +666,258 @@ def chat_send_peer(request=None, body=""):
         })
 
     except Exception as e:
-        print("[Chat] /send-peer error:", e)
+        chat_log.warning("/send-peer error: %s", e)
         return (500, {"status": "error", "message": str(e)})
 
 
 @app.route("/channel/messages", methods=["POST"])
-def chat_channel_messages(request=None, body=""):
+async def chat_channel_messages(request=None, body=""):
     """
-    Lấy tất cả message trong 1 channel.
+    Lấy message trong 1 channel, phân trang theo ``seq``.
     Body JSON:
         {
-            "channel": "general"
+            "channel": "general",
+            "after": 120,       (optional) chỉ lấy message có seq > after
+            "before": 80,       (optional) chỉ lấy message có seq < before
+            "limit": 50,        (optional) số message tối đa, mặc định PAGE_LIMIT
+            "timeout": 25       (optional) long poll với ``after``, giây
         }
+
+    Mỗi message có ``seq`` tăng dần trong channel (1, 2, 3...), tra từ
+    cursor ra vị trí là O(1), nên response chỉ chứa các message mới:
+
+    - Có ``after``: các message cũ nhất sau ``after`` (đọc tiếp). Với
+      ``timeout``, nếu chưa có message mới thì request được giữ lại (long
+      poll) tới khi có message hoặc hết ``timeout`` (trả về rỗng).
+    - Không có ``after``: các message mới nhất trước ``before`` (hoặc cuối
+      channel), dùng để tải trang đầu rồi cuộn ngược về lịch sử.
+
+    Response: ``next_cursor`` là ``after`` của lần gọi sau (seq cuối đã
+    nhận), ``prev_cursor`` là ``before`` để lấy trang cũ hơn, ``last_seq``
+    là seq mới nhất của channel; ``reset`` báo channel đã bắt đầu lại
+    (server restart), ``truncated`` báo các message ngay sau ``after`` đã
+    bị xoá khỏi lịch sử (giới hạn retention). ``since`` / ``next`` là tên
+    cũ của ``after`` / ``next_cursor``.
+
+    Notes: handler ``async def``, request bị giữ chờ ``CHANNEL_CHANGES``
+    (được ``_chat_publish`` đánh thức): với engine ``eventloop`` và
+    ``asyncio`` không chiếm thread nào; ``thread`` / ``pool`` vẫn giữ thread
+    của kết nối trong lúc chờ.
     """
-    print("[Chat] /channel/messages")
+    chat_log.debug("/channel/messages")
 
     try:
         data = _chat_read_json_body(request, body)
         channel = data.get("channel", "general")
 
-        _chat_ensure_channel(channel)
+        try:
+            after = data.get("after", data.get("since"))
+            after = None if after is None else int(after)
+            before = data.get("before")
+            before = None if before is None else int(before)
+            limit = min(int(data.get("limit", PAGE_LIMIT)), PAGE_MAX_LIMIT)
+            timeout = min(float(data.get("timeout", 0)), LONG_POLL_MAX_TIMEOUT)
+            valid = (after is None or after >= 0) and (before is None or before >= 0) \
+                and limit > 0
+        except (TypeError, ValueError):
+            valid = False
+        if not valid:
+            return (400, {
+                "status": "bad_request",
+                "message": "after / before must be non-negative integers, "
+                           "limit a positive integer, timeout a number"
+            })
 
+        if after is not None and before is None and timeout > 0:
+            last, messages = await _chat_wait_messages(channel, after, limit, timeout)
+        else:
+            messages, last = (await _chat_execute([
+                *_chat_ensure_channel_ops(channel),
+                ("page", NS_CHANNELS, channel, after, before, limit),
+            ]))[-1]
+
+        next_cursor = messages[-1]["seq"] if messages else last
         return (200, {
             "status": "ok",
             "channel": channel,
-            "messages": CHAT_CHANNELS[channel]
+            "messages": messages,
+            "next_cursor": next_cursor,
+            "prev_cursor": messages[0]["seq"] if messages else before,
+            "last_seq": last,
+            "next": next_cursor,
+            "reset": after is not None and last < after,
+            "truncated": bool(messages) and after is not None
+                         and messages[0]["seq"] > after + 1
         })
 
     except Exception as e:
-        print("[Chat] /channel/messages error:", e)
+        chat_log.warning("/channel/messages error: %s", e)
         return (500, {"status": "error", "message": str(e)})
 
+
+@app.route("/history-stats", methods=["GET"])
+def chat_history_stats(request=None):
+    """
+    Retention của lịch sử channel: số message / bytes đang giữ, seq đầu và
+    cuối, số message bị xoá (evicted) của từng channel và của memory budget
+    chung (``null`` khi không cấu hình).
+    """
+    history = STATE.history(NS_CHANNELS)
+    return (200, {"status": "ok", "channels": history["logs"], "budget": history["budget"]})
+
+
+async def _chat_event_frames(channel, since, user=None):
+    """
+    Sinh các event SSE của channel sau seq ``since`` (vô hạn), async
+    generator chờ ``CHANNEL_CHANGES`` nên không chiếm thread giữa 2 event.
+
+    Mỗi event có ``id`` = ``seq`` của message, dùng làm ``Last-Event-ID`` khi
+    client kết nối lại. Direct message không liên quan tới ``user`` bị bỏ
+    qua khi có ``user``. Lần chờ nào không sinh được event (hết
+    ``SSE_HEARTBEAT`` giây, hoặc chỉ có direct message bị lọc) thì sinh
+    ``None`` (heartbeat), để kết nối đã đóng được phát hiện khi ghi.
+    """
+    while True:
+        last, events = await _chat_wait_messages(channel, since, PAGE_MAX_LIMIT, SSE_HEARTBEAT)
+        sent = False
+        if last < since:
+            # Channel bắt đầu lại (server restart): gửi lại toàn bộ lịch sử
+            yield {"event": "reset", "data": {"channel": channel}}
+            sent = True
+
+        for event in events:
+            if user and event.get("type") == "direct" \
+                    and user not in (event.get("from"), event.get("to")):
+                continue
+            yield {"id": event["seq"], "event": event.get("type", "message"),
+                   "data": event}
+            sent = True
+        if not sent:
+            yield None
+        since = events[-1]["seq"] if events else last
+
+
+@app.route("/channel/<name>/events", methods=["GET"])
+def chat_channel_events(name, request=None):
+    """
+    Server-Sent Events: stream ``text/event-stream`` các message của channel.
+        GET /channel/general/events?user=alice&since=0
+
+    - ``since`` (mặc định 0: gửi cả lịch sử) hoặc header ``Last-Event-ID``
+      (EventSource tự gửi khi kết nối lại) chọn vị trí bắt đầu.
+    - ``user``: chỉ nhận direct message của user đó.
+    - Event ``broadcast`` / ``direct`` mang message JSON, ``reset`` báo
+      channel đã bắt đầu lại; heartbeat mỗi ``SSE_HEARTBEAT`` giây.
+
+    Notes: event được sinh bởi async generator; engine ``eventloop`` và
+    ``asyncio`` không chiếm thread nào giữa 2 event, ``thread`` giữ thread
+    của kết nối suốt stream, ``pool`` chuyển stream sang thread riêng để
+    không giữ worker.
+    """
+    channel = unquote(name)
+    chat_log.debug("/channel/%s/events", channel)
+
+    query = request.query if request is not None else {}
+    headers = request.headers if request is not None else {}
+    try:
+        since = int(headers.get("last-event-id") or query.get("since") or 0)
+    except ValueError:
+        since = -1
+    if since < 0:
+        return (400, {
+            "status": "bad_request",
+            "message": "since / Last-Event-ID must be a non-negative integer"
+        })
+
+    STATE.execute(_chat_ensure_channel_ops(channel))
+    return stream_events(_chat_event_frames(channel, since, query.get("user")),
+                         retry=SSE_RETRY)
+
+
+async def _chat_push_events(ws, channel, since, user):
+    """
+    Đẩy event của channel xuống WebSocket tới khi kết nối đóng, chạy bằng
+    ``asyncio.run`` trên thread riêng. ``WS_CLOSED`` đánh thức nó ngay khi
+    vòng nhận message kết thúc, không phải đợi event hay heartbeat tiếp theo.
+    """
+    closed = WS_CLOSED.subscribe(ws)
+    frames = _chat_event_frames(channel, since, user)
+    try:
+        # Đăng ký trước rồi mới kiểm tra: kết nối đóng trước đó thì dừng luôn
+        while not ws.closed:
+            frame = asyncio.ensure_future(frames.__anext__())
+            await asyncio.wait((frame, closed), return_when=asyncio.FIRST_COMPLETED)
+            if not frame.done():
+                frame.cancel()
+                try:
+                    await frame
+                except asyncio.CancelledError:
+                    pass
+                break
+            frame = frame.result()
+            if frame is not None and not ws.closed:
+                ws.send(json.dumps(frame))
+    except OSError as e:
+        chat_log.debug("WebSocket push to %s stopped: %s", user, e)
+    finally:
+        WS_CLOSED.unsubscribe(ws, closed)
+        await frames.aclose()
+
+
+@app.websocket("/channel/<name>/ws")
+def chat_channel_ws(name, ws, request=None):
+    """
+    WebSocket của channel: gửi và nhận message trên cùng một kết nối.
+        ws://host/channel/general/ws?user=alice&since=0
+
+    - Client gửi JSON ``{"type": "broadcast", "message": "hello"}`` hoặc
+      ``{"type": "direct", "to": "bob", "message": "hi"}``, người gửi là ``user``.
+    - Server đẩy ``{"id", "event", "data"}`` giống event SSE (``broadcast``,
+      ``direct``, ``reset``); message gửi lên không hợp lệ được trả lời
+      ``{"event": "error", "data": {"message": ...}}``.
+    - ``since`` (mặc định 0: gửi cả lịch sử) chọn vị trí bắt đầu; client kết
+      nối lại với ``since`` = ``id`` cuối cùng đã nhận.
+
+    Notes: mỗi kết nối giữ thread xử lý (nhận message, engine ``pool`` dùng
+    thread riêng thay vì worker) và một thread đẩy event, thread đẩy dừng
+    ngay khi kết nối đóng; chỉ engine ``thread`` và ``pool`` (engine khác
+    trả 501, ``chat.html`` chuyển sang SSE).
+    """
+    channel = unquote(name)
+    query = request.query if request is not None else {}
+    user = query.get("user")
+    try:
+        since = int(query.get("since") or 0)
+    except ValueError:
+        since = -1
+    if not user or since < 0:
+        ws.close(CLOSE_POLICY_VIOLATION, "user and a non-negative since are required")
+        return
+
+    chat_log.debug("/channel/%s/ws opened by %s", channel, user)
+    STATE.execute(_chat_ensure_channel_ops(channel))
+    threading.Thread(target=asyncio.run, args=(_chat_push_events(ws, channel, since, user),),
+                     name="ws-push-{}".format(user), daemon=True).start()
+
+    try:
+        for text in ws:
+            try:
+                data = json.loads(text)
+                kind = data.get("type", "broadcast")
+                message = data.get("message", "")
+                receiver = data.get("to") if kind == "direct" else None
+                if kind not in ("broadcast", "direct") or not message \
+                        or (kind == "direct" and not receiver):
+                    raise ValueError("type (broadcast / direct), message and to are required")
+            except (ValueError, AttributeError) as e:
+                ws.send(json.dumps({"event": "error", "data": {"message": str(e)}}))
+                continue
+            _chat_publish(kind, user, receiver, channel, message)
+    finally:
+        # Cả khi _chat_publish lỗi (vd. state server không kết nối được)
+        WS_CLOSED.notify(ws)
+    chat_log.debug("/channel/%s/ws closed by %s", channel, user)
+
 # ============================================================================
 # Entry Point
 # ============================================================================
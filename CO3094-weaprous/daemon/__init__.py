@@ -13,8 +13,21 @@
 from .backend import create_backend
 from .proxy import create_proxy
 from .weaprous import WeApRous
-from .response import Response
-from .request import Request
+from .response import Response, StaticFileCache, STATIC_CACHE
+from .request import Request, HttpParseError
+from .parser import HttpParser
+from .router import Router, RouteError
 from .backend import create_backend
 from .httpadapter import HttpAdapter
-from .dictionary import CaseInsensitiveDict
\ No newline at end of file
+from .dictionary import CaseInsensitiveDict
+from .workerpool import WorkerPool
+from .keepalive import KeepAliveParker
+from .statestore import (StateStore, LocalStateStore, SharedStateStore, DurableStateStore,
+                         EventLog, HistoryBudget)
+from .journal import Journal, JournalError
+from .notifier import Notifier
+from .streaming import stream_json, JSONStream, stream_events, EventStream
+from .writer import BufferResponse
+from .logger import setup_logging
+from .metrics import Metrics, METRICS
+from .websocket import WebSocket, WebSocketError
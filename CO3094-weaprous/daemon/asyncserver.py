@@ -0,0 +1,287 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.asyncserver
+~~~~~~~~~~~~~~~~~
+
+This module provides the ``asyncio`` backend engine built on
+:func:`asyncio.start_server`. Every connection is served by one coroutine
+instead of one thread.
+
+Requests are parsed incrementally by a per-connection
+:class:`HttpParser <HttpParser>` fed with the bytes read from the stream.
+Route handlers may be declared with ``async def`` and are awaited directly
+on the event loop; plain functions are pushed to a thread pool executor so
+they never block the loop. Static file bodies are streamed with
+:meth:`loop.sendfile <asyncio.loop.sendfile>` (``sendfile(2)`` when the
+transport allows it, buffered copies otherwise). Chunks of streamed handler
+results are produced in the executor, one at a time as the transport drains;
+chunks of async iterators are awaited on the loop.
+Connections are persistent (HTTP/1.1 keep-alive) with the idle timeout and
+request limit of :class:`HttpAdapter <HttpAdapter>`.
+
+Usage Example:
+--------------
+>>> app = WeApRous()
+>>> @app.route('/channel/messages', methods=['POST'])
+>>> async def messages(request=None):
+>>>     await asyncio.sleep(0)
+>>>     return {'messages': []}
+>>> app.prepare_address('0.0.0.0', 9000)
+>>> app.run(engine="asyncio")
+"""
+
+import asyncio
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .request import HttpParseError
+from .parser import HttpParser, BUFFER_SIZE
+from .response import Response, FileResponse, StreamResponse, STATIC_CACHE
+from .streaming import StreamError
+from .writer import BufferResponse
+from .logger import log_access
+from .metrics import METRICS
+from .eventloop import LISTEN_BACKLOG
+from .httpadapter import KEEPALIVE_TIMEOUT, MAX_KEEPALIVE_REQUESTS
+from .router import is_async_handler
+from .utils import create_server_socket
+
+#: Default number of executor threads running synchronous handlers.
+DEFAULT_EXECUTOR_WORKERS = 32
+
+log = logging.getLogger(__name__)
+
+
+class AsyncServer:
+    """
+    HTTP server running one coroutine per connection on an asyncio loop.
+
+    :attrs ip (str): IP address to bind.
+    :attrs port (int): port to listen on.
+    :attrs routes (dict): route handlers registered by ``WeApRous``.
+    :attrs executor (ThreadPoolExecutor): runs synchronous handlers.
+    """
+
+    __attrs__ = [
+        "ip",
+        "port",
+        "routes",
+        "reuse_port",
+        "executor",
+    ]
+
+    def __init__(self, ip, port, routes, max_workers=DEFAULT_EXECUTOR_WORKERS,
+                 reuse_port=False):
+        """
+        Initialize a new AsyncServer instance.
+
+        :param ip (str): IP address to bind the server.
+        :param port (int): Port number to listen on.
+        :param routes (dict): Dictionary of route handlers.
+        :param max_workers (int): executor threads for synchronous handlers.
+        :param reuse_port (bool): bind with ``SO_REUSEPORT``.
+        """
+        self.ip = ip
+        self.port = port
+        self.routes = routes
+        self.reuse_port = reuse_port
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="async-handler")
+
+    async def serve_forever(self):
+        """Start listening and serve connections until cancelled."""
+        sock = create_server_socket(self.ip, self.port, LISTEN_BACKLOG,
+                                    reuse_port=self.reuse_port)
+        server = await asyncio.start_server(
+            self.handle_connection, sock=sock, limit=BUFFER_SIZE)
+        log.info("Listening on port %s", self.port)
+        async with server:
+            await server.serve_forever()
+
+    async def run_in_executor(self, func, *args, **kwargs):
+        """Run a blocking callable in the handler executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(func, *args, **kwargs))
+
+    async def read_request(self, reader, parser):
+        """
+        Read until ``parser`` holds one complete request (headers and body).
+
+        :param reader (asyncio.StreamReader): connection reader.
+        :param parser (HttpParser): parser of the connection.
+
+        :rtype Request: the prepared request, or ``None`` when the peer closed first.
+        :raise HttpParseError: when the request is malformed or too large.
+        """
+        while True:
+            req = parser.next_request(self.routes)
+            if req is not None:
+                return req
+            data = await reader.read(BUFFER_SIZE)
+            if not data:
+                return None
+            parser.feed(data)
+
+    async def dispatch(self, req, resp):
+        """
+        Build the response of a parsed request.
+
+        ``async def`` handlers are awaited on the loop, plain handlers and
+        static files run in the executor.
+
+        :param req (Request): the prepared request.
+        :param resp (Response): response carrying the connection headers.
+
+        :rtype bytes | FileResponse: the HTTP response.
+        """
+        if not req.hook or req.is_websocket:
+            # Static files, 404/405, and WebSocket routes (answered 501)
+            return await self.run_in_executor(resp.build_response, req)
+
+        try:
+            if is_async_handler(req.hook):
+                started = time.perf_counter()
+                result = await req.call_hook()
+                if req.handler_time is not None:
+                    # Wall time of the coroutine, its CPU is shared with the loop
+                    req.handler_time = time.perf_counter() - started
+            else:
+                result = await self.run_in_executor(req.call_hook)
+        except Exception as e:
+            log.exception("Error in hook handler: %s", e)
+            return resp.build_error_response(500, str(e))
+        return resp.build_result_response(req, result)
+
+    async def write_response(self, writer, response):
+        """
+        Write a built response and wait until the transport accepted it.
+
+        :param writer (asyncio.StreamWriter): connection writer.
+        :param response (bytes | BufferResponse | FileResponse | StreamResponse):
+                        the response to send.
+        """
+        if isinstance(response, BufferResponse):
+            # Head and body handed over separately, the transport gathers them
+            writer.writelines(response.buffers)
+            await writer.drain()
+            return
+        if isinstance(response, StreamResponse):
+            writer.write(response.header)
+            if response.is_async:
+                # Awaited on the loop, no executor thread held between chunks
+                try:
+                    async for chunk in response.chunks:
+                        writer.write(chunk)
+                        await writer.drain()
+                finally:
+                    await response.chunks.aclose()
+                return
+            while True:
+                chunk = await self.run_in_executor(next, response.chunks, None)
+                if chunk is None:
+                    break
+                writer.write(chunk)
+                await writer.drain()
+            return
+        if not isinstance(response, FileResponse):
+            writer.write(response)
+            await writer.drain()
+            return
+        writer.write(response.header)
+        if response.length:
+            loop = asyncio.get_running_loop()
+            with open(response.filepath, "rb") as f:
+                await loop.sendfile(writer.transport, f, response.offset, response.length)
+        await writer.drain()
+
+    async def handle_connection(self, reader, writer):
+        """Serve the requests of one persistent client connection."""
+        addr = writer.get_extra_info("peername")
+        parser = HttpParser()
+        # One response object per connection, reset for every request
+        resp = Response()
+        served = 0
+        METRICS.connection_opened()
+        try:
+            while True:
+                try:
+                    req = await asyncio.wait_for(
+                        self.read_request(reader, parser), KEEPALIVE_TIMEOUT)
+                except HttpParseError as e:
+                    resp = Response()
+                    resp.set_connection(False)
+                    await self.write_response(
+                        writer, resp.build_error_response(e.status_code, str(e)))
+                    return
+                if req is None:
+                    return
+                served += 1
+                started = time.monotonic()
+
+                resp.reset(req)
+                keep_alive = False
+                try:
+                    keep_alive = req.wants_keep_alive() and served < MAX_KEEPALIVE_REQUESTS
+                    resp.set_connection(keep_alive, KEEPALIVE_TIMEOUT,
+                                        MAX_KEEPALIVE_REQUESTS - served)
+                    response = await self.dispatch(req, resp)
+                except Exception as e:
+                    log.exception("Error handling client %s: %s", addr, e)
+                    resp.set_connection(False)
+                    response = resp.build_error_response(500, str(e))
+                log_access(addr, req, response, started)
+
+                sending = time.perf_counter()
+                await self.write_response(writer, response)
+                METRICS.observe(req, response, time.perf_counter() - sending)
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            pass
+        except StreamError as e:
+            log.warning("Aborting response to %s: %s", addr, e)
+        finally:
+            METRICS.connection_closed()
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+def run_asyncio(ip, port, routes, max_workers=DEFAULT_EXECUTOR_WORKERS, reuse_port=False):
+    """
+    Entry point of the ``asyncio`` engine.
+
+    :param ip (str): IP address to bind the server.
+    :param port (int): Port number to listen on.
+    :param routes (dict): Dictionary of route handlers.
+    :param max_workers (int): executor threads for synchronous handlers.
+    :param reuse_port (bool): bind with ``SO_REUSEPORT``.
+    """
+    server = AsyncServer(ip, port, routes, max_workers=max_workers, reuse_port=reuse_port)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        log.info("Shutting down the server.")
+    except OSError as e:
+        # Re-raised: a worker that cannot bind must exit with a failure status
+        log.error("Socket error: %s", e)
+        raise
+    finally:
+        log.info("static cache stats %s", STATIC_CACHE.stats())
+        server.executor.shutdown(wait=False)
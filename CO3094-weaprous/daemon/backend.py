@@ -31,24 +31,62 @@ Requirements:
 Notes:
 ------
 - The server create daemon threads for client handling.
+- The ``engine`` option selects how accepted connections are served:
+    * ``thread`` (default): one daemon thread per connection.
+    * ``pool``: a bounded :class:`WorkerPool <WorkerPool>` sized by
+      ``min_workers``, ``max_workers`` and ``queue_size``. Connections
+      arriving while the queue is full are answered with 503. Idle
+      keep-alive connections wait in a :class:`KeepAliveParker
+      <KeepAliveParker>`, not in a worker, see :mod:`daemon.keepalive`.
+      WebSocket and live event stream connections get a thread of their
+      own, see :func:`run_detached`, so open chat tabs cannot starve the pool.
+    * ``eventloop``: one thread multiplexing every socket with
+      :mod:`selectors`, see :mod:`daemon.eventloop`.
+    * ``asyncio``: one coroutine per connection on :func:`asyncio.start_server`,
+      ``async def`` handlers are awaited, see :mod:`daemon.asyncserver`.
+- ``workers`` > 1 pre-forks that many processes sharing the port with
+  ``SO_REUSEPORT``, each running the selected engine, see :mod:`daemon.prefork`.
 - The current implementation error handling is minimal, socket errors are printed to the console.
 - The actual request processing is delegated to the HttpAdapter class.
 
 Usage Example:
 --------------
 >>> create_backend("127.0.0.1", 9000, routes={})
+>>> create_backend("127.0.0.1", 9000, routes={}, engine="pool", max_workers=32)
+>>> create_backend("0.0.0.0", 9000, routes={}, engine="eventloop", workers=4)
 
 """
 
+import logging
+import queue
 import socket
 import threading
+import time
 import argparse
 
 from .response import *
-from .httpadapter import HttpAdapter
+from .httpadapter import HttpAdapter, KEEPALIVE_TIMEOUT
 from .dictionary import CaseInsensitiveDict
+from .router import as_router
+from .workerpool import WorkerPool
+from .keepalive import KeepAliveParker
+from .eventloop import run_eventloop
+from .asyncserver import run_asyncio, DEFAULT_EXECUTOR_WORKERS
+from .utils import create_server_socket
+from .prefork import run_prefork
+from .logger import setup_logging, is_configured
+from .metrics import METRICS
 
-def handle_client(ip, port, conn, addr, routes):
+log = logging.getLogger(__name__)
+
+#: Names accepted by the ``engine`` option of :func:`create_backend`.
+ENGINES = ("thread", "pool", "eventloop", "asyncio")
+
+#: Per-thread :class:`HttpAdapter` reused by :func:`handle_client`.
+_worker_local = threading.local()
+
+def handle_client(ip, port, conn, addr, routes, accepted=None, served=0, park=None,
+                  detach=None):
     """
     Initializes an HttpAdapter instance and delegates the client handling logic to it.
 
@@ -57,36 +95,143 @@ def handle_client(ip, port, conn, addr, routes):
     :param conn (socket.socket): Client connection socket.
     :param addr (tuple): client address (IP, port).
     :param routes (dict): Dictionary of route handlers.
+    :param accepted (float): ``time.perf_counter()`` at accept, for the queue wait metric.
+    :param served (int): requests already served on a connection resumed from ``park``.
+    :param park (callable): takes over idle keep-alive connections, see
+                            :meth:`HttpAdapter.handle_client`.
+    :param detach (callable): runs WebSocket and live stream connections on
+                              a thread of their own, see :func:`run_detached`.
     """
-    daemon = HttpAdapter(ip, port, conn, addr, routes)
+    # Pool workers keep one adapter for every connection they serve
+    daemon = getattr(_worker_local, "adapter", None)
+    if daemon is None:
+        daemon = _worker_local.adapter = HttpAdapter(ip, port, conn, addr, routes)
+    else:
+        daemon.reset(ip, port, conn, addr, routes)
 
     # Handle client
-    daemon.handle_client(conn, addr, routes)
+    daemon.handle_client(conn, addr, routes, accepted, served, park, detach)
+
+def reject_client(conn, addr, status_code=503, message="Server busy"):
+    """
+    Answer a connection that cannot be served with an error response and close it.
+
+    :param conn (socket.socket): Client connection socket.
+    :param addr (tuple): client address (IP, port).
+    :param status_code (int): HTTP status code of the rejection.
+    :param message (str): error message placed in the JSON body.
+    """
+    try:
+        send_response(conn, Response().build_error_response(status_code, message))
+    except socket.error as e:
+        log.warning("Error rejecting client %s: %s", addr, e)
+    finally:
+        try:
+            conn.close()
+        except socket.error:
+            pass
+
+
+def run_detached(target, *args):
+    """
+    Run a long-lived connection (WebSocket, live event stream) handed off by
+    a pool worker on a daemon thread of its own, as the ``thread`` engine would.
 
-def run_backend(ip, port, routes):
+    :param target (callable): the adapter method serving the rest of the connection.
+    :param args: its arguments, the client address second.
+    """
+    addr = args[1]
+    threading.Thread(target=target, args=args, daemon=True,
+                     name="backend-detached-{}:{}".format(addr[0], addr[1])).start()
+
+
+def create_pool(min_workers=None, max_workers=None, queue_size=None):
+    """
+    Build the :class:`WorkerPool <WorkerPool>` used by the ``pool`` engine.
+
+    Unset options fall back to the :mod:`daemon.workerpool` defaults.
+
+    :param min_workers (int): workers kept alive when idle.
+    :param max_workers (int): maximum number of worker threads.
+    :param queue_size (int): maximum number of connections waiting for a worker.
+
+    :rtype WorkerPool: the configured worker pool.
+    """
+    options = {}
+    if min_workers is not None:
+        options["min_workers"] = min_workers
+    if max_workers is not None:
+        options["max_workers"] = max_workers
+    if queue_size is not None:
+        options["queue_size"] = queue_size
+    return WorkerPool(**options)
+
+
+def run_backend(ip, port, routes, engine="thread", pool=None, max_workers=None,
+                reuse_port=False):
     """
     Starts the backend server, binds to the specified IP and port, and listens for incoming
-    connections. Each connection is handled in a separate thread. The backend accepts incoming
-    connections and spawns a thread for each client.
+    connections. With the ``thread`` engine each connection is handled in a separate thread.
+    With the ``pool`` engine accepted connections are queued to a bounded worker pool.
+    The ``eventloop`` and ``asyncio`` engines are delegated to :func:`run_eventloop
+    <run_eventloop>` and :func:`run_asyncio <run_asyncio>`.
 
 
     :param ip (str): IP address to bind the server.
     :param port (int): Port number to listen on.
-    :param routes (dict): Dictionary of route handlers.
+    :param routes (Router | dict): route handlers, compiled with :func:`as_router`.
+    :param engine (str): ``thread``, ``pool``, ``eventloop`` or ``asyncio``.
+    :param pool (WorkerPool): worker pool used by the ``pool`` engine, a default
+                              pool is created when omitted.
+    :param max_workers (int): executor threads of the ``asyncio`` engine.
+    :param reuse_port (bool): bind with ``SO_REUSEPORT`` so pre-forked workers
+                              share the port.
     """
-    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    if engine not in ENGINES:
+        raise ValueError("Unknown backend engine {!r}, expected one of {}".format(
+            engine, ", ".join(ENGINES)))
+    # Compile once, not on every request
+    routes = as_router(routes)
+
+    if engine == "eventloop":
+        run_eventloop(ip, port, routes, reuse_port=reuse_port)
+        return
+
+    if engine == "asyncio":
+        run_asyncio(ip, port, routes, max_workers=max_workers or DEFAULT_EXECUTOR_WORKERS,
+                    reuse_port=reuse_port)
+        return
+
+    parker = None
+    if engine == "pool":
+        if pool is None:
+            pool = create_pool()
+
+        def resume(conn, addr, served):
+            # Kết nối keep-alive có request mới: đưa lại vào worker pool
+            try:
+                pool.submit(handle_client, ip, port, conn, addr, routes, None,
+                            served, parker.park, run_detached)
+            except queue.Full:
+                log.warning("Worker queue full, rejecting %s", addr)
+                METRICS.connection_closed()
+                reject_client(conn, addr)
+
+        parker = KeepAliveParker(resume, KEEPALIVE_TIMEOUT)
 
     try:
-        server.bind((ip, port))
-        server.listen(50)
+        server = create_server_socket(ip, port, 50, reuse_port=reuse_port)
         server.settimeout(1)  # Set timeout 1 giây để CTRL+C hoạt động
-        print("[Backend] Listening on port {}".format(port))
-        if routes != {}:
-            print("[Backend] route settings {}".format(routes))
+        log.info("Listening on port %s (%s engine)", port, engine)
+        if routes:
+            log.info("Route settings %s", routes)
+        if engine == "pool":
+            log.info("Worker pool engine %s", pool.stats())
 
         while True:
             try:
                 conn, addr = server.accept()
+                accepted = time.perf_counter()
                 #
                 #  TODO: implement the step of the client incomping connection
                 #        using multi-thread programming with the
@@ -94,10 +239,20 @@ def run_backend(ip, port, routes):
                 #
                 # Chấp nhận kết nối client (blocking)
 
+                if engine == "pool":
+                    # Đưa kết nối vào hàng đợi của worker pool
+                    try:
+                        pool.submit(handle_client, ip, port, conn, addr, routes, accepted,
+                                    0, parker.park, run_detached)
+                    except queue.Full:
+                        log.warning("Worker queue full, rejecting %s", addr)
+                        reject_client(conn, addr)
+                    continue
+
                 # Tạo một thread mới để xử lý kết nối này bằng hàm handle_client
                 t = threading.Thread(
                     target=handle_client,
-                    args=(ip, port, conn, addr, routes),
+                    args=(ip, port, conn, addr, routes, accepted),
                     name="backend-client-{}:{}".format(addr[0], addr[1]) # for debugging purposes
                 )
                 # Đặt thread là daemon để khi process chính kết thúc thì các thread con cũng không ngăn chương trình thoát
@@ -109,27 +264,63 @@ def run_backend(ip, port, routes):
                 # Timeout để CTRL+C có thể gián đoạn
                 continue
             except KeyboardInterrupt:
-                print("\n[Backend] Shutting down the server.")
+                log.info("Shutting down the server.")
                 try:
                     server.close()
                 except Exception as e:
-                    print("Error closing server: {}".format(e))
-                    pass
+                    log.warning("Error closing server: %s", e)
                 break
 
             except socket.error as e:
-                print("[Backend] Socket error on accept: {}".format(e))
+                log.warning("Socket error on accept: %s", e)
                 continue
     except socket.error as e:
-      print("Socket error: {}".format(e))
+        # Re-raised: a worker that cannot bind must exit with a failure status
+        log.error("Socket error: %s", e)
+        raise
+    finally:
+        log.info("Static cache stats %s", STATIC_CACHE.stats())
+        if parker is not None:
+            parker.close()
+        if pool is not None:
+            log.info("Worker pool stats %s", pool.stats())
+            pool.shutdown()
 
-def create_backend(ip, port, routes={}):
+def create_backend(ip, port, routes={}, engine="thread", pool=None, workers=1, **pool_options):
     """
     Entry point for creating and running the backend server.
 
     :param ip (str): IP address to bind the server.
     :param port (int): Port number to listen on.
     :param routes (dict, optional): Dictionary of route handlers. Defaults to empty dict.
+    :param engine (str, optional): ``thread`` (default), ``pool``, ``eventloop`` or ``asyncio``.
+    :param pool (WorkerPool, optional): pre-built pool for the ``pool`` engine.
+    :param pool_options: ``min_workers``, ``max_workers`` and ``queue_size`` used
+                         to build the pool when ``pool`` is omitted. ``max_workers``
+                         also sizes the handler executor of the ``asyncio`` engine.
+    :param workers (int, optional): number of pre-forked processes, 1 runs the
+                                    engine in the current process.
     """
+    # Background log writer, unless the application configured it already
+    if not is_configured():
+        setup_logging()
+
+    if workers > 1:
+        def serve_worker():
+            # Threads do not survive fork: each worker builds its own pool.
+            worker_pool = create_pool(**pool_options) if engine == "pool" else None
+            run_backend(ip, port, routes, engine=engine, pool=worker_pool,
+                        max_workers=pool_options.get("max_workers"), reuse_port=True)
+
+        # Fail before forking when the address is taken: workers could never bind it.
+        # Probe without SO_REUSEPORT, otherwise the bind succeeds next to another
+        # instance of this server and both silently share the port.
+        create_server_socket(ip, port).close()
+        run_prefork(workers, serve_worker)
+        return
+
+    if engine == "pool" and pool is None:
+        pool = create_pool(**pool_options)
 
-    run_backend(ip, port, routes)
\ No newline at end of file
+    run_backend(ip, port, routes, engine=engine, pool=pool,
+                max_workers=pool_options.get("max_workers"))
@@ -0,0 +1,162 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.compression
+~~~~~~~~~~~~~~~~~
+
+This module provides the ``Content-Encoding`` negotiation and compression
+helpers used by :class:`Response <Response>`.
+
+Only bodies of at least ``COMPRESS_MIN_SIZE`` bytes whose MIME type is in
+``COMPRESSIBLE_TYPES`` are compressed, with ``gzip`` preferred over
+``deflate`` at equal quality. JSON bodies are compressed while they are
+being encoded (:func:`encode_json`), so a large history is never held in
+memory twice.
+
+Usage Example:
+--------------
+>>> encoding = choose_encoding(request.headers.get("accept-encoding"))
+>>> body, used = encode_json({"messages": [...]}, encoding)
+"""
+
+import json
+import zlib
+
+#: Bodies smaller than this are sent as they are.
+COMPRESS_MIN_SIZE = 1024
+#: zlib compression level, 6 is the gzip default speed/ratio trade-off.
+COMPRESS_LEVEL = 6
+#: MIME types (exact or ``type/`` prefix) worth compressing.
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+#: Supported codings by preference, with their zlib window bits.
+ENCODINGS = {
+    "gzip": 16 + zlib.MAX_WBITS,
+    "deflate": zlib.MAX_WBITS,
+}
+#: JSON text accumulated before each call into the compressor.
+JSON_CHUNK_SIZE = 16 * 1024
+
+
+def is_compressible(mime_type):
+    """
+    Whether bodies of ``mime_type`` are worth compressing.
+
+    :param mime_type (str): ``Content-Type`` value, parameters allowed.
+
+    :rtype bool: True for text-like types of ``COMPRESSIBLE_TYPES``.
+    """
+    mime_type = mime_type.split(";", 1)[0].strip().lower()
+    return any(mime_type == t or (t.endswith("/") and mime_type.startswith(t))
+               for t in COMPRESSIBLE_TYPES)
+
+
+def choose_encoding(accept_encoding):
+    """
+    Pick the response coding from an ``Accept-Encoding`` header.
+
+    Codings listed with ``q=0`` are refused (RFC 9110 section 12.5.3), ``*``
+    only picks among the codings that were not: ``gzip;q=0, *`` gives deflate.
+
+    :param accept_encoding (str): header value, ``None`` when absent.
+
+    :rtype str: ``"gzip"``, ``"deflate"`` or ``None`` for identity.
+    """
+    if not accept_encoding:
+        return None
+    best, best_q = None, 0.0
+    wildcard = None
+    refused = set()
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if coding == "*":
+            wildcard = q
+        elif q <= 0:
+            refused.add(coding)
+        elif coding in ENCODINGS and q > best_q:
+            best, best_q = coding, q
+        elif coding == "gzip" and q == best_q and best == "deflate":
+            best = "gzip"
+    if best is None and wildcard:
+        # ENCODINGS is in preference order: gzip, else deflate, else identity
+        best = next((coding for coding in ENCODINGS if coding not in refused), None)
+    return best
+
+
+def compressor(encoding, level=COMPRESS_LEVEL):
+    """New zlib compressor producing ``encoding`` (``gzip`` or ``deflate``)."""
+    return zlib.compressobj(level, zlib.DEFLATED, ENCODINGS[encoding])
+
+
+def compress(data, encoding, level=COMPRESS_LEVEL):
+    """
+    Compress a whole body.
+
+    :param data (bytes): body to compress.
+    :param encoding (str): ``gzip`` or ``deflate``.
+
+    :rtype bytes: the encoded body.
+    """
+    c = compressor(encoding, level)
+    return c.compress(data) + c.flush()
+
+
+def encode_json(data, encoding=None, min_size=COMPRESS_MIN_SIZE):
+    """
+    Serialize ``data`` to JSON, compressing it on the fly once it is large.
+
+    The encoder output is buffered until ``min_size`` bytes, after which
+    every ``JSON_CHUNK_SIZE`` chunk is fed to the compressor and dropped, so
+    only the compressed body is kept in memory.
+
+    :param data: JSON serializable value.
+    :param encoding (str): negotiated coding, ``None`` for identity.
+    :param min_size (int): smaller bodies are not compressed.
+
+    :rtype tuple: (body bytes, coding used or ``None``).
+    """
+    if encoding is None:
+        return json.dumps(data).encode("utf-8"), None
+
+    chunks, size = [], 0
+    c = None
+    out = []
+    for piece in json.JSONEncoder().iterencode(data):
+        chunks.append(piece)
+        size += len(piece)
+        if size < JSON_CHUNK_SIZE and (c is not None or size < min_size):
+            continue
+        if c is None:
+            c = compressor(encoding)
+        out.append(c.compress("".join(chunks).encode("utf-8")))
+        chunks, size = [], 0
+
+    if c is None:
+        return "".join(chunks).encode("utf-8"), None
+    if chunks:
+        out.append(c.compress("".join(chunks).encode("utf-8")))
+    out.append(c.flush())
+    return b"".join(out), encoding
@@ -0,0 +1,584 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.eventloop
+~~~~~~~~~~~~~~~~~
+
+This module provides the ``eventloop`` backend engine. A single thread
+multiplexes the listening socket and every client socket with
+:class:`selectors.DefaultSelector` (epoll on Linux, kqueue on BSD/macOS).
+
+Sockets are non-blocking: bytes are received into the buffer of a
+per-connection :class:`HttpParser <HttpParser>` until a full HTTP request
+(headers plus ``Content-Length`` body) is parsed, then the request is
+dispatched to the ``WeApRous`` route handlers and the response built by
+:class:`Response <Response>` is written back as the socket becomes writable.
+Idle connections therefore cost a few hundred bytes instead of a thread.
+In-memory heads and bodies are queued as separate buffers and written
+together with scatter-gather ``sendmsg`` calls, static file bodies are
+streamed with non-blocking ``os.sendfile`` calls and streamed handler
+results are pulled one chunk at a time as the socket drains.
+
+Connections are persistent (HTTP/1.1 keep-alive) with the same idle timeout
+and per-connection request limit as :class:`HttpAdapter <HttpAdapter>`; idle
+connections are swept once per loop tick. Pipelined requests are answered
+in order, up to ``MAX_PIPELINE_DEPTH`` per write.
+
+``async def`` route handlers, and the chunks of streamed results produced
+by async iterators, run on a helper thread running an asyncio loop: while
+one is pending its connection is parked (neither read nor swept) and the
+loop keeps serving the others, the result is written once the coroutine
+returns. A long poll or an idle event stream therefore costs no thread.
+
+Notes:
+------
+- Plain route handlers run on the loop thread, long blocking handlers delay
+  every other connection.
+
+Usage Example:
+--------------
+>>> create_backend("127.0.0.1", 9000, routes={}, engine="eventloop")
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+
+from .request import HttpParseError
+from .parser import HttpParser
+from .response import Response, FileResponse, StreamResponse, SEND_CHUNK_SIZE, STATIC_CACHE
+from .streaming import StreamError
+from .writer import BufferResponse, consume, IOV_MAX
+from .logger import log_access
+from .metrics import METRICS
+from .httpadapter import KEEPALIVE_TIMEOUT, MAX_KEEPALIVE_REQUESTS, MAX_PIPELINE_DEPTH
+from .router import is_async_handler
+from .utils import create_server_socket
+
+#: Backlog of the listening socket; idle pollers reconnect in bursts.
+LISTEN_BACKLOG = 1024
+
+log = logging.getLogger(__name__)
+
+#: Selector data of the socket waking the loop when a coroutine completed.
+_WAKEUP = object()
+
+
+class _Connection:
+    """Per-socket state kept by the event loop."""
+
+    __slots__ = ("sock", "addr", "parser", "outq", "keep_alive", "served", "last_active",
+                 "pending", "closed")
+
+    def __init__(self, sock, addr):
+        self.sock = sock
+        self.addr = addr
+        self.parser = HttpParser()
+        #: Pending output: memoryviews, _FileSegment and StreamResponse items, in order.
+        self.outq = deque()
+        self.keep_alive = False
+        self.served = 0
+        self.last_active = time.monotonic()
+        #: (future, done callback) of the coroutine the connection waits for
+        self.pending = None
+        #: Set by ``_close``, which counts each connection closed once
+        self.closed = False
+
+
+async def _call_async(req):
+    """Await an ``async def`` route handler, timing it like :class:`AsyncServer`."""
+    started = time.perf_counter()
+    result = await req.call_hook()
+    if req.handler_time is not None:
+        # Wall time of the coroutine, its CPU is shared with the loop
+        req.handler_time = time.perf_counter() - started
+    return result
+
+
+async def _anext(chunks):
+    """Next chunk of an async stream, as a coroutine for the asyncio thread."""
+    return await chunks.__anext__()
+
+
+class _FileSegment:
+    """Part of an open file still to be written to a connection."""
+
+    __slots__ = ("file", "offset", "remaining")
+
+    def __init__(self, file, offset, remaining):
+        self.file = file
+        self.offset = offset
+        self.remaining = remaining
+
+
+def _send_file(sock, segment):
+    """
+    Write the next bytes of ``segment`` to the non-blocking ``sock``.
+
+    :rtype int: bytes written.
+    :raise BlockingIOError: when the socket buffer is full.
+    """
+    count = segment.remaining
+    if hasattr(os, "sendfile"):
+        sent = os.sendfile(sock.fileno(), segment.file.fileno(), segment.offset, count)
+    else:
+        segment.file.seek(segment.offset)
+        sent = sock.send(segment.file.read(min(SEND_CHUNK_SIZE, count)))
+    if sent == 0:
+        raise EOFError("File shrank while being sent")
+    segment.offset += sent
+    segment.remaining -= sent
+    return sent
+
+
+class EventLoopServer:
+    """
+    Single-threaded, non-blocking HTTP server built on :mod:`selectors`.
+
+    :attrs ip (str): IP address to bind.
+    :attrs port (int): port to listen on.
+    :attrs routes (dict): route handlers registered by ``WeApRous``.
+    """
+
+    __attrs__ = [
+        "ip",
+        "port",
+        "routes",
+        "reuse_port",
+        "selector",
+        "server",
+    ]
+
+    def __init__(self, ip, port, routes, reuse_port=False):
+        """
+        Initialize a new EventLoopServer instance.
+
+        :param ip (str): IP address to bind the server.
+        :param port (int): Port number to listen on.
+        :param routes (dict): Dictionary of route handlers.
+        :param reuse_port (bool): bind with ``SO_REUSEPORT``.
+        """
+        self.ip = ip
+        self.port = port
+        self.routes = routes
+        self.reuse_port = reuse_port
+        self.selector = selectors.DefaultSelector()
+        self.server = None
+        self._last_sweep = time.monotonic()
+        # Responses are built one at a time on the loop thread: reuse one object
+        self._response = Response()
+        #: asyncio loop running the ``async def`` handlers, started on first use
+        self._async_loop = None
+        #: Connections parked until their handler coroutine completes
+        self._parked = set()
+        #: (connection, future) of the completed coroutines, filled by the asyncio thread
+        self._completed = deque()
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+
+    def listen(self):
+        """Create the non-blocking listening socket and register it."""
+        server = create_server_socket(self.ip, self.port, LISTEN_BACKLOG,
+                                      reuse_port=self.reuse_port)
+        server.setblocking(False)
+        self.selector.register(server, selectors.EVENT_READ, None)
+        self.server = server
+        self._wakeup_r.setblocking(False)
+        self._wakeup_w.setblocking(False)
+        self.selector.register(self._wakeup_r, selectors.EVENT_READ, _WAKEUP)
+
+    def serve_forever(self):
+        """Run the event loop until interrupted with CTRL+C."""
+        self.listen()
+        log.info("Listening on port %s (%s)", self.port, type(self.selector).__name__)
+        try:
+            while True:
+                # Timeout 1 giây để CTRL+C hoạt động trên mọi nền tảng
+                for key, mask in self.selector.select(timeout=1):
+                    if key.data is None:
+                        self._accept()
+                        continue
+                    if key.data is _WAKEUP:
+                        self._complete()
+                        continue
+                    conn = key.data
+                    if mask & selectors.EVENT_READ:
+                        self._read(conn)
+                    elif mask & selectors.EVENT_WRITE:
+                        self._write(conn)
+                self._sweep_idle()
+        except KeyboardInterrupt:
+            log.info("Shutting down the server.")
+        finally:
+            log.info("static cache stats %s", STATIC_CACHE.stats())
+            self.close()
+
+    def close(self):
+        """Close every registered and parked socket, the selector and the asyncio loop."""
+        for conn in list(self._parked):
+            self._close(conn)
+        for key in list(self.selector.get_map().values()):
+            if isinstance(key.data, _Connection):
+                self._close(key.data)
+                continue
+            try:
+                key.fileobj.close()
+            except socket.error:
+                pass
+        self.selector.close()
+        self._wakeup_w.close()
+        if self._async_loop is not None:
+            # After the connections: their coroutines are cancelled first
+            self._async_loop.call_soon_threadsafe(self._async_loop.stop)
+
+    def _sweep_idle(self):
+        """Close keep-alive connections idle for longer than ``KEEPALIVE_TIMEOUT``."""
+        now = time.monotonic()
+        if now - self._last_sweep < 1:
+            return
+        self._last_sweep = now
+        for key in list(self.selector.get_map().values()):
+            conn = key.data
+            if isinstance(conn, _Connection) and not conn.outq \
+                    and now - conn.last_active > KEEPALIVE_TIMEOUT:
+                self._close(conn)
+
+    def _accept(self):
+        """Accept every pending connection on the listening socket."""
+        while True:
+            try:
+                sock, addr = self.server.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except socket.error as e:
+                log.warning("Socket error on accept: %s", e)
+                return
+            sock.setblocking(False)
+            self.selector.register(sock, selectors.EVENT_READ, _Connection(sock, addr))
+            METRICS.connection_opened()
+
+    def _read(self, conn):
+        """Receive into the parser buffer and dispatch once a full request arrived."""
+        try:
+            received = conn.parser.recv_into(conn.sock)
+        except (BlockingIOError, InterruptedError):
+            return
+        except socket.error:
+            self._close(conn)
+            return
+        if not received:
+            self._close(conn)
+            return
+
+        conn.last_active = time.monotonic()
+        self._process(conn)
+
+    def _process(self, conn):
+        """Dispatch the complete requests buffered on ``conn``, in order."""
+        responses = []
+        try:
+            while len(responses) < MAX_PIPELINE_DEPTH:
+                req = conn.parser.next_request(self.routes)
+                if req is None:
+                    break
+                conn.served += 1
+                response = self.dispatch(req, conn)
+                if response is None:
+                    # Awaited handler: the next requests wait for its response
+                    break
+                responses.append(response)
+                if not conn.keep_alive:
+                    break
+                if isinstance(response, StreamResponse) and response.is_async:
+                    # Its chunks are awaited: dispatch the next requests once it ended
+                    break
+        except HttpParseError as e:
+            resp = Response()
+            resp.set_connection(False)
+            conn.keep_alive = False
+            responses.append(resp.build_error_response(e.status_code, str(e)))
+
+        if responses:
+            self._respond(conn, responses)
+        elif conn.pending is not None:
+            self._park(conn)
+
+    def dispatch(self, req, conn):
+        """
+        Build the response of one parsed request with the route handlers.
+
+        Sets ``conn.keep_alive`` from the request ``Connection`` semantics and
+        the per-connection request limit. An ``async def`` handler is started
+        on the asyncio thread instead, see :meth:`_await_handler`.
+
+        :param req (Request): a request prepared by the connection parser.
+        :param conn (_Connection): connection the request arrived on.
+
+        :rtype bytes | FileResponse: the HTTP response, ``None`` while awaited.
+        """
+        started = time.monotonic()
+        resp = self._response
+        resp.reset(req)
+        try:
+            conn.keep_alive = req.wants_keep_alive() and conn.served < MAX_KEEPALIVE_REQUESTS
+            if req.hook and not req.is_websocket and is_async_handler(req.hook):
+                self._await_handler(conn, req, started)
+                return None
+            resp.set_connection(conn.keep_alive, KEEPALIVE_TIMEOUT,
+                                MAX_KEEPALIVE_REQUESTS - conn.served)
+            response = resp.build_response(req)
+        except Exception as e:
+            log.exception("Error handling client %s: %s", conn.addr, e)
+            conn.keep_alive = False
+            resp.set_connection(False)
+            response = resp.build_error_response(500, str(e))
+        log_access(conn.addr, req, response, started)
+        # Written later by _write: no send time
+        METRICS.observe(req, response)
+        return response
+
+    def _await(self, conn, coro, done):
+        """
+        Run ``coro`` for ``conn`` on the asyncio thread.
+
+        :meth:`_complete` calls ``done(conn, future)`` on the loop thread
+        when the coroutine returned; meanwhile the connection is parked.
+        """
+        if self._async_loop is None:
+            self._async_loop = asyncio.new_event_loop()
+            threading.Thread(target=self._async_loop.run_forever,
+                             name="eventloop-async", daemon=True).start()
+        future = asyncio.run_coroutine_threadsafe(coro, self._async_loop)
+        conn.pending = (future, done)
+        future.add_done_callback(lambda future: self._wake(conn, future))
+
+    def _await_handler(self, conn, req, started):
+        """
+        Run the ``async def`` handler of ``req`` on the asyncio thread, the
+        connection is parked once its previous responses are written.
+        """
+        self._await(conn, _call_async(req), functools.partial(self._answer, req, started))
+
+    def _wake(self, conn, future):
+        """Hand a completed coroutine back to the loop thread, from the asyncio thread."""
+        self._completed.append((conn, future))
+        try:
+            self._wakeup_w.send(b"\0")
+        except (BlockingIOError, OSError):
+            # A wake-up is already pending, or the server is closed
+            pass
+
+    def _park(self, conn):
+        """Stop watching ``conn`` while the coroutine it waits for runs."""
+        self.selector.unregister(conn.sock)
+        self._parked.add(conn)
+
+    def _unpark(self, conn):
+        """Watch a parked ``conn`` again, for writing."""
+        if conn in self._parked:
+            self._parked.discard(conn)
+            self.selector.register(conn.sock, selectors.EVENT_WRITE, conn)
+
+    def _complete(self):
+        """Resume the connections whose coroutine completed."""
+        try:
+            while self._wakeup_r.recv(4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+        while self._completed:
+            conn, future = self._completed.popleft()
+            if conn.pending is None or conn.pending[0] is not future:
+                # Closed meanwhile
+                continue
+            done = conn.pending[1]
+            conn.pending = None
+            done(conn, future)
+
+    def _answer(self, req, started, conn, future):
+        """Write the response of a completed ``async def`` handler."""
+        resp = self._response
+        resp.reset(req)
+        resp.set_connection(conn.keep_alive, KEEPALIVE_TIMEOUT,
+                            MAX_KEEPALIVE_REQUESTS - conn.served)
+        try:
+            response = resp.build_result_response(req, future.result())
+        except Exception as e:
+            log.exception("Error in hook handler: %s", e)
+            response = resp.build_error_response(500, str(e))
+        log_access(conn.addr, req, response, started)
+        METRICS.observe(req, response)
+        self._unpark(conn)
+        self._respond(conn, [response])
+
+    def _next_chunk(self, conn, future):
+        """Queue the chunk produced by an async stream and resume writing."""
+        try:
+            chunk = future.result()
+        except StopAsyncIteration:
+            conn.outq.popleft()
+        except Exception as e:
+            log.warning("Aborting response to %s: %s", conn.addr, e)
+            self._close(conn)
+            return
+        else:
+            conn.outq.appendleft(memoryview(chunk))
+        self._unpark(conn)
+        self._write(conn)
+
+    def _respond(self, conn, responses):
+        """Queue ``responses`` and switch the socket to write interest."""
+        outq = conn.outq
+        for response in responses:
+            if isinstance(response, BufferResponse):
+                # Buffers stay separate, _write gathers them in one sendmsg
+                outq.extend(memoryview(buf) for buf in response.buffers if len(buf))
+                continue
+            if not isinstance(response, (FileResponse, StreamResponse)):
+                outq.append(memoryview(response))
+                continue
+            if isinstance(response, StreamResponse):
+                outq.append(memoryview(response.header))
+                outq.append(response)
+                continue
+            segment = None
+            if response.length:
+                # Open before queuing the head: on failure a complete error replaces it
+                try:
+                    segment = _FileSegment(open(response.filepath, "rb"),
+                                           response.offset, response.length)
+                except OSError as e:
+                    log.error("Cannot open %s: %s", response.filepath, e)
+                    error = Response()
+                    error.set_connection(conn.keep_alive, KEEPALIVE_TIMEOUT)
+                    status = 404 if isinstance(e, FileNotFoundError) else 500
+                    outq.extend(memoryview(buf) for buf in
+                                error.build_error_response(status, "Cannot open file").buffers)
+                    continue
+            outq.append(memoryview(response.header))
+            if segment is not None:
+                outq.append(segment)
+        self.selector.modify(conn.sock, selectors.EVENT_WRITE, conn)
+        self._write(conn)
+
+    def _write(self, conn):
+        """Send as much of the pending output as the socket accepts."""
+        outq = conn.outq
+        while outq:
+            item = outq[0]
+            try:
+                if isinstance(item, _FileSegment):
+                    _send_file(conn.sock, item)
+                    if item.remaining:
+                        continue
+                    item.file.close()
+                    outq.popleft()
+                    continue
+                if isinstance(item, StreamResponse):
+                    if item.is_async:
+                        # Awaited on the asyncio thread, the connection parked meanwhile
+                        self._await(conn, _anext(item.chunks), self._next_chunk)
+                        self._park(conn)
+                        return
+                    # Produce the next chunk only once the previous one is sent
+                    chunk = next(item.chunks, None)
+                    if chunk is None:
+                        outq.popleft()
+                    else:
+                        outq.appendleft(memoryview(chunk))
+                    continue
+                # Gather the consecutive in-memory buffers
+                batch = []
+                for buf in outq:
+                    if not isinstance(buf, memoryview) or len(batch) == IOV_MAX:
+                        break
+                    batch.append(buf)
+                if len(batch) > 1 and hasattr(conn.sock, "sendmsg"):
+                    sent = conn.sock.sendmsg(batch)
+                else:
+                    batch = batch[:1]
+                    sent = conn.sock.send(item)
+            except (BlockingIOError, InterruptedError):
+                return
+            except (socket.error, EOFError):
+                self._close(conn)
+                return
+            except StreamError as e:
+                log.warning("Aborting response to %s: %s", conn.addr, e)
+                self._close(conn)
+                return
+            consume(outq, sent)
+            if sent < sum(len(buf) for buf in batch):
+                return
+
+        if conn.pending is not None:
+            self._park(conn)
+            return
+        if not conn.keep_alive:
+            self._close(conn)
+            return
+        # Persistent connection: wait for (or serve the already buffered) next requests
+        conn.last_active = time.monotonic()
+        self.selector.modify(conn.sock, selectors.EVENT_READ, conn)
+        if len(conn.parser):
+            self._process(conn)
+
+    def _close(self, conn):
+        """Unregister and close a client connection, its pending files and coroutine."""
+        if conn.closed:
+            return
+        conn.closed = True
+        METRICS.connection_closed()
+        if conn.pending is not None:
+            conn.pending[0].cancel()
+            conn.pending = None
+        self._parked.discard(conn)
+        while conn.outq:
+            item = conn.outq.popleft()
+            if isinstance(item, _FileSegment):
+                item.file.close()
+            elif isinstance(item, StreamResponse) and item.is_async \
+                    and self._async_loop is not None:
+                # Run the generator's cleanup (e.g. unsubscribe) on its loop
+                asyncio.run_coroutine_threadsafe(item.chunks.aclose(), self._async_loop)
+        try:
+            self.selector.unregister(conn.sock)
+        except (KeyError, ValueError):
+            # Parked: not registered while it waits for a coroutine
+            pass
+        try:
+            conn.sock.close()
+        except socket.error:
+            pass
+
+
+def run_eventloop(ip, port, routes, reuse_port=False):
+    """
+    Entry point of the ``eventloop`` engine.
+
+    :param ip (str): IP address to bind the server.
+    :param port (int): Port number to listen on.
+    :param routes (dict): Dictionary of route handlers.
+    :param reuse_port (bool): bind with ``SO_REUSEPORT``.
+    """
+    try:
+        EventLoopServer(ip, port, routes, reuse_port=reuse_port).serve_forever()
+    except socket.error as e:
+        # Re-raised: a worker that cannot bind must exit with a failure status
+        log.error("Socket error: %s", e)
+        raise
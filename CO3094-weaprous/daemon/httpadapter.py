@@ -18,11 +18,35 @@ This module provides a http adapter object to manage and persist
 http settings (headers, bodies). The adapter supports both
 raw URL paths and RESTful route definitions, and integrates with
 Request and Response objects to handle client-server communication.
+Requests upgraded to the WebSocket protocol are handed to their handler
+on the same connection, see :mod:`daemon.websocket`.
 """
 
-from .request import Request
-from .response import Response
+import asyncio
+import inspect
+import logging
+import socket
+import time
+
+from .request import Request, HttpParseError
+from .parser import HttpParser, MAX_HEADER_SIZE, MAX_BODY_SIZE
+from .response import Response, FileResponse, StreamResponse, send_response, MSG_MORE
+from .writer import BufferResponse, send_buffers
+from .streaming import StreamError
 from .dictionary import CaseInsensitiveDict
+from .logger import log_access
+from .metrics import METRICS
+from .websocket import WebSocket, handshake_error, handshake_response, CLOSE_INTERNAL_ERROR
+
+log = logging.getLogger(__name__)
+
+#: Idle seconds a persistent connection waits for its next request.
+KEEPALIVE_TIMEOUT = 5
+#: Requests served on one persistent connection before it is closed.
+MAX_KEEPALIVE_REQUESTS = 100
+#: Pipelined requests dispatched per batch (in flight) on one connection.
+MAX_PIPELINE_DEPTH = 16
+
 
 class HttpAdapter:
     """
@@ -42,6 +66,11 @@ class HttpAdapter:
         routes (dict): Mapping of route paths to handler functions.
         request (Request): Request object for parsing incoming data.
         response (Response): Response object for building and sending replies.
+        keepalive_timeout (float): idle seconds before a persistent connection closes.
+        max_keepalive_requests (int): requests served per persistent connection.
+        max_pipeline_depth (int): pipelined requests in flight per connection.
+        max_header_size (int): limit of the request line plus headers (431).
+        max_body_size (int): limit of a request body (413).
     """
 
     __attrs__ = [
@@ -52,8 +81,29 @@ class HttpAdapter:
         "routes",
         "request",
         "response",
+        "keepalive_timeout",
+        "max_keepalive_requests",
+        "max_pipeline_depth",
+        "max_header_size",
+        "max_body_size",
     ]
 
+    __slots__ = (
+        "ip",
+        "port",
+        "conn",
+        "connaddr",
+        "routes",
+        "request",
+        "response",
+    )
+
+    keepalive_timeout = KEEPALIVE_TIMEOUT
+    max_keepalive_requests = MAX_KEEPALIVE_REQUESTS
+    max_pipeline_depth = MAX_PIPELINE_DEPTH
+    max_header_size = MAX_HEADER_SIZE
+    max_body_size = MAX_BODY_SIZE
+
     def __init__(self, ip, port, conn, connaddr, routes):
         """
         Initialize a new HttpAdapter instance.
@@ -64,7 +114,23 @@ class HttpAdapter:
         :param connaddr (tuple): Address of the connected client.
         :param routes (dict): Mapping of route paths to handler functions.
         """
+        #: Request, the last one served
+        self.request = None
+        #: Response, reset and reused for every request
+        self.response = Response()
+        self.reset(ip, port, conn, connaddr, routes)
+
+    def reset(self, ip, port, conn, connaddr, routes):
+        """
+        Bind the adapter to a new client connection, so a worker thread can
+        serve all its connections with one adapter.
 
+        :param ip (str): IP address of the client.
+        :param port (int): Port number of the client.
+        :param conn (socket): Active socket connection.
+        :param connaddr (tuple): Address of the connected client.
+        :param routes (dict): Mapping of route paths to handler functions.
+        """
         #: IP address.
         self.ip = ip
         #: Port.
@@ -75,69 +141,281 @@ class HttpAdapter:
         self.connaddr = connaddr
         #: Routes
         self.routes = routes
-        #: Request
-        self.request = Request()
-        #: Response
-        self.response = Response()
 
-    def handle_client(self, conn, addr, routes):
+    def handle_client(self, conn, addr, routes, accepted=None, served=0, park=None,
+                      detach=None, resume=None):
         """
         Handle an incoming client connection.
 
-        This method reads the request from the socket, prepares the request object,
+        This method reads requests from the socket, prepares the request object,
         invokes the appropriate route handler if available, builds the response,
         and sends it back to the client.
 
+        The connection is persistent (HTTP/1.1 keep-alive): requests are served
+        in a loop until the client sends ``Connection: close`` (or speaks
+        HTTP/1.0 without ``Connection: keep-alive``), stays idle longer than
+        :attr:`keepalive_timeout`, or reaches :attr:`max_keepalive_requests`.
+
+        Pipelined requests arriving back-to-back in the same buffer are
+        dispatched in order, at most :attr:`max_pipeline_depth` at a time, and
+        their responses are written in the same order, see :meth:`send_responses`.
+        A WebSocket upgrade ends the HTTP exchange: the connection then
+        belongs to its handler, see :meth:`serve_websocket`.
+
+        With ``park``, a keep-alive connection left with no buffered request
+        is handed to ``park(conn, addr, served)`` instead of blocking this
+        thread until the next request, see :class:`KeepAliveParker
+        <KeepAliveParker>`; it comes back with ``served``.
+
+        With ``detach``, a batch ending in a WebSocket upgrade or holding a
+        live stream (:class:`EventStream`) is not sent from this thread:
+        ``detach(target, *args)`` runs the rest of the connection on a thread
+        of its own, with a new adapter called back with ``resume``, so a pool
+        worker is not held for as long as the client listens.
+
         :param conn (socket): The client socket connection.
         :param addr (tuple): The client's address.
         :param routes (dict): The route mapping for dispatching requests.
+        :param accepted (float): ``time.perf_counter()`` when the connection
+                                 was accepted, for the queue wait metric.
+        :param served (int): requests already served on a resumed connection.
+        :param park (callable): takes over idle keep-alive connections.
+        :param detach (callable): runs long-lived connections off this thread.
+        :param resume (tuple): ``(parser, batch, responses, upgrade, keep_alive)``
+                               of a batch built by the thread that detached it.
         """
 
         # Connection handler.
         self.conn = conn        
         # Connection address.
         self.connaddr = addr
-        # Request handler
-        req = self.request
-        # Response handler
-        resp = self.response
+        if resume is not None:
+            parser = resume[0]
+        else:
+            # Incremental parser owning the connection receive buffer
+            parser = HttpParser(self.max_header_size, self.max_body_size)
+        handed_off = False
+        if not served:
+            METRICS.connection_opened(
+                time.perf_counter() - accepted if accepted is not None else None)
 
         try:
-            # Handle the request
-            msg = conn.recv(1024).decode()
-            print("[HttpAdapter] Received request from {}\n{}".format(addr, msg[:200]))
-            
-            # Parse request (extract method, path, headers, body, find hook)
-            req.prepare(msg, routes)
-            
-            # Check if request has a route handler
-            if req.hook:
-                print("[HttpAdapter] Found route handler for {} {}".format(req.method, req.path))
-            else:
-                print("[HttpAdapter] No route handler for {} {}".format(req.method, req.path))
-            
-            # Build response (call hook if exists, or serve file, or 404)
-            response = resp.build_response(req)
-            
-            # Send response back to client
-            print("[HttpAdapter] Sending response to {}".format(addr))
-            conn.sendall(response)
-        
+            conn.settimeout(self.keepalive_timeout)
+            keep_alive = True
+            while keep_alive:
+                if resume is not None:
+                    # Batch built by the worker that detached the connection
+                    _, batch, responses, upgrade, keep_alive = resume
+                    resume = None
+                else:
+                    # Handle the pipelined requests
+                    batch = self.read_requests(conn, parser, routes)
+                    if not batch:
+                        break
+
+                    responses = []
+                    upgrade = None
+                    for req in batch:
+                        served += 1
+                        if req.is_websocket:
+                            # Always last of its batch, see read_requests
+                            upgrade = req
+                            break
+                        response, keep_alive = self.serve_request(req, served)
+                        responses.append(response)
+                        if not keep_alive:
+                            # Requests pipelined after a close are dropped
+                            break
+
+                    if detach is not None and (upgrade is not None or any(
+                            isinstance(r, StreamResponse) and r.live for r in responses)):
+                        # Long-lived: send from a thread of its own, not this worker
+                        adapter = HttpAdapter(self.ip, self.port, conn, addr, routes)
+                        detach(adapter.handle_client, conn, addr, routes, None, served, park,
+                               None, (parser, batch, responses, upgrade, keep_alive))
+                        handed_off = True
+                        return
+
+                # Send responses back to client, in request order
+                sending = time.perf_counter()
+                self.send_responses(conn, responses)
+                if METRICS.enabled:
+                    send_time = time.perf_counter() - sending
+                    for req, response in zip(batch, responses):
+                        METRICS.observe(req, response, send_time)
+                if upgrade is not None:
+                    self.serve_websocket(conn, parser, upgrade)
+                    break
+                if keep_alive and park is not None and not len(parser):
+                    # Idle: wait for the next request without holding this thread
+                    park(conn, addr, served)
+                    handed_off = True
+                    return
+
+        except socket.timeout:
+            log.debug("Idle keep-alive timeout: %s", addr)
+
+        except StreamError as e:
+            # Header already sent: only closing tells the client
+            log.warning("Aborting response to %s: %s", addr, e)
+
+        except HttpParseError as e:
+            log.info("Malformed request from %s: %s", addr, e)
+            self.send_error(conn, e.status_code, str(e))
+
         except Exception as e:
-            print("[HttpAdapter] Error handling client {}: {}".format(addr, e))
-            try:
-                error_response = resp.build_error_response(500, str(e))
-                conn.sendall(error_response)
-            except:
-                pass
+            log.exception("Error handling client %s: %s", addr, e)
+            self.send_error(conn, 500, str(e))
+        
+        finally:
+            if not handed_off:
+                METRICS.connection_closed()
+                # Close connection
+                try:
+                    conn.close()
+                    log.debug("Connection closed: %s (%s requests)", addr, served)
+                except:
+                    pass
+
+    def serve_request(self, req, served):
+        """
+        Build the response of one parsed request.
+
+        :param req (Request): the request prepared by the parser.
+        :param served (int): number of requests seen on this connection, this one included.
+
+        :rtype tuple: (response bytes, keep the connection open).
+        """
+        started = time.monotonic()
+        # Requests come fresh from the parser, the response object is reused
+        self.request = req
+        resp = self.response
+        resp.reset(req)
+
+        keep_alive = req.wants_keep_alive() and served < self.max_keepalive_requests
+        resp.set_connection(keep_alive, self.keepalive_timeout,
+                            self.max_keepalive_requests - served)
         
+        # Build response (call hook if exists, or serve file, or 404)
+        response = resp.build_response(req)
+        log_access(self.connaddr, req, response, started)
+        return response, keep_alive
+
+    def serve_websocket(self, conn, parser, req):
+        """
+        Complete the opening handshake of a WebSocket request and run its
+        handler, which owns the connection until it returns.
+
+        An invalid handshake is answered ``400`` (``426`` for another
+        protocol version). The handler receives the :class:`WebSocket
+        <WebSocket>` as its ``ws`` parameter (and :attr:`Request.websocket`);
+        a close frame is sent when it returns, ``1011`` when it raised.
+
+        :param conn (socket): The client socket connection.
+        :param parser (HttpParser): parser holding the bytes received after the request.
+        :param req (Request): a request routed to a WebSocket handler.
+        """
+        started = time.monotonic()
+        self.request = req
+        error = handshake_error(req)
+        if error is not None:
+            status_code, message, headers = error
+            resp = Response()
+            resp.set_connection(False)
+            response = resp.build_error_response(status_code, message, headers)
+            send_response(conn, response)
+            log_access(self.connaddr, req, response, started)
+            METRICS.observe(req, response)
+            return
+
+        head = handshake_response(req)
+        send_buffers(conn, (head,))
+        log_access(self.connaddr, req, head, started)
+        METRICS.observe(req, head)
+
+        ws = req.websocket = WebSocket(conn, parser.detach())
+        try:
+            result = req.call_hook()
+            if inspect.isawaitable(result):
+                asyncio.run(result)
+        except (ConnectionError, socket.error) as e:
+            log.debug("WebSocket %s lost: %s", self.connaddr, e)
+        except Exception as e:
+            log.exception("Error in WebSocket handler %s: %s", req.path, e)
+            ws.close(CLOSE_INTERNAL_ERROR, "Internal error")
         finally:
-            # Close connection
-            try:
-                conn.close()
-                print("[HttpAdapter] Connection closed: {}".format(addr))
-            except:
-                pass
+            ws.close()
+
+    def read_requests(self, conn, parser, routes):
+        """
+        Receive the next complete HTTP requests (headers plus ``Content-Length`` body).
+
+        Blocks until at least one request is parsed, then returns every
+        complete request already received, up to :attr:`max_pipeline_depth`.
+        Bytes following them stay in the parser buffer for the next call; a
+        WebSocket upgrade ends the batch, the bytes after it are frames.
+
+        :param conn (socket): The client socket connection.
+        :param parser (HttpParser): parser owning the connection buffer.
+        :param routes (dict): The route mapping for dispatching requests.
+
+        :rtype list: prepared requests, empty when the client closed the
+                     connection before sending a new request.
+        :raise socket.timeout: when the connection stays idle too long.
+        :raise HttpParseError: when a request is malformed or too large.
+        """
+        batch = []
+        while True:
+            req = parser.next_request(routes)
+            while req is not None:
+                batch.append(req)
+                if len(batch) >= self.max_pipeline_depth or req.is_websocket:
+                    return batch
+                req = parser.next_request(routes)
+            if batch:
+                return batch
+            if not parser.recv_into(conn):
+                return batch
+
+    def send_responses(self, conn, responses):
+        """
+        Write responses in order: the buffers of consecutive in-memory
+        responses with scatter-gather ``sendmsg`` calls (never joined), static
+        files with ``sendfile`` right after their header and streamed
+        responses chunk by chunk.
+
+        :param conn (socket): The client socket connection.
+        :param responses (list): ``bytes``, :class:`BufferResponse`,
+                                 :class:`FileResponse` or :class:`StreamResponse` items.
+        """
+        pending = []
+        for response in responses:
+            if isinstance(response, BufferResponse):
+                pending.extend(response.buffers)
+            elif isinstance(response, (FileResponse, StreamResponse)):
+                if pending:
+                    send_buffers(conn, pending, MSG_MORE)
+                    pending = []
+                response.send(conn)
+            else:
+                pending.append(response)
+        if pending:
+            send_buffers(conn, pending)
+
+    def send_error(self, conn, status_code, message):
+        """
+        Best-effort error response sent before closing the connection.
+
+        :param conn (socket): The client socket connection.
+        :param status_code (int): HTTP status code.
+        :param message (str): error message.
+        """
+        try:
+            resp = Response()
+            resp.set_connection(False)
+            send_response(conn, resp.build_error_response(status_code, message))
+        except:
+            pass
 
     @property
     def extract_cookies(self, req, resp):
@@ -0,0 +1,416 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.journal
+~~~~~~~~~~~~~~~~~
+
+This module provides the write-ahead log and the snapshots behind
+:class:`DurableStateStore <DurableStateStore>`.
+
+The log is a directory of append-only segment files ``wal-<first lsn>.log``.
+Every record is framed as::
+
+    payload length (4 bytes) | CRC-32 of the payload (4 bytes) | payload
+
+where the payload is a pickled ``(lsn, time, ops)`` tuple and ``lsn`` the
+log sequence number, 1, 2, 3... A record torn by a crash in the middle of
+a write fails its length or checksum test: reading stops there and the
+torn tail is cut off.
+
+Callers only queue their records; one writer thread writes them (group
+commit): the records queued while the previous batch was written go out in
+a single ``write``, followed by an ``fsync`` according to ``fsync_interval``:
+
+- ``0``: after every batch;
+- ``> 0``: at most once per interval, a machine crash loses at most that;
+- ``None``: never, left to the operating system.
+
+A snapshot ``snapshot-<lsn>.snap`` holds the whole state up to ``lsn`` in
+one record of the same framing. Taking one rotates the log to a new
+segment; once the snapshot is on disk, the segments and snapshots before
+it are deleted. Recovery loads the newest valid snapshot and replays the
+records after its ``lsn``.
+
+Usage Example:
+--------------
+>>> journal = Journal("/var/lib/weaprous")
+>>> state, lsn = journal.load_snapshot()
+>>> for lsn, now, ops in journal.replay(lsn):
+>>>     apply(ops)
+>>> journal.start()
+>>> journal.wait(journal.append(ops, time.time()))
+"""
+
+import collections
+import logging
+import os
+import pickle
+import struct
+import threading
+import time
+import zlib
+
+log = logging.getLogger(__name__)
+
+#: Record header: payload length and CRC-32, 4-byte big-endian each.
+_HEADER = struct.Struct("!II")
+#: Default seconds between two ``fsync`` of the log.
+FSYNC_INTERVAL = 0.05
+#: Most records written by one group commit.
+MAX_BATCH = 4096
+
+SEGMENT_PREFIX, SEGMENT_SUFFIX = "wal-", ".log"
+SNAPSHOT_PREFIX, SNAPSHOT_SUFFIX = "snapshot-", ".snap"
+
+
+class JournalError(Exception):
+    """Raised when the log cannot be written."""
+
+
+def encode_record(obj):
+    """
+    Frame one record.
+
+    :param obj: picklable payload.
+
+    :rtype bytes: header and pickled payload.
+    """
+    payload = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    return _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_records(data):
+    """
+    Decode the valid records at the start of ``data``.
+
+    :param data (bytes): content of a segment or snapshot file.
+
+    :rtype generator: ``(end offset, payload)`` per record, stopping at the
+                      first torn or corrupt one.
+    """
+    view = memoryview(data)
+    offset, size = 0, len(data)
+    while offset + _HEADER.size <= size:
+        length, crc = _HEADER.unpack_from(view, offset)
+        start = offset + _HEADER.size
+        end = start + length
+        if end > size or zlib.crc32(view[start:end]) != crc:
+            return
+        try:
+            payload = pickle.loads(view[start:end])
+        except Exception:
+            return
+        offset = end
+        yield offset, payload
+
+
+def _numbered(directory, prefix, suffix):
+    """``[(number, path)]`` of the files ``<prefix><number><suffix>``, ascending."""
+    files = []
+    for name in os.listdir(directory):
+        if name.startswith(prefix) and name.endswith(suffix):
+            number = name[len(prefix):-len(suffix)]
+            if number.isdigit():
+                files.append((int(number), os.path.join(directory, name)))
+    return sorted(files)
+
+
+def _fsync_directory(directory):
+    """Make renames and deletions in ``directory`` durable (POSIX only)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class Journal:
+    """
+    Segmented write-ahead log with a group-commit writer thread.
+
+    :attrs directory (str): directory of the segments and snapshots.
+    :attrs fsync_interval (float): seconds between two ``fsync``, ``0``
+                                   after every batch, ``None`` never.
+    :attrs max_batch (int): most records written by one group commit.
+    :attrs last_lsn (int): sequence number of the last queued record.
+    :attrs durable_lsn (int): last record written (and synced per policy).
+    """
+
+    __attrs__ = [
+        "directory",
+        "fsync_interval",
+        "max_batch",
+        "last_lsn",
+        "durable_lsn",
+    ]
+
+    def __init__(self, directory, fsync_interval=FSYNC_INTERVAL, max_batch=MAX_BATCH):
+        """
+        Initialize a new Journal, creating ``directory`` when missing.
+
+        :param directory (str): directory of the segments and snapshots.
+        :param fsync_interval (float): seconds between two ``fsync``, ``0``
+                                       after every batch, ``None`` never.
+        :param max_batch (int): most records written by one group commit.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.fsync_interval = fsync_interval
+        self.max_batch = max_batch
+        self.last_lsn = 0
+        self.durable_lsn = 0
+        self._lock = threading.Lock()
+        #: Signals the writer: records queued or closing
+        self._work = threading.Condition(self._lock)
+        #: Signals the waiters: records written or rotation done
+        self._done = threading.Condition(self._lock)
+        #: (lsn, framed record), ``(lsn, None)`` rotates after ``lsn``
+        self._queue = collections.deque()
+        self._written_lsn = 0
+        self._rotated_lsn = 0
+        self._error = None
+        self._closing = False
+        self._file = None
+        self._thread = None
+
+    # ------------------------------------------------------------ recovery
+
+    def load_snapshot(self):
+        """
+        Newest valid snapshot of the directory.
+
+        :rtype tuple: ``(state, lsn)``, ``(None, 0)`` without a snapshot.
+        """
+        for lsn, path in reversed(_numbered(self.directory, SNAPSHOT_PREFIX, SNAPSHOT_SUFFIX)):
+            with open(path, "rb") as f:
+                data = f.read()
+            for _, (snapshot_lsn, state) in read_records(data):
+                self.last_lsn = self.durable_lsn = snapshot_lsn
+                return state, snapshot_lsn
+            log.warning("Skipping corrupt snapshot %s", path)
+        return None, 0
+
+    def replay(self, after_lsn=0):
+        """
+        Records of the log after ``after_lsn``, in order.
+
+        A torn tail is cut off the segment; records past a gap in the
+        sequence are not replayed.
+
+        :param after_lsn (int): sequence number of the loaded snapshot.
+
+        :rtype generator: ``(lsn, time, ops)`` per record.
+        """
+        expected = after_lsn + 1
+        for _, path in _numbered(self.directory, SEGMENT_PREFIX, SEGMENT_SUFFIX):
+            with open(path, "rb") as f:
+                data = f.read()
+            end = 0
+            for end, record in read_records(data):
+                lsn = record[0]
+                if lsn < expected:
+                    continue
+                if lsn > expected:
+                    log.error("Log gap before record %s in %s, stopping replay", lsn, path)
+                    return
+                expected += 1
+                self.last_lsn = self.durable_lsn = lsn
+                yield record
+            if end < len(data):
+                log.warning("Cutting torn log tail of %s at byte %s", path, end)
+                os.truncate(path, end)
+                return
+
+    # ------------------------------------------------------------- writing
+
+    def start(self):
+        """Open a new segment after the recovered records and start the writer."""
+        first = self.last_lsn + 1
+        for number, path in _numbered(self.directory, SEGMENT_PREFIX, SEGMENT_SUFFIX):
+            if number >= first:
+                # Left empty by the last snapshot, or unreachable after a gap
+                if os.path.getsize(path):
+                    log.warning("Removing log segment %s", path)
+                os.unlink(path)
+        self._written_lsn = self._rotated_lsn = self.last_lsn
+        self._file = self._open_segment(first)
+        self._thread = threading.Thread(target=self._run, name="journal-writer", daemon=True)
+        self._thread.start()
+
+    def _open_segment(self, first_lsn):
+        path = os.path.join(self.directory, "{}{:020d}{}".format(
+            SEGMENT_PREFIX, first_lsn, SEGMENT_SUFFIX))
+        f = open(path, "ab", buffering=0)
+        _fsync_directory(self.directory)
+        return f
+
+    def append(self, ops, now):
+        """
+        Queue one record, the writer thread writes it.
+
+        :param ops (list): the operations of the record.
+        :param now (float): ``time.time()`` when they were applied.
+
+        :rtype int: the sequence number of the record.
+        :raise JournalError: when the log can no longer be written.
+        """
+        with self._lock:
+            if self._error is not None:
+                raise JournalError("Journal failed: {}".format(self._error))
+            self.last_lsn += 1
+            lsn = self.last_lsn
+            self._queue.append((lsn, encode_record((lsn, now, ops))))
+            self._work.notify()
+        return lsn
+
+    def wait(self, lsn):
+        """
+        Block until record ``lsn`` is written, and synced per the policy.
+
+        :raise JournalError: when the log can no longer be written.
+        """
+        with self._lock:
+            while self.durable_lsn < lsn and self._error is None:
+                self._done.wait()
+            if self.durable_lsn < lsn:
+                raise JournalError("Journal failed: {}".format(self._error))
+
+    def _run(self):
+        last_sync = time.monotonic()
+        dirty = False
+        while True:
+            with self._lock:
+                while not self._queue and not self._closing:
+                    timeout = None
+                    if dirty and self.fsync_interval:
+                        timeout = max(0.0, last_sync + self.fsync_interval - time.monotonic())
+                    if not self._work.wait(timeout) and dirty:
+                        break
+                batch = [self._queue.popleft()
+                         for _ in range(min(len(self._queue), self.max_batch))]
+                closing = self._closing and not self._queue
+
+            try:
+                written, rotated = self._write(batch)
+                if written is not None:
+                    dirty = True
+                now = time.monotonic()
+                if dirty and self.fsync_interval is not None and (
+                        closing or now - last_sync >= self.fsync_interval):
+                    os.fsync(self._file.fileno())
+                    last_sync, dirty = now, False
+            except OSError as e:
+                log.error("Cannot write the journal: %s", e)
+                with self._lock:
+                    self._error = e
+                    self._done.notify_all()
+                return
+
+            with self._lock:
+                if written is not None:
+                    self._written_lsn = written
+                if rotated is not None:
+                    self._rotated_lsn = rotated
+                if not dirty or self.fsync_interval is None:
+                    self.durable_lsn = self._written_lsn
+                self._done.notify_all()
+            if closing:
+                return
+
+    def _write(self, batch):
+        """
+        Write a batch of queued records, rotating at the markers.
+
+        :rtype tuple: (last written lsn, last rotation lsn), ``None`` when absent.
+        """
+        chunks, written, rotated = [], None, None
+        for lsn, data in batch:
+            if data is not None:
+                chunks.append(data)
+                written = lsn
+                continue
+            # Rotation: the old segment is complete once synced
+            self._write_all(b"".join(chunks))
+            chunks = []
+            if self.fsync_interval is not None:
+                os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = self._open_segment(lsn + 1)
+            rotated = lsn
+        self._write_all(b"".join(chunks))
+        return written, rotated
+
+    def _write_all(self, data):
+        view = memoryview(data)
+        while view:
+            view = view[self._file.write(view):]
+
+    # ----------------------------------------------------------- snapshots
+
+    def rotate(self):
+        """
+        Start a new segment after the last queued record; call it while no
+        record can be appended, e.g. under the lock of the store.
+
+        :rtype int: sequence number of the last record of the old segments.
+        """
+        with self._lock:
+            self._queue.append((self.last_lsn, None))
+            self._work.notify()
+            return self.last_lsn
+
+    def write_snapshot(self, state, lsn):
+        """
+        Write the snapshot of the state up to ``lsn``, then delete the
+        segments and snapshots it makes obsolete.
+
+        :param state: picklable state.
+        :param lsn (int): value returned by :meth:`rotate` with that state.
+        """
+        path = os.path.join(self.directory, "{}{:020d}{}".format(
+            SNAPSHOT_PREFIX, lsn, SNAPSHOT_SUFFIX))
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(encode_record((lsn, state)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        _fsync_directory(self.directory)
+
+        with self._lock:
+            while self._rotated_lsn < lsn and self._error is None:
+                self._done.wait()
+        for first, segment in _numbered(self.directory, SEGMENT_PREFIX, SEGMENT_SUFFIX):
+            if first <= lsn:
+                os.unlink(segment)
+        for number, snapshot in _numbered(self.directory, SNAPSHOT_PREFIX, SNAPSHOT_SUFFIX):
+            if number < lsn:
+                os.unlink(snapshot)
+        return path
+
+    def close(self):
+        """Write and sync the queued records, then stop the writer."""
+        with self._lock:
+            self._closing = True
+            self._work.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,152 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.keepalive
+~~~~~~~~~~~~~~~~~
+
+This module provides :class:`KeepAliveParker <KeepAliveParker>`, which holds
+the idle persistent connections of the ``pool`` engine so that they do not
+each hold a pool worker between two requests.
+
+Once a worker has answered every request received on a keep-alive
+connection, it parks the socket and goes back to the pool. One selector
+thread watches all parked sockets: a socket that becomes readable (next
+request, or the peer closing) is handed back to the pool, a socket idle
+for longer than the keep-alive timeout is closed.
+
+Usage Example:
+--------------
+>>> parker = KeepAliveParker(lambda conn, addr, served: pool.submit(...))
+>>> parker.park(conn, addr, served)
+>>> parker.close()
+"""
+
+import logging
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+
+from .metrics import METRICS
+
+log = logging.getLogger(__name__)
+
+
+class KeepAliveParker:
+    """
+    Selector thread watching idle keep-alive connections.
+
+    :attrs resume (callable): ``resume(conn, addr, served)`` called on the
+                              parker thread when a parked socket is readable.
+    :attrs timeout (float): idle seconds before a parked connection is closed.
+    """
+
+    __attrs__ = [
+        "resume",
+        "timeout",
+    ]
+
+    def __init__(self, resume, timeout):
+        """
+        Initialize a new KeepAliveParker and start its selector thread.
+
+        :param resume (callable): ``resume(conn, addr, served)`` resubmitting
+                                  a readable connection, it must not block.
+        :param timeout (float): idle seconds before a parked connection is closed.
+        """
+        self.resume = resume
+        self.timeout = timeout
+        self._selector = selectors.DefaultSelector()
+        #: Connections parked by the workers, registered by the selector thread
+        self._incoming = deque()
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._wakeup_r.setblocking(False)
+        self._wakeup_w.setblocking(False)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ, None)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="keepalive-parker", daemon=True)
+        self._thread.start()
+
+    def park(self, conn, addr, served):
+        """
+        Take over an idle connection, called by a worker thread.
+
+        :param conn (socket.socket): connection with no buffered request.
+        :param addr (tuple): client address.
+        :param served (int): requests already served on the connection.
+        """
+        self._incoming.append((conn, addr, served, time.monotonic() + self.timeout))
+        self._wake()
+
+    def _wake(self):
+        try:
+            self._wakeup_w.send(b"\0")
+        except (BlockingIOError, OSError):
+            # A wake-up is already pending, or the parker is closed
+            pass
+
+    def _run(self):
+        while not self._closed:
+            for key, _ in self._selector.select(timeout=1):
+                if key.data is None:
+                    self._drain_wakeup()
+                    continue
+                conn, addr, served, _ = key.data
+                self._selector.unregister(conn)
+                self.resume(conn, addr, served)
+            while self._incoming:
+                entry = self._incoming.popleft()
+                try:
+                    self._selector.register(entry[0], selectors.EVENT_READ, entry)
+                except (ValueError, OSError):
+                    # Closed meanwhile
+                    self._close(entry[0])
+            self._sweep()
+        for key in list(self._selector.get_map().values()):
+            if key.data is not None:
+                self._close(key.fileobj)
+        while self._incoming:
+            self._close(self._incoming.popleft()[0])
+        self._selector.close()
+
+    def _drain_wakeup(self):
+        try:
+            while self._wakeup_r.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+
+    def _sweep(self):
+        """Close the parked connections idle for longer than :attr:`timeout`."""
+        now = time.monotonic()
+        for key in list(self._selector.get_map().values()):
+            if key.data is not None and key.data[3] <= now:
+                self._selector.unregister(key.fileobj)
+                log.debug("Idle keep-alive timeout: %s", key.data[1])
+                self._close(key.fileobj)
+
+    def _close(self, conn):
+        METRICS.connection_closed()
+        try:
+            conn.close()
+        except OSError:
+            pass
+
+    def close(self):
+        """Stop the selector thread and close every parked connection."""
+        self._closed = True
+        self._wake()
+        self._thread.join()
+        self._wakeup_r.close()
+        self._wakeup_w.close()
@@ -0,0 +1,293 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.logger
+~~~~~~~~~~~~~~~~~
+
+This module provides the leveled, asynchronous logging of ``WeApRous``.
+
+Every module logs through :mod:`logging` (``logging.getLogger(__name__)``).
+:func:`setup_logging` installs a queue handler on the root logger: request
+threads only append the record to a queue, and a background
+:class:`BatchLogWriter <BatchLogWriter>` formats the queued records and
+writes them in batches, one write and one flush per batch. Records are
+formatted by the writer thread, never on the request path.
+
+Levels are set globally and per logger, from arguments or from the
+``WEAPROUS_LOG`` environment variable, e.g.
+``WEAPROUS_LOG="WARNING,daemon.response=DEBUG,daemon.access=INFO"``.
+Debug messages of the request path are skipped by a level check, so with
+debug off logging costs next to nothing there.
+
+The ``daemon.access`` logger writes one compact line per request when it
+is enabled (``access_log=True``)::
+
+    127.0.0.1:51234 "GET /get-list HTTP/1.1" 200 118 0.4ms
+
+Usage Example:
+--------------
+>>> setup_logging("INFO", levels={"daemon.response": "DEBUG"}, access_log=True)
+>>> log = logging.getLogger(__name__)
+>>> log.debug("Serving %s", path)
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+
+#: Format of the application log lines.
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+#: Format of the access log lines, the message is already compact.
+ACCESS_FORMAT = "%(asctime)s %(message)s"
+#: Environment variable holding the level specification.
+LOG_ENV = "WEAPROUS_LOG"
+#: Most records formatted and written per batch.
+BATCH_SIZE = 256
+
+#: Logger of the one-line access log, disabled (WARNING) unless requested.
+ACCESS_LOG = logging.getLogger("daemon.access")
+
+_writer = None
+_lock = threading.Lock()
+
+
+def parse_levels(spec):
+    """
+    Parse a level specification, ``"LEVEL,logger=LEVEL,..."``.
+
+    :param spec (str): e.g. ``"INFO,daemon.response=DEBUG"``.
+
+    :rtype tuple: (root level or ``None``, ``{logger name: level}``).
+    :raise ValueError: on an unknown level name.
+    """
+    root, levels = None, {}
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, sep, level = item.rpartition("=")
+        level = _level(level)
+        if sep:
+            levels[name.strip()] = level
+        else:
+            root = level
+    return root, levels
+
+
+def _level(value):
+    """Numeric level of a level name or number."""
+    if isinstance(value, int):
+        return value
+    value = str(value).strip().upper()
+    if value.isdigit():
+        return int(value)
+    level = logging.getLevelName(value)
+    if not isinstance(level, int):
+        raise ValueError("Unknown log level {!r}".format(value))
+    return level
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler leaving the formatting to the writer thread."""
+
+    def prepare(self, record):
+        return record
+
+
+class BatchLogWriter:
+    """
+    Background thread writing queued log records in batches.
+
+    :attrs queue (queue.SimpleQueue): records to write.
+    :attrs stream: text stream written to, ``None`` for ``sys.stderr``.
+    :attrs batch_size (int): most records written per batch.
+    """
+
+    __attrs__ = [
+        "queue",
+        "stream",
+        "batch_size",
+    ]
+
+    def __init__(self, stream=None, batch_size=BATCH_SIZE):
+        """
+        Initialize a new BatchLogWriter instance.
+
+        :param stream: text stream, ``sys.stderr`` by default.
+        :param batch_size (int): most records written per batch.
+        """
+        self.queue = queue.SimpleQueue()
+        self.stream = stream
+        self.batch_size = batch_size
+        self.formatter = logging.Formatter(LOG_FORMAT)
+        self.access_formatter = logging.Formatter(ACCESS_FORMAT)
+        self._thread = None
+
+    def start(self):
+        """Start the writer thread."""
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Write the pending records and stop the writer thread."""
+        if self._thread is not None and self._thread.is_alive():
+            self.queue.put(None)
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def format(self, record):
+        """Format one record with the access or the application format."""
+        if record.name == ACCESS_LOG.name:
+            return self.access_formatter.format(record)
+        return self.formatter.format(record)
+
+    def _run(self):
+        q = self.queue
+        while True:
+            record = q.get()
+            batch = [record]
+            while record is not None and len(batch) < self.batch_size:
+                try:
+                    record = q.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(record)
+            lines = []
+            for item in batch:
+                if item is None:
+                    continue
+                try:
+                    lines.append(self.format(item))
+                except Exception:
+                    lines.append("[logging] Unformattable record {!r}".format(item.msg))
+            stream = self.stream or sys.stderr
+            if lines:
+                try:
+                    stream.write("\n".join(lines) + "\n")
+                    stream.flush()
+                except (OSError, ValueError):
+                    pass
+            if batch[-1] is None:
+                return
+
+
+def setup_logging(level=None, levels=None, access_log=None, stream=None,
+                  batch_size=BATCH_SIZE):
+    """
+    Route every log record through one background batch writer.
+
+    Values not given are read from ``WEAPROUS_LOG``; the default level is
+    ``INFO`` with the access log off. Calling it again reconfigures levels.
+
+    :param level (str | int): root level, e.g. ``"INFO"`` or ``"DEBUG"``.
+    :param levels (dict): per-logger levels, e.g. ``{"daemon.response": "DEBUG"}``.
+    :param access_log (bool): enable the one-line access log.
+    :param stream: text stream, ``sys.stderr`` by default.
+    :param batch_size (int): most records written per batch.
+
+    :rtype BatchLogWriter: the running writer.
+    """
+    global _writer
+    env_root, env_levels = parse_levels(os.environ.get(LOG_ENV))
+    root_level = _level(level) if level is not None else (env_root or logging.INFO)
+    per_logger = dict(env_levels)
+    per_logger.update({name: _level(value) for name, value in (levels or {}).items()})
+    if access_log is not None:
+        per_logger[ACCESS_LOG.name] = logging.INFO if access_log else logging.WARNING
+    elif ACCESS_LOG.level == logging.NOTSET:
+        per_logger.setdefault(ACCESS_LOG.name, logging.WARNING)
+
+    with _lock:
+        if _writer is None:
+            _writer = BatchLogWriter(stream, batch_size)
+            _writer.start()
+            root = logging.getLogger()
+            for handler in list(root.handlers):
+                root.removeHandler(handler)
+            root.addHandler(_DeferredQueueHandler(_writer.queue))
+            atexit.register(shutdown_logging)
+        elif stream is not None:
+            _writer.stream = stream
+
+    logging.getLogger().setLevel(root_level)
+    for name, value in per_logger.items():
+        logging.getLogger(name).setLevel(value)
+    return _writer
+
+
+def is_configured():
+    """Whether :func:`setup_logging` already installed the writer."""
+    return _writer is not None
+
+
+def shutdown_logging():
+    """Flush and stop the background writer."""
+    if _writer is not None:
+        _writer.stop()
+
+
+def _after_fork():
+    """Threads do not survive ``fork``: start a writer in the child."""
+    global _writer
+    if _writer is None:
+        return
+    old, _writer = _writer, None
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, _DeferredQueueHandler):
+            root.removeHandler(handler)
+    _writer = BatchLogWriter(old.stream, old.batch_size)
+    _writer.start()
+    root.addHandler(_DeferredQueueHandler(_writer.queue))
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+def response_status(response):
+    """Status code of a built response, ``0`` when unknown."""
+    head = getattr(response, "header", None)
+    if head is None:
+        buffers = getattr(response, "buffers", None)
+        head = buffers[0] if buffers else response
+    try:
+        return int(bytes(head[9:12]))
+    except (TypeError, ValueError):
+        return 0
+
+
+def log_access(addr, request, response, started):
+    """
+    Write the access log line of one request, when the access log is on.
+
+    :param addr (tuple): client address.
+    :param request (Request): the served request.
+    :param response: the built response.
+    :param started (float): ``time.monotonic()`` when the request was parsed.
+    """
+    if not ACCESS_LOG.isEnabledFor(logging.INFO):
+        return
+    try:
+        size = len(response)
+    except TypeError:
+        size = "-"
+    client = "{}:{}".format(addr[0], addr[1]) if isinstance(addr, tuple) else addr
+    ACCESS_LOG.info('%s "%s %s %s" %s %s %.1fms', client, request.method, request.url,
+                    request.version, response_status(response), size,
+                    (time.monotonic() - started) * 1000)
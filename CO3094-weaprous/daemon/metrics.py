@@ -0,0 +1,331 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.metrics
+~~~~~~~~~~~~~~~~~
+
+This module provides the request metrics of ``WeApRous`` and their export
+in the Prometheus text format.
+
+Collected per route pattern (``/channel/<name>/messages``, ``static`` for
+requests served without a route) and method:
+
+- requests, broken down by status code;
+- latency histograms of the ``parse``, ``handler``, ``send`` and ``total``
+  phases, with the fixed ``BUCKETS``;
+- request and response bytes (streamed bodies count their head only);
+- handler CPU time of the calling thread (``time.thread_time``).
+
+Plus the connection queue wait of the ``thread`` / ``pool`` engines, the
+accepted connections and the active connections.
+
+Collection is lock-free on the request path: every thread writes to its own
+shard, shards are merged when the metrics are read. Shards of exited threads
+are folded into one retired shard, so thread-per-connection servers do not
+accumulate them. Metrics are off until :meth:`Metrics.enable` (or
+``app.enable_metrics()``); when off the recording calls return at once.
+
+Notes:
+------
+- Metrics are per process: with pre-forked workers each scrape is answered
+  by (and describes) one worker.
+
+Usage Example:
+--------------
+>>> app.enable_metrics("/metrics")
+>>> # curl http://127.0.0.1:9000/metrics
+>>> # weaprous_requests_total{route="/login",method="POST",status="200"} 12
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Iterator
+
+from .logger import response_status
+
+#: Upper bounds (seconds) of the latency histogram buckets, ``+Inf`` implied.
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+           0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+#: Route label of the requests served without a route (static files, 404).
+STATIC_ROUTE = "static"
+#: Content type of the Prometheus text exposition format.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Shard:
+    """Metrics written by one thread only."""
+
+    __slots__ = ("thread", "requests", "histograms", "bytes_in", "bytes_out", "cpu",
+                 "queue_wait", "opened", "closed")
+
+    def __init__(self, thread=None):
+        self.thread = thread
+        #: (route, method, status) -> requests
+        self.requests = {}
+        #: (name, labels) -> [count per bucket..., count above the last bucket, sum]
+        self.histograms = {}
+        #: (route, method) -> bytes / seconds
+        self.bytes_in = {}
+        self.bytes_out = {}
+        self.cpu = {}
+        self.queue_wait = _histogram()
+        self.opened = 0
+        self.closed = 0
+
+    def observe(self, key, value):
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = _histogram()
+        histogram[bisect_left(BUCKETS, value)] += 1
+        histogram[-1] += value
+
+    def merge(self, other):
+        """Add the values of ``other`` to this shard."""
+        for target, source in ((self.requests, other.requests),
+                               (self.bytes_in, other.bytes_in),
+                               (self.bytes_out, other.bytes_out),
+                               (self.cpu, other.cpu)):
+            # list() copies in one step, the owner thread may insert meanwhile
+            for key, value in list(source.items()):
+                target[key] = target.get(key, 0) + value
+        for key, histogram in list(other.histograms.items()):
+            _add(self.histograms.setdefault(key, _histogram()), histogram)
+        _add(self.queue_wait, other.queue_wait)
+        self.opened += other.opened
+        self.closed += other.closed
+
+
+def _histogram():
+    return [0] * (len(BUCKETS) + 1) + [0.0]
+
+
+def _add(target, source):
+    for i, value in enumerate(list(source)):
+        target[i] += value
+
+
+def route_label(request):
+    """Route pattern of a served request, :data:`STATIC_ROUTE` without a route."""
+    route = getattr(request, "route", None)
+    return route.path if route is not None else STATIC_ROUTE
+
+
+def response_size(response):
+    """Bytes of a built response, the head only for streamed bodies."""
+    try:
+        return len(response)
+    except TypeError:
+        return len(getattr(response, "header", b""))
+
+
+class Metrics:
+    """
+    Process wide request metrics with per-thread shards.
+
+    :attrs enabled (bool): whether requests are recorded.
+    """
+
+    __attrs__ = [
+        "enabled",
+    ]
+
+    def __init__(self):
+        """Initialize a new, disabled Metrics registry."""
+        self.enabled = False
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []
+        #: Values of the threads that exited
+        self._retired = _Shard()
+
+    def enable(self, enabled=True):
+        """Start (or stop) recording requests."""
+        self.enabled = enabled
+
+    def _shard(self):
+        """Shard of the calling thread, created on its first record."""
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard(threading.current_thread())
+            with self._lock:
+                self._retire()
+                self._shards.append(shard)
+        return shard
+
+    def _retire(self):
+        """Fold the shards of exited threads into the retired shard (lock held)."""
+        alive = []
+        for shard in self._shards:
+            if shard.thread.is_alive():
+                alive.append(shard)
+            else:
+                self._retired.merge(shard)
+        self._shards = alive
+
+    def connection_opened(self, queue_wait=None):
+        """
+        Count an accepted connection.
+
+        :param queue_wait (float): seconds between accept and the start of
+                                   its handling, ``None`` when not queued.
+        """
+        if not self.enabled:
+            return
+        shard = self._shard()
+        shard.opened += 1
+        if queue_wait is not None:
+            shard.queue_wait[bisect_left(BUCKETS, queue_wait)] += 1
+            shard.queue_wait[-1] += queue_wait
+
+    def connection_closed(self):
+        """Count a closed connection."""
+        if not self.enabled:
+            return
+        self._shard().closed += 1
+
+    def observe(self, request, response, send_time=None):
+        """
+        Record one served request.
+
+        :param request (Request): the served request, with its timings.
+        :param response: the built response.
+        :param send_time (float): seconds spent writing the response, ``None``
+                                  when the engine writes it later.
+        """
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        shard = self._shard()
+        route = route_label(request)
+        labels = (route, request.method)
+        key = labels + (response_status(response),)
+        shard.requests[key] = shard.requests.get(key, 0) + 1
+        shard.bytes_in[labels] = shard.bytes_in.get(labels, 0) + (request.size or 0)
+        shard.bytes_out[labels] = shard.bytes_out.get(labels, 0) + response_size(response)
+
+        if request.parse_time is not None:
+            shard.observe(("parse",) + labels, request.parse_time)
+        if request.handler_time is not None:
+            shard.observe(("handler",) + labels, request.handler_time)
+            shard.cpu[labels] = shard.cpu.get(labels, 0.0) + request.handler_cpu
+        if send_time is not None:
+            shard.observe(("send",) + labels, send_time)
+        if request.received is not None:
+            shard.observe(("total",) + labels, now - request.received)
+
+    def snapshot(self):
+        """
+        Merge every shard into one.
+
+        :rtype _Shard: the merged values.
+        """
+        total = _Shard()
+        with self._lock:
+            self._retire()
+            total.merge(self._retired)
+            shards = list(self._shards)
+        for shard in shards:
+            total.merge(shard)
+        return total
+
+    def render(self):
+        """
+        The metrics in the Prometheus text exposition format.
+
+        :rtype str: the exposition text.
+        """
+        s = self.snapshot()
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append("# HELP {} {}".format(name, help_text))
+            lines.append("# TYPE {} {}".format(name, kind))
+
+        def histogram(name, labels, values):
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ("+Inf",), values):
+                cumulative += count
+                lines.append("{}_bucket{} {}".format(
+                    name, _labels(labels + (("le", _number(bound)),)), cumulative))
+            lines.append("{}_sum{} {}".format(name, _labels(labels), _number(values[-1])))
+            lines.append("{}_count{} {}".format(name, _labels(labels), cumulative))
+
+        family("weaprous_requests_total", "counter", "Requests served by route, method and status.")
+        for (route, method, status), value in sorted(s.requests.items()):
+            lines.append("weaprous_requests_total{} {}".format(
+                _labels((("route", route), ("method", method), ("status", status))), value))
+
+        family("weaprous_request_duration_seconds", "histogram",
+               "Request latency by phase (parse, handler, send, total), route and method.")
+        for (phase, route, method), values in sorted(s.histograms.items()):
+            histogram("weaprous_request_duration_seconds",
+                      (("phase", phase), ("route", route), ("method", method)), values)
+
+        for name, values, help_text in (
+                ("weaprous_request_bytes_total", s.bytes_in, "Request bytes received."),
+                ("weaprous_response_bytes_total", s.bytes_out, "Response bytes built."),
+                ("weaprous_handler_cpu_seconds_total", s.cpu, "Handler CPU time.")):
+            family(name, "counter", help_text + " By route and method.")
+            for (route, method), value in sorted(values.items()):
+                lines.append("{}{} {}".format(
+                    name, _labels((("route", route), ("method", method))), _number(value)))
+
+        family("weaprous_queue_wait_seconds", "histogram",
+               "Wait of accepted connections for a worker thread.")
+        histogram("weaprous_queue_wait_seconds", (), s.queue_wait)
+        family("weaprous_connections_total", "counter", "Accepted connections.")
+        lines.append("weaprous_connections_total {}".format(s.opened))
+        family("weaprous_active_connections", "gauge", "Open connections.")
+        lines.append("weaprous_active_connections {}".format(s.opened - s.closed))
+        return "\n".join(lines) + "\n"
+
+    def exposition(self):
+        """
+        Handler result serving the metrics, see :meth:`WeApRous.enable_metrics`.
+
+        :rtype PrometheusText: a streamable result with the exposition content type.
+        """
+        return PrometheusText(self.render())
+
+
+class PrometheusText(Iterator):
+    """Handler result streaming a Prometheus exposition as ``text/plain``."""
+
+    content_type = CONTENT_TYPE
+
+    def __init__(self, text):
+        self._chunks = iter((text,))
+
+    def __next__(self):
+        return next(self._chunks)
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join('{}="{}"'.format(name, _escape(value)) for name, value in pairs) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value):
+    if isinstance(value, str):
+        return value
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+#: Process wide metrics registry used by every backend engine.
+METRICS = Metrics()
@@ -0,0 +1,122 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.notifier
+~~~~~~~~~~~~~~~~
+
+This module provides :class:`Notifier <Notifier>`, which lets coroutines
+wait for a key to change (e.g. a new message in a channel) without holding
+a thread, and lets any thread wake them.
+
+A coroutine subscribes to the key *before* it reads the current state and
+awaits the subscription only when there was nothing to return, so a change
+notified in between is not lost. :meth:`Notifier.notify` may be called from
+any thread: each waiter is woken on its own event loop with
+:meth:`loop.call_soon_threadsafe <asyncio.loop.call_soon_threadsafe>`.
+
+Usage Example:
+--------------
+>>> changes = Notifier()
+>>> async def poll(channel):
+>>>     changed = changes.subscribe(channel)
+>>>     try:
+>>>         ...  # read the channel, return if there is something new
+>>>         await changes.wait(changed, 30)
+>>>     finally:
+>>>         changes.unsubscribe(channel, changed)
+>>> changes.notify("general")
+"""
+
+import asyncio
+import threading
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(True)
+
+
+class Notifier:
+    """
+    Per-key wake-ups of the coroutines of any event loop, from any thread.
+
+    A notification wakes every current subscriber of the key once, the
+    subscribers that want the next change subscribe again.
+    """
+
+    __attrs__ = []
+
+    def __init__(self):
+        """Initialize a new Notifier with no subscriber."""
+        self._lock = threading.Lock()
+        #: key -> {future: event loop of the future}
+        self._waiters = {}
+
+    def subscribe(self, key):
+        """
+        Register the running coroutine for the next change of ``key``.
+
+        :param key (hashable): what to wait for.
+
+        :rtype asyncio.Future: resolved by the next :meth:`notify` of ``key``.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            self._waiters.setdefault(key, {})[future] = loop
+        return future
+
+    def unsubscribe(self, key, future):
+        """Drop a subscription of ``key``, notified or not."""
+        with self._lock:
+            waiters = self._waiters.get(key)
+            if waiters is not None:
+                waiters.pop(future, None)
+                if not waiters:
+                    del self._waiters[key]
+
+    def waiting(self, key):
+        """
+        Number of subscriptions waiting for ``key``.
+
+        :rtype int: current subscribers of ``key``.
+        """
+        with self._lock:
+            return len(self._waiters.get(key, ()))
+
+    def notify(self, key):
+        """Wake every subscriber of ``key``, callable from any thread."""
+        with self._lock:
+            waiters = self._waiters.pop(key, None)
+        for future, loop in (waiters or {}).items():
+            try:
+                loop.call_soon_threadsafe(_wake, future)
+            except RuntimeError:
+                # The subscriber's loop is closed
+                pass
+
+    @staticmethod
+    async def wait(future, timeout):
+        """
+        Wait for a subscription to be notified, at most ``timeout`` seconds.
+
+        :param future (asyncio.Future): a future returned by :meth:`subscribe`.
+        :param timeout (float): seconds to wait.
+
+        :rtype bool: True when notified, False on timeout.
+        """
+        try:
+            await asyncio.wait_for(future, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
@@ -0,0 +1,215 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.parser
+~~~~~~~~~~~~~~~~~
+
+This module provides :class:`HttpParser <HttpParser>`, an incremental HTTP/1.1
+request parser shared by every backend engine.
+
+Each connection owns one parser and one reusable receive buffer. Bytes are
+received straight into the free tail of the buffer with ``recv_into`` (or
+appended with :meth:`feed <HttpParser.feed>` by the ``asyncio`` engine),
+the header terminator is searched only in the bytes that arrived since the
+last attempt, and the body is framed with ``Content-Length`` without ever
+re-splitting the request as text. Complete requests are returned as
+prepared :class:`Request <Request>` objects.
+
+Limits:
+
+- ``max_header_size``: request line plus headers, answered with 431.
+- ``max_body_size``: ``Content-Length`` bodies, answered with 413.
+
+Usage Example:
+--------------
+>>> parser = HttpParser()
+>>> while parser.recv_into(conn):
+>>>     req = parser.next_request(routes)
+>>>     while req is not None:
+>>>         ...
+>>>         req = parser.next_request(routes)
+"""
+
+import time
+
+from .request import Request, HttpParseError, parse_request_head, parse_content_length
+
+#: Default limit of the request line and header block, in bytes.
+MAX_HEADER_SIZE = 16 * 1024
+#: Default limit of a request body, in bytes.
+MAX_BODY_SIZE = 1024 * 1024
+#: Initial size of the per-connection receive buffer.
+BUFFER_SIZE = 65536
+#: Free bytes below which the buffer is compacted (or grown) before ``recv_into``.
+MIN_RECV_SPACE = 4096
+
+_TERMINATOR = b"\r\n\r\n"
+
+
+class HttpParser:
+    """
+    Incremental request parser over a reusable per-connection buffer.
+
+    Unconsumed bytes live in ``buf[start:end]``; consumed bytes are reclaimed
+    by moving the tail to the front of the buffer only when more room is
+    needed, so pipelined requests never cost a copy each.
+
+    :attrs max_header_size (int): limit of the request line plus headers.
+    :attrs max_body_size (int): limit of the request body.
+    """
+
+    __slots__ = (
+        "max_header_size",
+        "max_body_size",
+        "buffer_size",
+        "buf",
+        "start",
+        "end",
+        "_scan",
+        "_head",
+    )
+
+    def __init__(self, max_header_size=MAX_HEADER_SIZE, max_body_size=MAX_BODY_SIZE,
+                 buffer_size=BUFFER_SIZE):
+        """
+        Initialize a new HttpParser instance.
+
+        :param max_header_size (int): limit of the request line plus headers.
+        :param max_body_size (int): limit of the request body.
+        :param buffer_size (int): initial size of the receive buffer.
+        """
+        self.max_header_size = max_header_size
+        self.max_body_size = max_body_size
+        self.buffer_size = buffer_size
+        self.buf = bytearray(buffer_size)
+        self.start = 0
+        self.end = 0
+        #: Offset where the next header terminator search resumes.
+        self._scan = 0
+        #: Parsed head (method, path, version, headers, body offset, body length)
+        #: of a request still waiting for its body.
+        self._head = None
+
+    def __len__(self):
+        """Number of received bytes not consumed yet."""
+        return self.end - self.start
+
+    def _reserve(self, size):
+        """Make room for at least ``size`` more bytes after ``end``."""
+        if len(self.buf) - self.end >= size:
+            return
+        pending = self.end - self.start
+        if self.start:
+            # Slide the unconsumed bytes to the front of the buffer
+            self.buf[:pending] = self.buf[self.start:self.end]
+            self._scan -= self.start
+            if self._head is not None:
+                self._head = self._head[:4] + (self._head[4] - self.start,) + self._head[5:]
+            self.start, self.end = 0, pending
+        if len(self.buf) - self.end < size:
+            self.buf.extend(bytes(max(size, len(self.buf))))
+
+    def recv_into(self, sock, size=MIN_RECV_SPACE):
+        """
+        Receive bytes from ``sock`` directly into the free tail of the buffer.
+
+        :param sock (socket.socket): connected client socket.
+        :param size (int): minimum free space offered to the kernel.
+
+        :rtype int: number of bytes received, 0 when the peer closed.
+        :raise socket.timeout, BlockingIOError: as raised by the socket.
+        """
+        self._reserve(size)
+        with memoryview(self.buf) as view:
+            n = sock.recv_into(view[self.end:])
+        self.end += n
+        return n
+
+    def feed(self, data):
+        """
+        Append already received bytes to the buffer.
+
+        :param data (bytes): bytes read from the connection.
+        """
+        n = len(data)
+        self._reserve(n)
+        self.buf[self.end:self.end + n] = data
+        self.end += n
+
+    def detach(self):
+        """
+        Remove and return the unconsumed bytes, e.g. the first frames sent
+        right after a protocol upgrade.
+
+        :rtype bytes: the buffered bytes.
+        """
+        data = bytes(self.buf[self.start:self.end])
+        self.start = self.end = self._scan = 0
+        self._head = None
+        return data
+
+    def next_request(self, routes=None):
+        """
+        Parse the next complete request from the buffered bytes.
+
+        :param routes (dict): route handlers used to find the request hook.
+
+        :rtype Request: the prepared request, or ``None`` until more bytes arrive.
+        :raise HttpParseError: on malformed framing or exceeded limits.
+        """
+        started = time.perf_counter()
+        if self._head is None:
+            buf = self.buf
+            # Skip CRLFs sent between requests (RFC 9112 section 2.2)
+            while self.start + 1 < self.end and buf[self.start] == 13 \
+                    and buf[self.start + 1] == 10:
+                self.start += 2
+            self._scan = max(self._scan, self.start)
+            head_end = buf.find(_TERMINATOR, self._scan, self.end)
+            if head_end < 0:
+                if self.end - self.start > self.max_header_size:
+                    raise HttpParseError(431, "Request header fields too large")
+                # Resume the search where a split terminator could start
+                self._scan = max(self.start, self.end - 3)
+                return None
+            if head_end - self.start > self.max_header_size:
+                raise HttpParseError(431, "Request header fields too large")
+
+            with memoryview(buf) as view:
+                method, path, version, headers = parse_request_head(view[self.start:head_end])
+            body_len = parse_content_length(headers, self.max_body_size)
+            self._head = (method, path, version, headers, head_end + 4, body_len,
+                          head_end + 4 - self.start)
+
+        method, path, version, headers, body_start, body_len, head_len = self._head
+        body_end = body_start + body_len
+        if body_end > self.end:
+            # Grow now so the remaining body is received in place
+            self._reserve(body_end - self.end)
+            return None
+
+        body = bytes(self.buf[body_start:body_end])
+        self.start = self._scan = body_end
+        self._head = None
+        if self.start == self.end:
+            self.start = self.end = self._scan = 0
+            if len(self.buf) > self.buffer_size:
+                # Drop the room grown for a large body
+                self.buf = bytearray(self.buffer_size)
+
+        req = Request()
+        req.prepare_parsed(method, path, version, headers, body, routes)
+        req.size = head_len + body_len
+        req.received = started
+        req.parse_time = time.perf_counter() - started
+        return req
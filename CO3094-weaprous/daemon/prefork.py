@@ -0,0 +1,212 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.prefork
+~~~~~~~~~~~~~~~~~
+
+This module provides a pre-fork, multi-process backend. A supervisor process
+forks ``workers`` children; each child binds the same address with
+``SO_REUSEPORT`` and runs its own accept loop with the selected engine, so
+the kernel spreads connections over all cores without a shared GIL.
+
+The supervisor restarts any child that dies unexpectedly and forwards
+CTRL+C / SIGTERM to every child on shutdown. Workers that keep failing right
+after their start (e.g. the address cannot be bound) stop the supervisor
+after ``MAX_FAST_FAILURES`` exits in a row, with a non-zero status.
+
+Notes:
+------
+- Requires ``os.fork`` and ``SO_REUSEPORT`` (Linux, BSD, macOS).
+- Module level state of the application is copied into every worker at fork
+  time; routes that keep state in memory do not see each other's updates.
+  Keep shared state in a :class:`SharedStateStore <SharedStateStore>`, see
+  :mod:`daemon.statestore`.
+
+Usage Example:
+--------------
+>>> create_backend("0.0.0.0", 9000, routes={}, engine="pool", workers=4)
+"""
+
+import os
+import signal
+import logging
+import socket
+import sys
+import time
+
+from .logger import shutdown_logging
+
+#: A worker dying sooner than this after its start counts as a crash loop.
+MIN_WORKER_UPTIME = 1.0
+#: Delay before restarting a worker caught in a crash loop.
+RESTART_BACKOFF = 1.0
+#: Consecutive crash-loop exits after which the supervisor gives up.
+MAX_FAST_FAILURES = 5
+#: Seconds granted to workers to exit after SIGTERM before SIGKILL.
+SHUTDOWN_TIMEOUT = 5.0
+
+log = logging.getLogger(__name__)
+
+
+def prefork_supported():
+    """
+    Whether this platform can run the pre-fork backend.
+
+    :rtype bool: True if ``os.fork`` and ``SO_REUSEPORT`` are available.
+    """
+    return hasattr(os, "fork") and hasattr(socket, "SO_REUSEPORT")
+
+
+class PreforkSupervisor:
+    """
+    Supervisor process spawning and restarting pre-forked backend workers.
+
+    :attrs workers (int): number of worker processes to keep alive.
+    :attrs target (callable): function run by every worker, it must bind its
+                              listening socket with ``SO_REUSEPORT``.
+    :attrs children (dict): pid -> (slot, start time) of running workers.
+    """
+
+    __attrs__ = [
+        "workers",
+        "target",
+        "children",
+    ]
+
+    def __init__(self, workers, target):
+        """
+        Initialize a new PreforkSupervisor instance.
+
+        :param workers (int): number of worker processes.
+        :param target (callable): worker body, called without arguments in
+                                  the child process.
+        """
+        if workers < 1:
+            raise ValueError("workers must be >= 1, got {}".format(workers))
+        self.workers = workers
+        self.target = target
+        self.children = {}
+
+    def spawn(self, slot):
+        """
+        Fork one worker process for ``slot``.
+
+        :param slot (int): worker index, used in log messages.
+
+        :rtype int: pid of the new worker.
+        """
+        pid = os.fork()
+        if pid == 0:
+            # Child: restore default signal handling and run the worker.
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            status = 0
+            try:
+                self.target()
+            except KeyboardInterrupt:
+                pass
+            except BaseException as e:
+                log.exception("Worker %s failed: %s", slot, e)
+                status = 1
+            finally:
+                # os._exit skips atexit: write the pending log records first
+                shutdown_logging()
+                sys.stdout.flush()
+                os._exit(status)
+
+        self.children[pid] = (slot, time.monotonic())
+        log.info("Started worker %s pid %s", slot, pid)
+        return pid
+
+    def _terminate(self, signum, frame):
+        """SIGTERM handler of the supervisor: leave the wait loop."""
+        raise KeyboardInterrupt
+
+    def serve_forever(self):
+        """
+        Fork all workers and restart the ones that exit until shutdown.
+
+        :raise SystemExit: with status 1 after ``MAX_FAST_FAILURES`` workers in
+                           a row exited within ``MIN_WORKER_UPTIME``.
+        """
+        signal.signal(signal.SIGTERM, self._terminate)
+        log.info("Supervisor pid %s starting %s workers", os.getpid(), self.workers)
+        failures = 0
+        try:
+            for slot in range(self.workers):
+                self.spawn(slot)
+
+            while True:
+                pid, status = os.wait()
+                if pid not in self.children:
+                    continue
+                slot, started = self.children.pop(pid)
+                log.warning("Worker %s pid %s exited with status %s", slot, pid,
+                            os.waitstatus_to_exitcode(status))
+                if time.monotonic() - started >= MIN_WORKER_UPTIME:
+                    failures = 0
+                else:
+                    failures += 1
+                    if failures >= MAX_FAST_FAILURES:
+                        log.error("Workers failed %s times in a row at start, giving up",
+                                  failures)
+                        raise SystemExit(1)
+                    time.sleep(RESTART_BACKOFF)
+                self.spawn(slot)
+        except KeyboardInterrupt:
+            log.info("Shutting down %s workers.", len(self.children))
+        except ChildProcessError:
+            pass
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """Send SIGTERM to every worker, SIGKILL the ones that do not exit."""
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self.children.pop(pid, None)
+
+        deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+        while self.children and time.monotonic() < deadline:
+            for pid in list(self.children):
+                try:
+                    done, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    done = pid
+                if done:
+                    self.children.pop(pid, None)
+            time.sleep(0.05)
+
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        self.children.clear()
+
+
+def run_prefork(workers, target):
+    """
+    Entry point of the pre-fork backend.
+
+    :param workers (int): number of worker processes.
+    :param target (callable): worker body binding with ``SO_REUSEPORT``.
+
+    :raise OSError: if the platform lacks ``fork`` or ``SO_REUSEPORT``.
+    """
+    if not prefork_supported():
+        raise OSError("Pre-fork backend requires os.fork and SO_REUSEPORT")
+    PreforkSupervisor(workers, target).serve_forever()
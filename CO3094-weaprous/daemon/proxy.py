@@ -27,12 +27,15 @@ Requirement:
 - dictionary: :class: `CaseInsensitiveDict <CaseInsensitiveDict>` for managing headers and cookies.
 
 """
+import logging
 import socket
 import threading
 from .response import *
 from .httpadapter import HttpAdapter
 from .dictionary import CaseInsensitiveDict
 
+log = logging.getLogger(__name__)
+
 #: A dictionary mapping hostnames to backend IP and port tuples.
 #: Used to determine routing targets for incoming requests.
 PROXY_PASS = {
@@ -67,7 +70,7 @@ def forward_request(host, port, request):
             response += chunk
         return response
     except socket.error as e:
-      print("Socket error: {}".format(e))
+      log.error("Socket error: %s", e)
       return (
             "HTTP/1.1 404 Not Found\r\n"
             "Content-Type: text/plain\r\n"
@@ -88,17 +91,14 @@ def resolve_routing_policy(hostname, routes):
     :params routes (dict): dictionary mapping hostnames and location.
     """
 
-    print(hostname)
     proxy_map, policy = routes.get(hostname,('127.0.0.1:9000','round-robin'))
-    print(proxy_map)
-    print(policy)
+    log.debug("hostname %s proxy_map %s policy %s", hostname, proxy_map, policy)
 
     proxy_host = ''
     proxy_port = '9000'
     if isinstance(proxy_map, list):
         if len(proxy_map) == 0:
-            print("[Proxy] Emtpy resolved routing of hostname {}".format(hostname))
-            print("Empty proxy_map result")
+            log.warning("Emtpy resolved routing of hostname %s", hostname)
             # TODO: implement the error handling for non mapped host
             #       the policy is design by team, but it can be 
             #       basic default host in your self-defined system
@@ -115,7 +115,7 @@ def resolve_routing_policy(hostname, routes):
             proxy_host = '127.0.0.1'
             proxy_port = '9000'
     else:
-        print("[Proxy] resolve route of hostname {} is a singulair to".format(hostname))
+        log.debug("resolve route of hostname %s is a singulair to", hostname)
         proxy_host, proxy_port = proxy_map.split(":", 2)
 
     return proxy_host, proxy_port
@@ -146,7 +146,7 @@ def handle_client(ip, port, conn, addr, routes):
         if line.lower().startswith('host:'):
             hostname = line.split(':', 1)[1].strip()
 
-    print("[Proxy] {} at Host: {}".format(addr, hostname))
+    log.info("%s at Host: %s", addr, hostname)
 
     # Resolve the matching destination in routes and need conver port
     # to integer value
@@ -154,10 +154,10 @@ def handle_client(ip, port, conn, addr, routes):
     try:
         resolved_port = int(resolved_port)
     except ValueError:
-        print("Not a valid integer")
+        log.warning("Not a valid integer")
 
     if resolved_host:
-        print("[Proxy] Host name {} is forwarded to {}:{}".format(hostname,resolved_host, resolved_port))
+        log.info("Host name %s is forwarded to %s:%s", hostname, resolved_host, resolved_port)
         response = forward_request(resolved_host, resolved_port, request)        
     else:
         response = (
@@ -191,7 +191,7 @@ def run_proxy(ip, port, routes):
     try:
         proxy.bind((ip, port))
         proxy.listen(50)
-        print("[Proxy] Listening on IP {} port {}".format(ip,port))
+        log.info("Listening on IP %s port %s", ip, port)
         while True:
             conn, addr = proxy.accept()
             #
@@ -200,7 +200,7 @@ def run_proxy(ip, port, routes):
             #        provided handle_client routine
             #
     except socket.error as e:
-      print("Socket error: {}".format(e))
+      log.error("Socket error: %s", e)
 
 def create_proxy(ip, port, routes):
     """
@@ -16,8 +16,90 @@ daemon.request
 
 This module provides a Request object to manage and persist 
 request settings (cookies, auth, proxies).
+
+It also provides :func:`parse_request_head`, the single-pass byte-level
+parser of a request line and header block shared by
+:class:`HttpParser <daemon.parser.HttpParser>` and :meth:`Request.prepare`.
 """
+import json
+import logging
+import time
+from urllib.parse import parse_qsl
+
 from .dictionary import CaseInsensitiveDict
+from .router import Router, as_router
+from .websocket import WEBSOCKET, is_upgrade_request
+from .metrics import METRICS
+
+#: Marks a lazily parsed attribute not computed yet.
+_UNSET = object()
+
+log = logging.getLogger(__name__)
+
+
+class HttpParseError(Exception):
+    """Raised for a malformed or oversized request.
+
+    :attrs status_code (int): HTTP status code to answer with (400, 413, 431, 501).
+    """
+
+    def __init__(self, status_code, message):
+        Exception.__init__(self, message)
+        self.status_code = status_code
+
+
+def parse_request_head(head):
+    """
+    Parse a request line and header block in one pass.
+
+    :param head (bytes): raw bytes up to, not including, the blank line.
+
+    :rtype tuple: (method, target, version, headers) where header names are
+                  lower-cased and values are stripped strings.
+    :raise HttpParseError: if the request line or a header line is malformed.
+    """
+    lines = bytes(head).lstrip(b"\r\n").split(b"\r\n")
+    parts = lines[0].split()
+    if len(parts) != 3:
+        raise HttpParseError(400, "Malformed request line")
+    method, target, version = (p.decode("latin-1") for p in parts)
+    if not version.startswith("HTTP/"):
+        raise HttpParseError(400, "Malformed HTTP version")
+
+    headers = {}
+    for line in lines[1:]:
+        name, sep, value = line.partition(b":")
+        if not sep or not name or name != name.strip():
+            raise HttpParseError(400, "Malformed header line")
+        key = name.decode("latin-1").lower()
+        value = value.strip().decode("utf-8", "replace")
+        # Repeated headers are folded as a comma separated list (RFC 9110)
+        headers[key] = headers[key] + ", " + value if key in headers else value
+    return method, target, version, headers
+
+
+def parse_content_length(headers, max_body_size=None):
+    """
+    Declared body size of a request.
+
+    :param headers (dict): parsed, lower-cased request headers.
+    :param max_body_size (int): limit of the body size, ``None`` for no limit.
+
+    :rtype int: number of body bytes that follow the header block.
+    :raise HttpParseError: on chunked bodies, invalid or oversized lengths.
+    """
+    if "transfer-encoding" in headers:
+        raise HttpParseError(501, "Chunked request bodies are not supported")
+    value = headers.get("content-length")
+    if value is None:
+        return 0
+    if not value.isdigit():
+        raise HttpParseError(400, "Invalid Content-Length")
+    length = int(value)
+    if max_body_size is not None and length > max_body_size:
+        raise HttpParseError(413, "Request body exceeds {} bytes".format(max_body_size))
+    return length
+
 
 class Request():
     """The fully mutable "class" `Request <Request>` object,
@@ -27,6 +109,10 @@ class Request():
     should not be instantiated manually; doing so may produce undesirable
     effects.
 
+    Attributes are kept in ``__slots__``; cookies, auth, query parameters
+    and the decoded / JSON body are parsed on first access only, so static
+    files and requests that never read them pay nothing for them.
+
     Usage::
 
       >>> import deamon.request
@@ -35,20 +121,52 @@ class Request():
       >>> r = req.prepare(incoming_msg)
       >>> r
       <Request>
+      >>> req.query.get("since"), req.json
     """
     __attrs__ = [
         "method",
         "url",
         "headers",
         "body",
-        "reason",
         "cookies",
-        "body",
+        "auth",
+        "query",
+        "json",
         "routes",
         "hook",
     ]
 
+    __slots__ = (
+        "method",
+        "url",
+        "headers",
+        "path",
+        "version",
+        "routes",
+        "hook",
+        "route",
+        "params",
+        "allow",
+        "query_string",
+        "_raw_body",
+        "_body",
+        "_cookies",
+        "_auth",
+        "_query",
+        "_json",
+        "size",
+        "received",
+        "parse_time",
+        "handler_time",
+        "handler_cpu",
+        "websocket",
+    )
+
     def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Clear every attribute so the object can be prepared again."""
         #: HTTP verb to send to the server.
         self.method = None
         #: HTTP URL to send the request to.
@@ -56,105 +174,191 @@ class Request():
         #: dictionary of HTTP headers.
         self.headers = None
         #: HTTP path
-        self.path = None        
-        # The cookies set used to create Cookie header
-        self.cookies = None
-        #: request body to send to the server.
-        self.body = None
+        self.path = None
+        #: HTTP version, e.g. ``HTTP/1.1``
+        self.version = None
         #: Routes
-        self.routes = {}
+        self.routes = None
         #: Hook point for routed mapped-path
         self.hook = None
-        #: Auth
-        self.auth = None
+        #: Matched :class:`Route <Route>` and its path parameters
+        self.route = None
+        self.params = {}
+        #: ``Allow`` header when the path is routed for other methods only
+        self.allow = None
+        #: Raw query string, without the ``?``
+        self.query_string = ""
+        #: Framed body bytes, decoded on first access of :attr:`body`
+        self._raw_body = b""
+        # Lazily computed values, ``_UNSET`` until first access
+        self._body = _UNSET
+        self._cookies = _UNSET
+        self._auth = _UNSET
+        self._query = _UNSET
+        self._json = _UNSET
+        #: Metrics: request bytes, ``time.perf_counter()`` when its parsing
+        #: started, parse and handler seconds, handler thread CPU seconds
+        self.size = 0
+        self.received = None
+        self.parse_time = None
+        self.handler_time = None
+        self.handler_cpu = 0.0
+        #: :class:`WebSocket <WebSocket>` once the request is upgraded
+        self.websocket = None
 
-    def extract_request_line(self, request):
-        try:
-            lines = request.splitlines()
-            first_line = lines[0]
-            method, path, version = first_line.split()
-
-            # if path == '/':
-            #     path = '/index.html'
-        except Exception:
-            return None, None
-
-        return method, path, version
-             
-    def prepare_headers(self, request) -> dict:
-        """Prepares the given HTTP headers."""
-        lines = request.split('\r\n')
-        headers = {}
-        for line in lines[1:]:
-            if ': ' in line:
-                key, val = line.split(': ', 1)
-                headers[key.lower()] = val
-        return headers
+    @property
+    def body(self):
+        """Request body as ``str`` (``None`` for GET or an undecodable body)."""
+        if self._body is _UNSET:
+            self._body = self.prepare_body(self._raw_body)
+        return self._body
+
+    @body.setter
+    def body(self, value):
+        self._body = value
+        self._json = _UNSET
+
+    @property
+    def cookies(self):
+        """Cookies of the ``Cookie`` header, parsed on first access."""
+        if self._cookies is _UNSET:
+            self._cookies = self.prepare_cookies((self.headers or {}).get("cookie", ""))
+        return self._cookies
+
+    @cookies.setter
+    def cookies(self, value):
+        self._cookies = value
+
+    @property
+    def auth(self):
+        """``{"type", "value"}`` of the ``Authorization`` header, or ``None``."""
+        if self._auth is _UNSET:
+            self._auth = self.prepare_auth((self.headers or {}).get("authorization", ""))
+        return self._auth
+
+    @auth.setter
+    def auth(self, value):
+        self._auth = value
+
+    @property
+    def query(self):
+        """Query string parameters, the last value of a repeated name wins."""
+        if self._query is _UNSET:
+            self._query = dict(parse_qsl(self.query_string, keep_blank_values=True))
+        return self._query
+
+    @property
+    def json(self):
+        """
+        Request body decoded as JSON, ``None`` when the body is empty.
+
+        :raise ValueError: when the body is not valid JSON.
+        """
+        if self._json is _UNSET:
+            body = self.body
+            self._json = json.loads(body) if body and body.strip() else None
+        return self._json
 
     def prepare(self, request, routes:dict=None):
-        """Prepares the entire request with the given parameters."""
-
-        # Prepare the request line from the request header
-        print("[Request] preparing request...\n{}".format(request))
-
-        # extract request line
-        self.method, self.path, self.version = self.extract_request_line(request)
-        print("[Request] {} path {} version {}".format(self.method, self.path, self.version))
-        #
-        # @bksysnet Preapring the webapp hook with WeApRous instance
-        # The default behaviour with HTTP server is empty routed
-        #
-        # TODO manage the webapp hook in this mounting point
-        #
-        
-        
-        # prepare headers
-        self.headers = self.prepare_headers(request)
-        print("[Request] prepared headers: {}".format(self.headers))
+        """Prepares the entire request from a complete raw request.
 
-        # prepare cookies
-        cookies_str = self.headers.get('cookie', '')
-        self.cookies = self.prepare_cookies(cookies_str=cookies_str)
-        
-        # prepare body
-        if self.method not in ['GET']:
-            self.prepare_body(request)
+        :param request (str | bytes): request line, headers and body.
+        :param routes (dict): route handlers used to find the hook.
+        """
+        if isinstance(request, str):
+            request = request.encode("utf-8")
 
-        # prepare auth
-        auth_str = self.headers.get('authorization', '')
-        self.auth = self.prepare_auth(auth_str)
-        
-        # find hook from routes dict
-        if routes:
-            self.routes = routes
-            route_key = (self.method, self.path)
-            self.hook = routes.get(route_key)
-            
-            if self.hook:
-                print("[Request] Found hook for {} {}".format(self.method, self.path))
-            else:
-                print("[Request] No route handler for {} {}".format(self.method, self.path))
+        head_end = request.find(b"\r\n\r\n")
+        if head_end < 0:
+            head, rest = request.rstrip(b"\r\n"), b""
         else:
-            self.hook = None
-            print("[Request] No routes available")
+            head, rest = request[:head_end], request[head_end + 4:]
+
+        method, path, version, headers = parse_request_head(head)
+        body = rest[:parse_content_length(headers)]
+        self.prepare_parsed(method, path, version, headers, body, routes)
+
+    def prepare_parsed(self, method, path, version, headers, body, routes:dict=None):
+        """Prepares the request from the parts produced by the HTTP parser.
+
+        Cookies, auth and the body are only stored here; they are parsed by
+        the :attr:`cookies`, :attr:`auth`, :attr:`body` and :attr:`json`
+        properties when a handler first reads them.
+
+        :param method (str): HTTP verb.
+        :param path (str): request target.
+        :param version (str): protocol version, e.g. ``HTTP/1.1``.
+        :param headers (dict): lower-cased header names to values.
+        :param body (bytes): exactly ``Content-Length`` body bytes.
+        :param routes (dict): route handlers used to find the hook.
+        """
+        self.method, self.url, self.version = method, path, version
+        self.headers = headers
+        self._raw_body = body
+
+        # find hook from the compiled router
+        self.path, _, self.query_string = path.partition("?")
+        if routes:
+            self.routes = routes if isinstance(routes, Router) else as_router(routes)
+            route = None
+            if method == "GET" and is_upgrade_request(headers):
+                route, self.params, self.allow = self.routes.match(WEBSOCKET, self.path)
+            if route is None:
+                route, self.params, self.allow = self.routes.match(self.method, self.path)
+            self.route = route
+            self.hook = route.handler if route else None
         return
 
-    def prepare_body(self, request : str):
-        content_length = self.prepare_content_length()
-        
+    def call_hook(self):
+        """
+        Call the route handler with the arguments its signature asks for.
+
+        When metrics are enabled its wall and thread CPU time are recorded
+        in :attr:`handler_time` and :attr:`handler_cpu`.
+
+        :rtype: the handler result.
+        """
+        if not METRICS.enabled:
+            if self.route is not None:
+                return self.route.invoke(self, self.params)
+            return self.hook(request=self)
+        started, cpu = time.perf_counter(), time.thread_time()
+        try:
+            if self.route is not None:
+                return self.route.invoke(self, self.params)
+            return self.hook(request=self)
+        finally:
+            self.handler_time = time.perf_counter() - started
+            self.handler_cpu = time.thread_time() - cpu
+
+    def prepare_body(self, body : bytes):
+        """Decode the framed request body (handlers receive ``str``)."""
+        if self.method == "GET":
+            return None
         try:
-            parts = request.split('\r\n\r\n', 1)
-            if len(parts) > 1:
-                body_full = parts[1]
-                self.body = body_full[:content_length]
-                print("[Request] prepared body: {}".format(self.body))
-            else:
-                self.body = None
+            return bytes(body).decode("utf-8")
         except Exception as e:
-            print("[Request] Error preparing body: {}".format(e))
-            self.body = None
-        return
+            log.warning("Error preparing body: %s", e)
+            return None
+
+    @property
+    def is_websocket(self):
+        """Whether the request is routed to a WebSocket handler."""
+        return self.route is not None and self.route.method == WEBSOCKET
 
+    def wants_keep_alive(self):
+        """
+        Whether the client asked to keep the connection open after this request.
+
+        HTTP/1.1 connections are persistent unless ``Connection: close`` is sent,
+        HTTP/1.0 connections only with an explicit ``Connection: keep-alive``.
+
+        :rtype bool: True to keep the connection open.
+        """
+        tokens = (self.headers or {}).get("connection", "").lower()
+        if self.version == "HTTP/1.1":
+            return "close" not in tokens
+        return "keep-alive" in tokens
 
     def prepare_content_length(self):
         return int(self.headers.get("content-length", "0"))
@@ -163,25 +367,14 @@ class Request():
         """Prepare authentication from the Authorization header."""
         if not auth_str:
             return None
-        try:
-            parts = auth_str.split(' ', 1)
-
-            if len(parts) == 2:
-                auth_type, auth_value = parts
-                auth = {
-                    'type': auth_type.lower(),    # 'bearer', 'basic', etc.
-                    'value': auth_value           # token hoặc credentials
-                }
-                print("[Request] auth: type={}, value={}".format(
-                    auth['type'], 
-                    auth['value'][:20] + '...' if len(auth['value']) > 20 else auth['value']
-                ))
-                return auth
-            else:
-                return None
-        except Exception as e:
-            print("[Request] Error parsing auth: {}".format(e))
+        parts = auth_str.split(' ', 1)
+        if len(parts) != 2:
             return None
+        auth_type, auth_value = parts
+        return {
+            'type': auth_type.lower(),    # 'bearer', 'basic', etc.
+            'value': auth_value           # token hoặc credentials
+        }
 
     def prepare_cookies(self, cookies_str: str) -> dict:
         """Parse cookies string and prepare cookies dictionary."""
@@ -193,11 +386,10 @@ class Request():
                     continue
                 
                 if "=" not in pair:  # Skip invalid format
-                    print("[Request] Warning: Invalid cookie format: {}".format(pair))
                     continue
                 
                 # Split ONLY on first "=" (maxsplit=1)
                 key, value = pair.split("=", 1)  # ← maxsplit=1!
                 cookies[key.strip()] = value.strip()
         
-        return cookies
\ No newline at end of file
+        return cookies
@@ -19,16 +19,528 @@ response settings (cookies, auth, proxies), and to construct HTTP responses
 based on incoming requests. 
 
 The current version supports MIME type detection, content loading and header formatting
+
+Static files are served from :data:`STATIC_CACHE`, an LRU
+:class:`StaticFileCache <StaticFileCache>` of prebuilt header and body bytes
+for small hot files. Files too large for the cache are not loaded in memory:
+:meth:`Response.build_file_response` returns a
+:class:`FileResponse <FileResponse>` holding the encoded header and the file
+location, and the engine streams the body with ``sendfile(2)``.
+
+Static responses carry a strong ``ETag`` and ``Last-Modified``; conditional
+requests (``If-None-Match`` / ``If-Modified-Since``) of an unchanged file are
+answered with a body-less ``304 Not Modified``.
+
+Text-like static files and large JSON bodies are compressed with the coding
+negotiated from ``Accept-Encoding``, see :mod:`daemon.compression`. Static
+files are compressed once per version and cached, or read from a fresh
+``<file>.gz`` next to them.
+
+Static files honor ``Range`` / ``If-Range`` with ``206 Partial Content``:
+a single range is sent as a ``sendfile`` segment (or a slice of the cached
+body), several ranges as ``multipart/byteranges`` sliced from a memory-mapped
+file, and unsatisfiable ranges get ``416``.
+
+Handlers returning an iterator or a :class:`JSONStream <JSONStream>` get a
+:class:`StreamResponse <StreamResponse>` sent with chunked transfer coding,
+see :mod:`daemon.streaming`.
 """
+import asyncio
 import datetime
+import inspect
+import io
 import os
 import mimetypes
 import json
+import logging
+import mmap
+import socket
+import stat
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_tz, mktime_tz
 from .dictionary import CaseInsensitiveDict
 from .request import Request
+from .compression import (choose_encoding, compress, compressor, encode_json,
+                          is_compressible, COMPRESS_MIN_SIZE, ENCODINGS)
+from .streaming import is_stream, is_async_stream, iter_chunked, aiter_chunked, iter_sync
+from .writer import (BufferResponse, status_line, head_end, header_line,
+                     content_length, cookie_lines, connection_header, CONNECTION_CLOSE,
+                     CONTENT_TYPE_JSON, CONTENT_ENCODING, TRANSFER_CHUNKED,
+                     VARY_ACCEPT_ENCODING)
 
 BASE_DIR = ""
 
+#: Directory of the HTML pages, ``/chat`` -> ``www/chat.html``.
+WWW_DIR = "www"
+#: Directory of the other static assets (css, images, scripts).
+STATIC_DIR = "static"
+#: Chunk size of the buffered fallback when ``sendfile`` is not available.
+SEND_CHUNK_SIZE = 65536
+#: More ranges than this in one request are ignored (full 200 response).
+MAX_RANGES = 16
+#: Send flag telling the kernel more data follows (Linux), merges the header
+#: and the first ``sendfile`` segment in one TCP packet.
+MSG_MORE = getattr(socket, "MSG_MORE", 0)
+
+log = logging.getLogger(__name__)
+
+
+class FileResponse:
+    """
+    A static file response: encoded header bytes followed by a file segment.
+
+    The body is never read in memory by :meth:`send`; it is streamed by the
+    kernel with :meth:`socket.socket.sendfile`, or in ``SEND_CHUNK_SIZE``
+    chunks through one reusable buffer where ``sendfile`` is not possible.
+
+    :attrs header (bytes): status line and headers, blank line included.
+    :attrs filepath (str): path of the file on disk.
+    :attrs offset (int): first byte of the body in the file.
+    :attrs length (int): number of body bytes.
+    """
+
+    __slots__ = ("header", "filepath", "offset", "length")
+
+    def __init__(self, header, filepath, offset=0, length=0):
+        self.header = header
+        self.filepath = filepath
+        self.offset = offset
+        self.length = length
+
+    def __len__(self):
+        return len(self.header) + self.length
+
+    def __bytes__(self):
+        """Whole response in memory, for callers that can only send bytes."""
+        with open(self.filepath, "rb") as f:
+            f.seek(self.offset)
+            return self.header + f.read(self.length)
+
+    def send(self, sock):
+        """
+        Write the response to a blocking (or timeout) socket.
+
+        :param sock (socket.socket): connected client socket.
+        """
+        if not self.length:
+            sock.sendall(self.header)
+            return
+        sock.sendall(self.header, MSG_MORE)
+        with open(self.filepath, "rb") as f:
+            try:
+                sock.sendfile(f, self.offset, self.length)
+            except (AttributeError, ValueError, NotImplementedError,
+                    io.UnsupportedOperation):
+                # Not a plain TCP socket (or no sendfile): buffered copy
+                self.send_buffered(sock, f)
+
+    def send_buffered(self, sock, f):
+        """Copy the body through one ``SEND_CHUNK_SIZE`` buffer."""
+        f.seek(self.offset)
+        buf = bytearray(min(SEND_CHUNK_SIZE, self.length))
+        view = memoryview(buf)
+        remaining = self.length
+        while remaining:
+            n = f.readinto(view[:min(len(buf), remaining)])
+            if not n:
+                raise EOFError("{} shrank while being sent".format(self.filepath))
+            sock.sendall(view[:n])
+            remaining -= n
+
+
+class StreamResponse:
+    """
+    A streamed response: encoded header bytes followed by body chunks
+    framed with ``Transfer-Encoding: chunked`` as they are produced.
+
+    :attrs header (bytes): status line and headers, blank line included.
+    :attrs chunks (iterator | async iterator): encoded chunks, see
+                  :func:`iter_chunked` and :func:`aiter_chunked`.
+    :attrs live (bool): the body is a live stream (:class:`EventStream`),
+                        open for as long as the client listens.
+    """
+
+    __slots__ = ("header", "chunks", "live")
+
+    def __init__(self, header, chunks, live=False):
+        self.header = header
+        self.chunks = chunks
+        self.live = live
+
+    @property
+    def is_async(self):
+        """Whether the chunks must be awaited, see :func:`aiter_chunked`."""
+        return hasattr(self.chunks, "__anext__")
+
+    def iter_chunks(self):
+        """The chunks from synchronous code, the thread waits for async ones."""
+        return iter_sync(self.chunks) if self.is_async else self.chunks
+
+    def __bytes__(self):
+        """Whole response in memory, for callers that can only send bytes."""
+        return self.header + b"".join(self.iter_chunks())
+
+    def send(self, sock):
+        """
+        Write the header, then every chunk as soon as it is produced.
+
+        :param sock (socket.socket): connected client socket.
+        """
+        sock.sendall(self.header)
+        chunks = self.iter_chunks()
+        try:
+            for chunk in chunks:
+                sock.sendall(chunk)
+        finally:
+            if self.is_async:
+                # Stop the async producer now, not when collected
+                chunks.close()
+
+
+def send_response(sock, response):
+    """
+    Write a built response, ``bytes``, :class:`BufferResponse`,
+    :class:`FileResponse` or :class:`StreamResponse`, to ``sock``.
+
+    :param sock (socket.socket): connected client socket.
+    :param response (bytes | BufferResponse | FileResponse | StreamResponse):
+                    the response to send.
+    """
+    if isinstance(response, (BufferResponse, FileResponse, StreamResponse)):
+        response.send(sock)
+    else:
+        sock.sendall(response)
+
+
+def make_etag(st):
+    """
+    Strong entity tag of a file version, derived from its mtime and size.
+
+    :param st (os.stat_result): file status.
+
+    :rtype str: quoted entity tag.
+    """
+    return '"{:x}-{:x}"'.format(st.st_mtime_ns, st.st_size)
+
+
+def is_not_modified(request, etag, mtime):
+    """
+    Evaluate the conditional headers of a GET/HEAD request (RFC 9110 13.2.2).
+
+    ``If-None-Match`` takes precedence; ``If-Modified-Since`` is only used
+    when it is absent.
+
+    :param request (Request): incoming request.
+    :param etag (str): current entity tag of the file.
+    :param mtime (int): current modification time, in whole seconds.
+
+    :rtype bool: True if a ``304 Not Modified`` must be sent.
+    """
+    headers = getattr(request, "headers", None) or {}
+    if getattr(request, "method", "GET") not in ("GET", "HEAD"):
+        return False
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # Weak comparison: W/"x" matches "x"
+        tags = (tag.strip() for tag in if_none_match.split(","))
+        return any((tag[2:] if tag.startswith("W/") else tag) == etag for tag in tags)
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since:
+        parsed = parsedate_tz(if_modified_since)
+        if parsed is not None:
+            return mtime <= mktime_tz(parsed)
+    return False
+
+
+def parse_byte_ranges(value, size):
+    """
+    Parse a ``Range: bytes=...`` header against a representation size.
+
+    :param value (str): ``Range`` header value.
+    :param size (int): length of the selected representation.
+
+    :rtype list: ``(first, last)`` inclusive byte positions, empty when no
+                 range is satisfiable, or ``None`` when the header must be
+                 ignored (other unit, invalid syntax).
+    """
+    unit, _, spec = value.partition("=")
+    if unit.strip().lower() != "bytes" or not spec.strip():
+        return None
+    ranges = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, sep, last = part.partition("-")
+        first, last = first.strip(), last.strip()
+        if not sep:
+            return None
+        if not first:
+            # Suffix range: the last N bytes
+            if not last.isdigit():
+                return None
+            if int(last) and size:
+                ranges.append((max(0, size - int(last)), size - 1))
+            continue
+        if not first.isdigit() or (last and not last.isdigit()):
+            return None
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        if start < size:
+            ranges.append((start, min(int(last), size - 1) if last else size - 1))
+    return ranges
+
+
+def if_range_matches(request, etag, last_modified):
+    """
+    Whether the ``If-Range`` precondition lets a ``Range`` apply.
+
+    :param request (Request): incoming request.
+    :param etag (str): strong entity tag of the representation.
+    :param last_modified (str): its ``Last-Modified`` value.
+
+    :rtype bool: True when ``If-Range`` is absent or still matches.
+    """
+    value = (request.headers or {}).get("if-range")
+    if value is None:
+        return True
+    value = value.strip()
+    if value.startswith(('"', "W/")):
+        # Strong comparison only, weak tags never match
+        return value == etag
+    return value == last_modified
+
+
+class _Representation:
+    """One coding of a static file version: prebuilt 200 and 304 heads plus body."""
+
+    __slots__ = ("header", "body", "etag", "not_modified", "mime_type", "last_modified",
+                 "validators")
+
+    def __init__(self, mime_type, body, length, etag, last_modified, encoding=None,
+                 vary=False):
+        if encoding is not None:
+            # Each coding is a distinct representation with its own strong tag
+            etag = etag[:-1] + "-" + encoding + '"'
+        validators = "Accept-Ranges: bytes\r\n{}ETag: {}\r\nLast-Modified: {}\r\n".format(
+            "Vary: Accept-Encoding\r\n" if vary else "", etag, last_modified)
+
+        headers = "Content-Type: {}\r\n".format(mime_type)
+        if encoding is not None:
+            headers += "Content-Encoding: {}\r\n".format(encoding)
+        headers += "Content-Length: {}\r\n".format(length)
+
+        #: Status line and entity headers, without connection headers.
+        self.header = ("HTTP/1.1 200 OK\r\n" + headers + validators).encode("utf-8")
+        self.body = body
+        self.etag = etag
+        #: Status line and validators of the ``304`` answer.
+        self.not_modified = ("HTTP/1.1 304 Not Modified\r\n" + validators).encode("utf-8")
+        self.mime_type = mime_type
+        self.last_modified = last_modified
+        #: ``Accept-Ranges``, ``Vary`` and validator header lines.
+        self.validators = validators
+
+
+class _CachedFile:
+    """Representations of one cached static file version, by coding."""
+
+    __slots__ = ("filepath", "mtime_ns", "size", "checked", "mtime", "variants", "cost")
+
+    def __init__(self, filepath, st, checked, variants):
+        self.filepath = filepath
+        self.mtime_ns = st.st_mtime_ns
+        self.size = st.st_size
+        #: ``time.monotonic()`` of the last ``stat`` confirming this version.
+        self.checked = checked
+        self.mtime = int(st.st_mtime)
+        #: coding (``None`` for identity) -> _Representation
+        self.variants = variants
+        self.cost = sum(len(r.header) + len(r.body) for r in variants.values())
+
+    def select(self, request):
+        """Representation matching the ``Accept-Encoding`` of ``request``."""
+        if len(self.variants) == 1:
+            return self.variants[None]
+        encoding = choose_encoding((request.headers or {}).get("accept-encoding"))
+        return self.variants.get(encoding) or self.variants[None]
+
+
+def _read_gzip_sidecar(filepath, st):
+    """Content of ``<filepath>.gz`` if it is at least as recent as the file."""
+    try:
+        gz_st = os.stat(filepath + ".gz")
+        if not stat.S_ISREG(gz_st.st_mode) or gz_st.st_mtime_ns < st.st_mtime_ns:
+            return None
+        with open(filepath + ".gz", "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+class StaticFileCache:
+    """
+    LRU cache of static file responses bounded by a byte budget.
+
+    Entries are keyed by request path. A hit within ``revalidate_interval``
+    seconds of the last check is served from memory without any filesystem
+    call; after that the file is ``stat``-ed once and the entry is kept if
+    its mtime and size are unchanged, so edits show up without a restart.
+
+    :attrs max_bytes (int): budget of the cached header and body bytes.
+    :attrs max_entry_size (int): larger files are streamed, never cached.
+    :attrs revalidate_interval (float): seconds a checked entry is trusted.
+    """
+
+    __attrs__ = [
+        "max_bytes",
+        "max_entry_size",
+        "revalidate_interval",
+    ]
+
+    def __init__(self, max_bytes=16 * 1024 * 1024, max_entry_size=256 * 1024,
+                 revalidate_interval=1.0):
+        """
+        Initialize a new StaticFileCache instance.
+
+        :param max_bytes (int): budget of the cached bytes.
+        :param max_entry_size (int): size limit of one cached file.
+        :param revalidate_interval (float): seconds between two ``stat`` of an entry.
+        """
+        self.max_bytes = max_bytes
+        self.max_entry_size = max_entry_size
+        self.revalidate_interval = revalidate_interval
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+
+        #: Counters exposed through :meth:`stats`.
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get(self, key):
+        """
+        Cached entry of ``key`` if it is still the current file version.
+
+        :param key (str): request path.
+
+        :rtype _CachedFile: the entry, or ``None`` on a miss.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            if now - entry.checked < self.revalidate_interval:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry
+
+        try:
+            st = os.stat(entry.filepath)
+            current = st.st_mtime_ns == entry.mtime_ns and st.st_size == entry.size
+        except OSError:
+            current = False
+
+        with self._lock:
+            if current:
+                entry.checked = now
+                self._hits += 1
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                return entry
+            if self._entries.get(key) is entry:
+                self._remove_locked(key)
+            self._invalidations += 1
+            self._misses += 1
+        return None
+
+    def put(self, key, entry):
+        """
+        Store ``entry`` under ``key``, evicting least recently used entries.
+
+        :param key (str): request path.
+        :param entry (_CachedFile): response parts of the file.
+        """
+        cost = entry.cost
+        if cost > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove_locked(key)
+            while self._entries and self._bytes + cost > self.max_bytes:
+                self._remove_locked(next(iter(self._entries)))
+                self._evictions += 1
+            self._entries[key] = entry
+            self._bytes += cost
+
+    def _remove_locked(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.cost
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """
+        Snapshot of the cache size and counters.
+
+        :rtype dict: cache statistics.
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
+
+
+#: Process wide cache of the static files served by :class:`Response`.
+STATIC_CACHE = StaticFileCache()
+
+
+def resolve_static_path(path):
+    """
+    Map a request path to a file under ``www/`` or ``static/``.
+
+    ``/`` is ``index.html``, extension-less paths are HTML pages
+    (``/chat`` -> ``www/chat.html``); other files are looked up under
+    ``static/`` with or without a leading ``/static`` segment.
+
+    :param path (str): request path, query string included or not.
+
+    :rtype str: file path, or ``None`` if it escapes the document roots.
+    """
+    path = path.split("?", 1)[0]
+    if path in ("", "/"):
+        path = "/index.html"
+    if "." not in os.path.basename(path):
+        path = path + ".html"
+
+    rel = os.path.normpath(path.lstrip("/"))
+    if rel.startswith("..") or os.path.isabs(rel):
+        return None
+    if rel.endswith(".html"):
+        return os.path.join(BASE_DIR + WWW_DIR, rel)
+    if rel.startswith(STATIC_DIR + os.sep):
+        rel = rel[len(STATIC_DIR) + 1:]
+    return os.path.join(BASE_DIR + STATIC_DIR, rel)
+
 class Response():   
     """The :class:`Response <Response>` object, which contains a
     server's response to an HTTP request.
@@ -77,6 +589,24 @@ class Response():
         "reason",
     ]
 
+    __slots__ = (
+        "_content",
+        "_content_consumed",
+        "_next",
+        "status_code",
+        "headers",
+        "url",
+        "encoding",
+        "history",
+        "reason",
+        "cookies",
+        "elapsed",
+        "request",
+        "raw",
+        "connection",
+        "connection_headers",
+    )
+
 
     def __init__(self, request=None):
         """
@@ -84,7 +614,15 @@ class Response():
 
         : params request : The originating request object.
         """
+        self.reset(request)
+
+    def reset(self, request=None):
+        """
+        Clear the response so one object can build every response of a
+        connection (or of a worker) instead of allocating one per request.
 
+        : params request : The originating request object.
+        """
         self._content = False
         self._content_consumed = False
         self._next = None
@@ -104,21 +642,42 @@ class Response():
         self.encoding = None
 
         #: A list of :class:`Response <Response>` objects from
-        #: the history of the Request.
-        self.history = []
+        #: the history of the Request, created on demand.
+        self.history = None
 
         #: Textual reason of responded HTTP Status, e.g. "Not Found" or "OK".
         self.reason = None
 
-        #: A of Cookies the response headers.
-        self.cookies = CaseInsensitiveDict()
+        #: A of Cookies the response headers, created on demand.
+        self.cookies = None
 
         #: The amount of time elapsed between sending the request
-        self.elapsed = datetime.timedelta(0)
+        self.elapsed = None
 
         #: The :class:`PreparedRequest <PreparedRequest>` object to which this
         #: is a response.
-        self.request = None
+        self.request = request
+
+        self.raw = None
+        self.connection = None
+
+        #: Encoded ``Connection`` / ``Keep-Alive`` lines, see :meth:`set_connection`.
+        self.connection_headers = CONNECTION_CLOSE
+
+
+    def set_connection(self, keep_alive, timeout=None, max_requests=None):
+        """
+        Select the ``Connection`` headers added to every built response.
+
+        :params keep_alive (bool): keep the connection open after the response.
+        :params timeout (int): idle seconds the server waits for the next request.
+        :params max_requests (int): requests still allowed on this connection.
+        """
+        self.connection_headers = connection_header(keep_alive, timeout, max_requests)
+
+    def head_end(self):
+        """``Date`` and connection lines plus the blank line ending a head."""
+        return head_end(self.connection_headers)
 
 
     def get_mime_type(self, path):
@@ -153,7 +712,7 @@ class Response():
 
         # Processing mime_type based on main_type and sub_type
         main_type, sub_type = mime_type.split('/', 1)
-        print("[Response] processing MIME main_type={} sub_type={}".format(main_type,sub_type))
+        log.debug("processing MIME main_type=%s sub_type=%s", main_type, sub_type)
         if main_type == 'text':
             self.headers['Content-Type']='text/{}'.format(sub_type)
             if sub_type == 'plain' or sub_type == 'css':
@@ -198,7 +757,7 @@ class Response():
 
         filepath = os.path.join(base_dir, path.lstrip('/'))
 
-        print("[Response] serving the object at location {}".format(filepath))
+        log.debug("serving the object at location %s", filepath)
             #
             #  TODO: implement the step of fetch the object file
             #        store in the return value of content
@@ -207,97 +766,222 @@ class Response():
     
     def build_file_response(self, request: "Request"):
         """
-        Serve static HTML file from ./www directory.
+        Serve a static file from ./www (HTML pages) or ./static (assets).
 
         Quy ước:
-        - "/"               -> "/index.html"
-        - "/login"          -> "/login.html"
-        - "/chat"           -> "/chat.html"
-        - "/abc.html"       -> "/abc.html"
-        """
-        path = getattr(request, "path", "/") or "/"
+        - "/"               -> "www/index.html"
+        - "/login"          -> "www/login.html"
+        - "/chat"           -> "www/chat.html"
+        - "/css/styles.css" -> "static/css/styles.css"
+        - "/static/images/welcome.png" -> "static/images/welcome.png"
 
-        # Bỏ query string nếu có: /login?x=1 -> /login
-        if "?" in path:
-            path = path.split("?", 1)[0]
+        Small files are answered from :data:`STATIC_CACHE`; larger ones are
+        streamed by the engine. Compressible files are sent in the coding
+        negotiated from ``Accept-Encoding``.
 
-        # Mặc định root
-        if path == "/" or path == "":
-            path = "/index.html"
+        :rtype bytes | FileResponse: the cached response, or header plus file segment.
+        """
+        path = getattr(request, "path", "/") or "/"
 
-        # Nếu đoạn cuối không có dấu chấm -> tự thêm ".html"
-        # VD: /login -> /login.html
-        import os
-        if "." not in os.path.basename(path):
-            path = path + ".html"
+        entry = STATIC_CACHE.get(path)
+        if entry is None:
+            entry = self.load_static_file(request, path)
+            if not isinstance(entry, _CachedFile):
+                return entry
+        variant = entry.select(request)
+        if is_not_modified(request, variant.etag, entry.mtime):
+            return variant.not_modified + self.head_end()
+        if "range" in request.headers:
+            # Ranges always address the identity representation
+            identity = entry.variants[None]
+            partial = self.build_range_response(request, identity, entry.size, identity.body)
+            if partial is not None:
+                return partial
+        # Cached body sent as is after its head, never copied
+        return BufferResponse((variant.header, self.head_end(), variant.body))
+
+    def load_static_file(self, request, path):
+        """
+        Resolve and load the static file of ``path`` (cache miss).
 
-        base_dir = "www"
-        filepath = os.path.join(base_dir, path.lstrip("/"))
+        :param request (Request): incoming request, for conditional headers.
+        :param path (str): request path.
 
-        if not os.path.exists(filepath):
-            print(f"[Response] File not found: {filepath}")
+        :rtype _CachedFile | FileResponse | bytes: the new cache entry, a
+               streamed (or ``304``) response for large files, or a 404 response.
+        """
+        filepath = resolve_static_path(path)
+        try:
+            st = os.stat(filepath) if filepath else None
+        except OSError:
+            st = None
+        if st is None or not stat.S_ISREG(st.st_mode):
+            log.debug("File not found: %s", filepath)
             return self.build_error_response(404, f"File not found: {path}")
-
-        with open(filepath, "rb") as f:
-            content = f.read()
+        size = st.st_size
 
         mime_type = self.get_mime_type(filepath)  # sẽ là text/html cho .html
+        compressible = size >= COMPRESS_MIN_SIZE and is_compressible(mime_type)
+        etag = make_etag(st)
+        last_modified = formatdate(st.st_mtime, usegmt=True)
+
+        if size > STATIC_CACHE.max_entry_size:
+            return self.stream_static_file(request, filepath, st, mime_type, etag,
+                                           last_modified, compressible)
 
-        status_line = "HTTP/1.1 200 OK\r\n"
-        headers = ""
-        headers += f"Content-Type: {mime_type}\r\n"
-        headers += f"Content-Length: {len(content)}\r\n"
-        headers += "\r\n"
+        with open(filepath, "rb") as f:
+            body = f.read()
+
+        variants = {}
+        if compressible:
+            gzipped = _read_gzip_sidecar(filepath, st)
+            for encoding in ENCODINGS:
+                data = gzipped if encoding == "gzip" and gzipped else compress(body, encoding)
+                if len(data) < len(body):
+                    variants[encoding] = _Representation(
+                        mime_type, data, len(data), etag, last_modified, encoding, vary=True)
+        variants[None] = _Representation(
+            mime_type, body, len(body), etag, last_modified, vary=bool(variants))
+
+        entry = _CachedFile(filepath, st, time.monotonic(), variants)
+        if len(body) == size:
+            # A file rewritten between stat and read is served but not cached
+            log.debug("Caching static file: %s (%s bytes, codings %s)",
+                      filepath, size, sorted(e for e in variants if e))
+            STATIC_CACHE.put(path, entry)
+        return entry
+
+    def stream_static_file(self, request, filepath, st, mime_type, etag, last_modified,
+                           compressible):
+        """
+        Response of a file too large for the cache, streamed from disk.
 
-        print(f"[Response] Serving static file: {filepath} ({len(content)} bytes)")
-        return status_line.encode("utf-8") + headers.encode("utf-8") + content
+        Only a precompressed ``<file>.gz`` is used for compressible files,
+        large files are never compressed per request.
 
+        :rtype FileResponse | bytes: the streamed file, or a ``304`` response.
+        """
+        sendpath, length, encoding = filepath, st.st_size, None
+        if compressible and choose_encoding(
+                (request.headers or {}).get("accept-encoding")) == "gzip":
+            try:
+                gz_st = os.stat(filepath + ".gz")
+                if stat.S_ISREG(gz_st.st_mode) and gz_st.st_mtime_ns >= st.st_mtime_ns:
+                    sendpath, length, encoding = filepath + ".gz", gz_st.st_size, "gzip"
+            except OSError:
+                pass
+
+        variant = _Representation(mime_type, b"", length, etag, last_modified, encoding,
+                                  vary=compressible)
+        connection = self.head_end()
+        if is_not_modified(request, variant.etag, int(st.st_mtime)):
+            return variant.not_modified + connection
+        if "range" in request.headers:
+            identity = variant if encoding is None else _Representation(
+                mime_type, b"", st.st_size, etag, last_modified, vary=compressible)
+            partial = self.build_range_response(request, identity, st.st_size, filepath)
+            if partial is not None:
+                return partial
+        log.debug("Streaming static file: %s (%s bytes)", sendpath, length)
+        return FileResponse(variant.header + connection, sendpath, 0, length)
+
+
+    def build_range_response(self, request, variant, size, source):
+        """
+        ``206`` / ``416`` answer of a ``Range`` request on a static file.
 
+        :param request (Request): GET request carrying a ``Range`` header.
+        :param variant (_Representation): identity representation of the file.
+        :param size (int): file size.
+        :param source (bytes | str): cached body, or path of a file too large
+                                     for the cache.
 
+        :rtype bytes | FileResponse: the partial response, or ``None`` to
+               answer with the full representation.
+        """
+        if request.method != "GET" or not if_range_matches(
+                request, variant.etag, variant.last_modified):
+            return None
+        ranges = parse_byte_ranges(request.headers["range"], size)
+        if ranges is None or len(ranges) > MAX_RANGES:
+            return None
+
+        connection = self.head_end()
+        if not ranges:
+            return b"".join([status_line(416), header_line("Content-Range", "bytes */{}".format(size)),
+                             content_length(0), connection])
+
+        if len(ranges) == 1:
+            first, last = ranges[0]
+            length = last - first + 1
+            header = b"".join([
+                status_line(206),
+                header_line("Content-Type", variant.mime_type),
+                header_line("Content-Range", "bytes {}-{}/{}".format(first, last, size)),
+                content_length(length),
+                variant.validators.encode("utf-8"),
+                connection,
+            ])
+            log.debug("Range %s-%s/%s of %s", first, last, size,
+                      source if isinstance(source, str) else "cache")
+            if isinstance(source, str):
+                return FileResponse(header, source, first, length)
+            return BufferResponse((header, memoryview(source)[first:last + 1]))
+
+        boundary = os.urandom(12).hex()
+        parts = []
+        if isinstance(source, str):
+            with open(source, "rb") as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for first, last in ranges:
+                    parts.append(self._byterange_part(
+                        boundary, variant.mime_type, first, last, size, mapped))
+        else:
+            for first, last in ranges:
+                parts.append(self._byterange_part(
+                    boundary, variant.mime_type, first, last, size, source))
+        parts.append("--{}--\r\n".format(boundary).encode("utf-8"))
+
+        header = b"".join([
+            status_line(206),
+            header_line("Content-Type", "multipart/byteranges; boundary={}".format(boundary)),
+            content_length(sum(len(part) for part in parts)),
+            variant.validators.encode("utf-8"),
+            connection,
+        ])
+        log.debug("%s ranges of %s bytes", len(ranges), size)
+        return BufferResponse([header] + parts)
+
+    def _byterange_part(self, boundary, mime_type, first, last, size, data):
+        """One ``multipart/byteranges`` body part sliced from ``data``."""
+        head = "--{}\r\nContent-Type: {}\r\nContent-Range: bytes {}-{}/{}\r\n\r\n".format(
+            boundary, mime_type, first, last, size).encode("utf-8")
+        return b"".join((head, data[first:last + 1], b"\r\n"))
 
     def build_response_header(self, request):
         """
         Constructs the HTTP response headers based on the class:`Request <Request>
         and internal attributes.
 
+        The head is assembled from :attr:`status_code` (200 by default) and
+        :attr:`headers`, where a list value repeats the header (e.g. several
+        ``Set-Cookie``), plus ``Content-Length`` of :attr:`_content`, ``Date``
+        and the connection headers.
+
         :params request (class:`Request <Request>`): incoming request object.
 
         :rtypes bytes: encoded HTTP response header.
         """
-        reqhdr = request.headers
-        rsphdr = self.headers
-
-        #Build dynamic headers
-        headers = {
-                "Accept": "{}".format(reqhdr.get("Accept", "application/json")),
-                "Accept-Language": "{}".format(reqhdr.get("Accept-Language", "en-US,en;q=0.9")),
-                "Authorization": "{}".format(reqhdr.get("Authorization", "Basic <credentials>")),
-                "Cache-Control": "no-cache",
-                "Content-Type": "{}".format(self.headers['Content-Type']),
-                "Content-Length": "{}".format(len(self._content)),
-#                "Cookie": "{}".format(reqhdr.get("Cookie", "sessionid=xyz789")), #dummy cooki
-        #
-        # TODO prepare the request authentication
-        #
-	# self.auth = ...
-                "Date": "{}".format(datetime.datetime.utcnow().strftime("%a, %d %b %Y %H:%M:%S GMT")),
-                "Max-Forward": "10",
-                "Pragma": "no-cache",
-                "Proxy-Authorization": "Basic dXNlcjpwYXNz",  # example base64
-                "Warning": "199 Miscellaneous warning",
-                "User-Agent": "{}".format(reqhdr.get("User-Agent", "Chrome/123.0.0.0")),
-            }
-
-        # Header text alignment
-            #
-            #  TODO: implement the header building to create formated
-            #        header from the provied headers
-            #
-        #
-        # TODO prepare the request authentication
-        #
-	# self.auth = ...
-        return str(fmt_header).encode('utf-8')
+        lines = [status_line(self.status_code or 200)]
+        for name, value in (self.headers or {}).items():
+            if name.lower() in ("content-length", "date", "connection", "keep-alive"):
+                continue
+            for item in (value if isinstance(value, (list, tuple)) else (value,)):
+                lines.append(header_line(name, item))
+        if isinstance(self._content, (bytes, bytearray, memoryview)):
+            lines.append(content_length(len(self._content)))
+        lines.append(self.head_end())
+        return b"".join(lines)
 
 
     def build_notfound(self):
@@ -337,17 +1021,35 @@ class Response():
         Builds a full HTTP response based on the request.
 
         - Nếu request có hook (route của WeApRous) → JSON (RESTful)
+        - Nếu path có route cho method khác → 405 Method Not Allowed
+        - Nếu path chỉ có route WebSocket → 426 Upgrade Required
         - Nếu không có hook → thử serve static HTML
+
+        WebSocket upgrades are served by :class:`HttpAdapter <HttpAdapter>`
+        before this point, engines that reach it answer ``501``.
         """
         # Safety: request rỗng
         if request is None:
             return self.build_error_response(500, "Empty request object")
 
+        if request.is_websocket:
+            return self.build_error_response(
+                501, "WebSocket needs the thread or pool engine")
+
         # Case 1: có route handler → JSON
         if getattr(request, "hook", None):
             return self.build_json_response(request)
 
-        # Case 2: không có route → serve static HTML từ ./www
+        # Path có route nhưng không cho method này → 405 kèm Allow
+        if getattr(request, "allow", None):
+            return self.build_error_response(
+                405, "Method {} not allowed".format(request.method),
+                {"Allow": request.allow})
+        if request.allow == "":
+            return self.build_error_response(
+                426, "WebSocket endpoint", {"Upgrade": "websocket"})
+
+        # Case 3: không có route → serve static HTML từ ./www
         return self.build_file_response(request)
 
 
@@ -432,14 +1134,91 @@ class Response():
         - handler trả (status_code, data)
         - handler trả (status_code, data, cookies_dict)
         - handler trả 1 object duy nhất (mặc định status 200)
+        - handler ``async def``: coroutine được chạy tới khi hoàn tất
         """
         try:
-            print("[Response] Calling hook handler for {} {}".format(
-                request.method, request.path))
+            log.debug("Calling hook handler for %s %s", request.method, request.path)
 
-            # Gọi route handler, luôn truyền request để handler dùng cookies, body, ...
-            result = request.hook(request=request)
+            # Gọi route handler với các tham số signature của nó yêu cầu
+            result = request.call_hook()
+
+            # Handler async def trên engine đồng bộ (thread/pool/eventloop)
+            if inspect.isawaitable(result):
+                started, cpu = time.perf_counter(), time.thread_time()
+                result = asyncio.run(result)
+                if request.handler_time is not None:
+                    request.handler_time += time.perf_counter() - started
+                    request.handler_cpu += time.thread_time() - cpu
+
+            return self.build_result_response(request, result)
+
+        except Exception as e:
+            log.exception("Error in hook handler: %s", e)
+            return self.build_error_response(500, str(e))
 
+    def build_stream_response(self, request, status_code, data, response_cookies=None,
+                              encoding=None):
+        """
+        Build a chunked response from a streamed handler result.
+
+        Chunks are compressed on the fly when the client accepts it and the
+        content type is compressible. HTTP/1.0 clients know no chunked coding
+        and get the body collected with a ``Content-Length``; a live stream
+        (:class:`EventStream`) cannot be collected and is refused (505).
+
+        :params request (class:`Request <Request>`): incoming request object.
+        :params status_code (int): HTTP status code.
+        :params data (iterator | async iterator | JSONStream | EventStream):
+                     ``bytes`` / ``str`` chunks.
+        :params response_cookies (dict | str): cookies to set.
+        :params encoding (str): negotiated content coding, ``None`` for identity.
+
+        :rtype StreamResponse | BufferResponse: the streamed response.
+        """
+        content_type = getattr(data, "content_type", "application/octet-stream")
+        live = getattr(data, "live", False)
+        if encoding is not None and not is_compressible(content_type):
+            encoding = None
+        if live and request.version == "HTTP/1.0":
+            return self.build_error_response(505, "Live streams need HTTP/1.1")
+
+        head = [status_line(status_code), header_line("Content-Type", content_type)]
+        for name, value in (getattr(data, "headers", None) or {}).items():
+            head.append(header_line(name, value))
+        head.extend(cookie_lines(response_cookies))
+        if encoding is not None:
+            head.append(CONTENT_ENCODING[encoding])
+        head.append(VARY_ACCEPT_ENCODING)
+        c = compressor(encoding) if encoding is not None else None
+
+        if request.version == "HTTP/1.0":
+            body = []
+            for chunk in (iter_sync(data) if is_async_stream(data) else data):
+                chunk = chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+                body.append(c.compress(chunk) if c is not None else chunk)
+            if c is not None:
+                body.append(c.flush())
+            head.append(content_length(sum(len(chunk) for chunk in body)))
+            head.append(self.head_end())
+            return BufferResponse([b"".join(head)] + body)
+
+        head.append(TRANSFER_CHUNKED)
+        head.append(self.head_end())
+        log.debug("Streaming response: status-%s, %s", status_code, content_type)
+        chunked = aiter_chunked if is_async_stream(data) else iter_chunked
+        return StreamResponse(b"".join(head), chunked(data, c, flush=live), live)
+
+    def build_result_response(self, request: "Request", result):
+        """
+        Build JSON response from the value returned by a hook handler.
+
+        :params request (class:`Request <Request>`): incoming request object.
+        :params result: handler return value, ``data``, ``(status_code, data)``
+                        or ``(status_code, data, cookies)``.
+
+        :rtype BufferResponse | StreamResponse: complete HTTP response.
+        """
+        try:
             status_code = 200
             data = result
             response_cookies = None
@@ -447,54 +1226,44 @@ class Response():
             if isinstance(result, tuple):
                 if len(result) == 3:
                     status_code, data, response_cookies = result
-                    print("[Response] cookies: {}, status code : {}, data: {}".format(
-                        response_cookies, status_code, data))
+                    log.debug("cookies: %s, status code : %s, data: %s",
+                              response_cookies, status_code, data)
                 elif len(result) == 2:
                     status_code, data = result
-                    print("[Response] status code : {}, data: {}".format(
-                        status_code, data))
+                    log.debug("status code : %s, data: %s", status_code, data)
                 else:
                     # Tuple nhưng không đúng 2 hoặc 3 phần tử → coi như data
                     data = result
-                    print("[Response] data (tuple with len !=2,3): {}".format(data))
+                    log.debug("data (tuple with len !=2,3): %s", data)
             else:
-                print("[Response] data: {}".format(data))
-
-            # Convert body sang JSON bytes
-            response_body = json.dumps(data).encode("utf-8")
-
-            # Map status→status text
-            status_map = {
-                200: "OK",
-                201: "Created",
-                204: "No Content",
-                400: "Bad Request",
-                401: "Unauthorized",
-                404: "Not Found",
-                500: "Internal Server Error",
-            }
-            status_text = status_map.get(status_code, "OK")
+                log.debug("data: %s", data)
 
-            status_line = "HTTP/1.1 {} {}\r\n".format(status_code, status_text)
-            headers = "Content-Type: application/json\r\n"
+            encoding = choose_encoding((request.headers or {}).get("accept-encoding"))
 
-            # Thêm Set-Cookie nếu có
-            if response_cookies:
-                if isinstance(response_cookies, dict):
-                    for cookie_name, cookie_value in response_cookies.items():
-                        headers += "Set-Cookie: {}={}\r\n".format(cookie_name, cookie_value)
-                elif isinstance(response_cookies, str):
-                    headers += "Set-Cookie: {}\r\n".format(response_cookies)
+            # Generator / iterator / JSONStream → chunked, không dựng body trong bộ nhớ
+            if is_stream(data):
+                return self.build_stream_response(
+                    request, status_code, data, response_cookies, encoding)
 
-            headers += "Content-Length: {}\r\n\r\n".format(len(response_body))
+            # Convert body sang JSON bytes, nén khi client hỗ trợ và body đủ lớn
+            response_body, encoding = encode_json(data, encoding)
 
-            print("[Response] JSON response: status-{}, content-length={}".format(
-                status_code, len(response_body)))
+            head = [status_line(status_code), CONTENT_TYPE_JSON]
+            head.extend(cookie_lines(response_cookies))
+            if encoding is not None:
+                head.append(CONTENT_ENCODING[encoding])
+            head.append(VARY_ACCEPT_ENCODING)
+            head.append(content_length(len(response_body)))
+            head.append(self.head_end())
 
-            return status_line.encode("utf-8") + headers.encode("utf-8") + response_body
+            log.debug("JSON response: status-%s, content-length=%s",
+                      status_code, len(response_body))
+
+            # Head và body gửi bằng một sendmsg, không nối thành buffer mới
+            return BufferResponse((b"".join(head), response_body))
 
         except Exception as e:
-            print("[Response] Error in hook handler: {}".format(e))
+            log.exception("Error building JSON response: %s", e)
             return self.build_error_response(500, str(e))
 
     # def build_file_response(self, request):
@@ -544,33 +1313,26 @@ class Response():
     #         print("[Response] Error serving file: {}".format(e))
     #         return self.build_error_response(500, str(e))
 
-    def build_error_response(self, status_code, message):
+    def build_error_response(self, status_code, message, extra_headers=None):
         """
         Build error response for various status codes.
         
-        Supports: 400, 401, 404, 500
-        """
-        status_map = {
-            400: "Bad Request",
-            401: "Unauthorized",
-            404: "Not Found",
-            500: "Internal Server Error"
-        }
-        
-        status_text = status_map.get(status_code, "Error")
-        
+        Supports: 400, 401, 404, 405, 413, 426, 431, 500, 501, 503
+
+        :params extra_headers (dict): additional headers, e.g. ``Allow`` of a 405.
+
+        :rtype BufferResponse: head and JSON body.
+        """
         # Build JSON error body
         error_body = {"error": message, "status": status_code}
         response_body = json.dumps(error_body).encode('utf-8')
         
-        # Build HTTP response
-        status_line = "HTTP/1.1 {} {}\r\n".format(status_code, status_text)
-        headers = "Content-Type: application/json\r\n"
-        headers += "Content-Length: {}\r\n\r\n".format(len(response_body))
-        
-        print("[Response] Error response: status={}, message={}".format(
-            status_code, message))
+        # Build HTTP response head from the pre-encoded fragments
+        head = [status_line(status_code), CONTENT_TYPE_JSON, content_length(len(response_body))]
+        for name, value in (extra_headers or {}).items():
+            head.append(header_line(name, value))
+        head.append(self.head_end())
         
-        response = status_line + headers
+        log.debug("Error response: status=%s, message=%s", status_code, message)
         
-        return response.encode('utf-8') + response_body
\ No newline at end of file
+        return BufferResponse((b"".join(head), response_body))
\ No newline at end of file
@@ -0,0 +1,385 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.router
+~~~~~~~~~~~~~~~~~
+
+This module provides the compiled routing engine of ``WeApRous``.
+
+Routes are registered once and compiled into:
+
+- a hash table of static paths (``/login``, ``/channel/messages``), checked
+  first with a single dict lookup;
+- a segment trie of dynamic paths with parameters, ``<name>`` (one segment),
+  ``<int:name>`` (digits, converted to ``int``) and ``<path:name>`` (the rest
+  of the path, last segment only), e.g. ``/channel/<name>/messages``.
+
+Every path keeps a method table and a precomputed ``Allow`` header, so a
+known path requested with another method is answered ``405`` while an
+unknown path falls through to the static files (``404``). Matching cost
+depends on the number of path segments, not on the number of routes.
+WebSocket handlers are registered under the ``WEBSOCKET`` pseudo-method,
+left out of ``Allow``.
+
+Handler signatures are inspected once at registration to build a call
+adapter (:func:`make_invoker`), so handlers may take ``request=None``, the
+path parameters by name, or ``headers`` / ``body`` positionally as in
+``apps/sampleApp.py``.
+
+Usage Example:
+--------------
+>>> router = Router()
+>>> router.add("/channel/<name>/messages", ["GET"], handler)
+>>> router.match("GET", "/channel/general/messages")
+(<Route GET /channel/<name>/messages>, {'name': 'general'}, None)
+"""
+
+import asyncio
+import inspect
+
+from .websocket import WEBSOCKET
+
+#: Converters of the path parameters: name -> function(str) raising ValueError.
+CONVERTERS = {
+    "str": str,
+    "int": int,
+    "path": str,
+}
+
+
+class RouteError(ValueError):
+    """Raised when a route pattern is invalid or registered twice."""
+
+
+def make_invoker(handler, param_names=()):
+    """
+    Build the call adapter of a route handler from its signature.
+
+    Parameters are bound by name: ``request``, ``headers``, ``body``,
+    ``cookies``, ``query`` (query string), ``params`` (all path parameters),
+    ``ws`` (the :class:`WebSocket <WebSocket>` of an upgraded request)
+    and any path parameter. Other required positional parameters receive
+    the request. ``**kwargs`` handlers get ``request`` and the path parameters.
+
+    :param handler (callable): the route handler.
+    :param param_names (iterable): path parameter names of the route.
+
+    :rtype callable: ``invoke(request, params)`` returning the handler result.
+    """
+    try:
+        signature = inspect.signature(handler)
+    except (TypeError, ValueError):
+        return lambda request, params: handler(request=request)
+
+    sources = {
+        "request": lambda request, params: request,
+        "headers": lambda request, params: request.headers,
+        "body": lambda request, params: request.body,
+        "cookies": lambda request, params: request.cookies,
+        "query": lambda request, params: request.query_string,
+        "params": lambda request, params: params,
+        "ws": lambda request, params: request.websocket,
+    }
+    for name in param_names:
+        sources[name] = (lambda key: lambda request, params: params[key])(name)
+
+    positional, keyword = [], []
+    var_keyword = False
+    for p in signature.parameters.values():
+        if p.kind is p.VAR_KEYWORD:
+            var_keyword = True
+            continue
+        if p.kind is p.VAR_POSITIONAL:
+            continue
+        source = sources.get(p.name)
+        if source is None:
+            if p.default is not p.empty or p.kind is p.KEYWORD_ONLY:
+                continue
+            source = sources["request"]
+        if p.kind is p.POSITIONAL_ONLY:
+            positional.append(source)
+        else:
+            keyword.append((p.name, source))
+
+    if var_keyword:
+        bound = {name for name, _ in keyword}
+        for name in ("request",) + tuple(param_names):
+            if name not in bound:
+                keyword.append((name, sources[name]))
+
+    # Specialize the common ``handler(request=None)`` shape
+    if not positional and len(keyword) == 1 and keyword[0][0] == "request":
+        return lambda request, params: handler(request=request)
+
+    def invoke(request, params):
+        args = [source(request, params) for source in positional]
+        kwargs = {name: source(request, params) for name, source in keyword}
+        return handler(*args, **kwargs)
+    return invoke
+
+
+def is_async_handler(hook):
+    """
+    Whether a route handler must be awaited instead of called.
+
+    :param hook (callable): registered route handler.
+
+    :rtype bool: True for ``async def`` handlers.
+    """
+    is_async = getattr(hook, "_route_async", None)
+    if is_async is None:
+        is_async = asyncio.iscoroutinefunction(hook)
+    return is_async
+
+
+class Route:
+    """
+    One registered route: pattern, methods and the compiled handler invoker.
+
+    :attrs path (str): the route pattern.
+    :attrs method (str): HTTP method.
+    :attrs handler (callable): the registered handler.
+    :attrs param_names (tuple): names of the path parameters.
+    :attrs is_async (bool): ``async def`` handler.
+    """
+
+    __slots__ = ("path", "method", "handler", "param_names", "invoke", "is_async")
+
+    def __init__(self, path, method, handler, param_names=()):
+        self.path = path
+        self.method = method
+        self.handler = handler
+        self.param_names = tuple(param_names)
+        self.invoke = make_invoker(handler, self.param_names)
+        self.is_async = asyncio.iscoroutinefunction(handler)
+
+    def __repr__(self):
+        return "<Route {} {}>".format(self.method, self.path)
+
+
+class _Methods:
+    """
+    Method table of one path with its precomputed ``Allow`` header, empty
+    when the path only has a WebSocket route.
+    """
+
+    __slots__ = ("routes", "allow")
+
+    def __init__(self):
+        self.routes = {}
+        self.allow = ""
+
+    def add(self, route):
+        if route.method in self.routes:
+            raise RouteError("Route {} {} registered twice".format(route.method, route.path))
+        self.routes[route.method] = route
+        self.allow = ", ".join(sorted(m for m in self.routes if m != WEBSOCKET))
+
+
+class _Node:
+    """Segment trie node: literal children first, then typed parameters."""
+
+    __slots__ = ("children", "params", "rest", "methods")
+
+    def __init__(self):
+        #: literal segment -> _Node
+        self.children = {}
+        #: [(converter name, parameter name, _Node)], ``int`` before ``str``
+        self.params = []
+        #: (parameter name, _Methods) of a trailing ``<path:name>``
+        self.rest = None
+        self.methods = None
+
+
+def _parse_segment(segment):
+    """``(converter, name)`` of a ``<...>`` segment, ``None`` for a literal."""
+    if not (segment.startswith("<") and segment.endswith(">")):
+        return None
+    converter, _, name = segment[1:-1].rpartition(":")
+    converter = converter or "str"
+    if converter not in CONVERTERS or not name.isidentifier():
+        raise RouteError("Invalid path parameter {!r}".format(segment))
+    return converter, name
+
+
+class Router:
+    """
+    Compiled route table: static paths hash table plus a segment trie.
+
+    ``Router`` objects are what ``WeApRous`` hands to the backend engines
+    as ``routes``; a plain ``{(method, path): handler}`` dict is converted
+    with :func:`as_router`.
+    """
+
+    __attrs__ = [
+        "static",
+        "root",
+    ]
+
+    def __init__(self):
+        #: path -> _Methods of routes without parameters
+        self.static = {}
+        self.root = _Node()
+        self._routes = []
+
+    def __len__(self):
+        return len(self._routes)
+
+    def __iter__(self):
+        return iter(self._routes)
+
+    def __repr__(self):
+        return "<Router {}>".format(", ".join(
+            "{} {}".format(r.method, r.path) for r in self._routes))
+
+    def add(self, path, methods, handler):
+        """
+        Register ``handler`` for ``path`` and every method of ``methods``.
+
+        :param path (str): route pattern, may contain ``<[converter:]name>``.
+        :param methods (iterable): HTTP methods.
+        :param handler (callable): route handler.
+
+        :rtype list: the created :class:`Route` objects.
+        :raise RouteError: on an invalid pattern or a duplicate route.
+        """
+        if not path.startswith("/"):
+            raise RouteError("Route path must start with '/': {!r}".format(path))
+        segments = path.strip("/").split("/") if path != "/" else []
+        specs = [_parse_segment(s) for s in segments]
+        names = [spec[1] for spec in specs if spec]
+        if len(set(names)) != len(names):
+            raise RouteError("Duplicate path parameter in {!r}".format(path))
+        if any(spec and spec[0] == "path" for spec in specs[:-1]):
+            raise RouteError("<path:...> must be the last segment of {!r}".format(path))
+
+        table = self._table(path, segments, specs)
+        created = []
+        for method in methods:
+            route = Route(path, method.upper(), handler, names)
+            table.add(route)
+            self._routes.append(route)
+            created.append(route)
+        return created
+
+    def _table(self, path, segments, specs):
+        """Method table of the path, created on first use."""
+        if not any(specs):
+            return self.static.setdefault(path, _Methods())
+
+        node = self.root
+        for segment, spec in zip(segments, specs):
+            if spec is None:
+                node = node.children.setdefault(segment, _Node())
+                continue
+            converter, name = spec
+            if converter == "path":
+                if node.rest is None:
+                    node.rest = (name, _Methods())
+                elif node.rest[0] != name:
+                    raise RouteError("Conflicting parameter name in {!r}".format(path))
+                return node.rest[1]
+            for conv, pname, child in node.params:
+                if conv == converter:
+                    if pname != name:
+                        raise RouteError("Conflicting parameter name in {!r}".format(path))
+                    node = child
+                    break
+            else:
+                child = _Node()
+                node.params.append((converter, name, child))
+                # Stricter converters are tried first
+                node.params.sort(key=lambda p: p[0] != "int")
+                node = child
+        if node.methods is None:
+            node.methods = _Methods()
+        return node.methods
+
+    def lookup(self, path):
+        """
+        Method table and parameters of ``path``.
+
+        :param path (str): request path without query string.
+
+        :rtype tuple: (``_Methods`` or ``None``, parameters dict).
+        """
+        table = self.static.get(path)
+        if table is not None:
+            return table, {}
+        segments = path.strip("/").split("/") if path != "/" else []
+        params = {}
+        table = self._walk(self.root, segments, 0, params)
+        return table, params
+
+    def _walk(self, node, segments, i, params):
+        if i == len(segments):
+            return node.methods
+        segment = segments[i]
+        child = node.children.get(segment)
+        if child is not None:
+            table = self._walk(child, segments, i + 1, params)
+            if table is not None:
+                return table
+        if segment:
+            for converter, name, child in node.params:
+                try:
+                    params[name] = CONVERTERS[converter](segment)
+                except ValueError:
+                    continue
+                table = self._walk(child, segments, i + 1, params)
+                if table is not None:
+                    return table
+                del params[name]
+        if node.rest is not None:
+            name, table = node.rest
+            params[name] = "/".join(segments[i:])
+            return table
+        return None
+
+    def match(self, method, path):
+        """
+        Resolve a request to its route.
+
+        :param method (str): HTTP method.
+        :param path (str): request path without query string.
+
+        :rtype tuple: (route, params, allow) where ``route`` is ``None`` when
+                      nothing matched; ``allow`` is the ``Allow`` header of a
+                      known path requested with an unregistered method (405),
+                      ``""`` when the path only has a WebSocket route (426),
+                      ``None`` for an unknown path (404).
+        """
+        table, params = self.lookup(path)
+        if table is None:
+            return None, {}, None
+        route = table.routes.get(method)
+        if route is None:
+            return None, params, table.allow
+        return route, params, None
+
+
+def as_router(routes):
+    """
+    Compiled form of a route table.
+
+    :param routes (Router | dict): a :class:`Router`, or a legacy
+                                   ``{(method, path): handler}`` mapping.
+
+    :rtype Router: the compiled router.
+    """
+    if isinstance(routes, Router):
+        return routes
+    router = Router()
+    for (method, path), handler in (routes or {}).items():
+        router.add(path, [method], handler)
+    return router
@@ -0,0 +1,1119 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.statestore
+~~~~~~~~~~~~~~~~~
+
+This module provides a pluggable state backend for applications that must
+share in-memory state (sessions, peers, channels, ...) between pre-forked
+backend workers.
+
+State is organised in namespaces, each one a mapping of keys to values.
+Every access is expressed as an *operation* tuple ``(name, namespace, ...)``
+and a list of operations is executed atomically by :meth:`StateStore.execute`,
+so a handler can batch all its reads and writes in a single round trip.
+
+Supported operations:
+
+- ``("get", ns, key, default)``        -> value or ``default``
+- ``("put", ns, key, value)``          -> ``None``
+- ``("setdefault", ns, key, default)`` -> stored value
+- ``("create", ns, key, default)``     -> True if ``key`` was missing and created
+- ``("create_log", ns, key, max_messages, max_bytes, max_age)`` -> True if
+  ``key`` was missing and an empty :class:`EventLog <EventLog>` with these
+  limits was created; the log is only built when needed
+- ``("delete", ns, key)``              -> removed value or ``None``
+- ``("keys", ns)``                     -> list of keys
+- ``("items", ns)``                    -> dict copy of the namespace
+- ``("add", ns, key, member)``         -> add ``member`` to the set at ``key``
+- ``("members", ns, key)``             -> set stored at ``key``
+- ``("append", ns, key, item)``        -> new length of the list at ``key``
+  (sequence number of ``item`` for an :class:`EventLog <EventLog>`)
+- ``("range", ns, key, start, stop)``  -> ``list[start:stop]`` at ``key``
+- ``("page", ns, key, after, before, limit)`` -> ``(items, last seq)`` of
+  the :class:`EventLog <EventLog>` at ``key``, see :meth:`EventLog.page`
+- ``("wait", ns, key, length, timeout[, limit])`` -> ``(new length, items)``
+  at ``key``, blocking up to ``timeout`` seconds until the list grows past
+  ``length`` (long polling), then the first ``limit`` items after ``length``;
+  for an :class:`EventLog <EventLog>` ``length`` is the last sequence number
+  seen. The items start over when the list is shorter than ``length``.
+- ``("history", ns)``                  -> retention counters of the event logs
+  of ``ns`` and of the store :class:`HistoryBudget <HistoryBudget>`
+
+A ``wait`` releases the store while it blocks, put it last in its batch.
+
+Backends:
+
+- :class:`LocalStateStore <LocalStateStore>`: in-process dictionaries, the
+  default for a single backend process.
+- :class:`DurableStateStore <DurableStateStore>`: a local store whose
+  changes are journaled to disk (write-ahead log and snapshots, see
+  :mod:`daemon.journal`) and recovered on restart.
+- :class:`SharedStateStore <SharedStateStore>`: client of a
+  :class:`StateServer <StateServer>` process reached over a Unix socket,
+  shared by every local worker process.
+
+Usage Example:
+--------------
+>>> server = start_state_server("/tmp/weaprous-state.sock")
+>>> store = SharedStateStore("/tmp/weaprous-state.sock")
+>>> store.put("peers", "alice", {"ip": "127.0.0.1", "port": 9001})
+>>> peers, channels = store.execute([("items", "peers"), ("keys", "channels")])
+"""
+
+import atexit
+import collections
+import logging
+import multiprocessing
+import os
+import pickle
+import signal
+import socket
+import socketserver
+import struct
+import tempfile
+import threading
+import time
+
+from .journal import Journal, JournalError, FSYNC_INTERVAL
+
+#: Frame header: payload length as a 4-byte big-endian unsigned integer.
+_FRAME = struct.Struct("!I")
+#: Upper bound of one frame, protects the server from garbage input.
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+#: Default capacity (events) of an :class:`EventLog <EventLog>`.
+EVENT_LOG_CAPACITY = 10000
+
+log = logging.getLogger(__name__)
+
+
+class StateStoreError(Exception):
+    """Raised when a state operation fails or the state server is unreachable."""
+
+
+def event_size(item):
+    """
+    Estimated bytes of an event: the length of its strings and bytes plus
+    8 per other value, recursively through dicts, lists, tuples and sets.
+
+    :param item: the event.
+
+    :rtype int: the estimate.
+    """
+    if isinstance(item, (str, bytes, bytearray)):
+        return len(item)
+    if isinstance(item, dict):
+        return sum(event_size(key) + event_size(value) for key, value in item.items())
+    if isinstance(item, (list, tuple, set)):
+        return sum(event_size(value) for value in item)
+    return 8
+
+
+class EventLog:
+    """
+    Bounded ring buffer of events numbered by a per-log sequence, 1, 2, 3...
+
+    Events live in a circular array (grown up to :attr:`max_messages`), so
+    appending and evicting the oldest event are O(1), and the sequence number
+    of an event is its position plus :attr:`first_seq`: a cursor is turned
+    into a position with one subtraction. Dict events get their number in a
+    ``seq`` field.
+
+    The oldest events are evicted once the log holds :attr:`max_messages`
+    events, more than :attr:`max_bytes` bytes (see :func:`event_size`) or
+    events older than :attr:`max_age` seconds (checked on append and read),
+    and by the :class:`HistoryBudget <HistoryBudget>` of the store, if any.
+
+    :attrs max_messages (int): capacity of the ring.
+    :attrs max_bytes (int): most event bytes kept, ``None`` for no limit.
+    :attrs max_age (float): most seconds an event is kept, ``None`` for no limit.
+    :attrs first_seq (int): sequence number of the oldest event kept.
+    :attrs bytes (int): estimated bytes of the events kept.
+    :attrs evicted (int): events evicted so far.
+    :attrs evicted_bytes (int): estimated bytes of the evicted events.
+    """
+
+    __slots__ = ("max_messages", "max_bytes", "max_age", "first_seq", "bytes",
+                 "evicted", "evicted_bytes", "budget", "_items", "_sizes", "_times",
+                 "_head", "_count")
+
+    def __init__(self, max_messages=EVENT_LOG_CAPACITY, max_bytes=None, max_age=None):
+        """
+        Initialize a new, empty EventLog.
+
+        :param max_messages (int): capacity of the ring, at least 1.
+        :param max_bytes (int): most event bytes kept, ``None`` for no limit.
+        :param max_age (float): most seconds an event is kept, ``None`` for no limit.
+        """
+        if max_messages < 1:
+            raise ValueError("max_messages must be at least 1")
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.first_seq = 1
+        self.bytes = 0
+        self.evicted = 0
+        self.evicted_bytes = 0
+        #: HistoryBudget charged with the events, set by the store
+        self.budget = None
+        # Ring slots: event, estimated size, time.time() of the append
+        self._items = []
+        self._sizes = []
+        self._times = []
+        self._head = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._count)
+            if step == 1:
+                return self._slice(self._items, start, max(start, stop))
+            return self._slice(self._items, 0, self._count)[index]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("event log index out of range")
+        return self._items[(self._head + index) % len(self._items)]
+
+    def __getstate__(self):
+        # Pickled linearized and without the budget (a store-local object)
+        return {
+            "limits": (self.max_messages, self.max_bytes, self.max_age),
+            "counters": (self.first_seq, self.evicted, self.evicted_bytes),
+            "items": self._slice(self._items, 0, self._count),
+            "sizes": self._slice(self._sizes, 0, self._count),
+            "times": self._slice(self._times, 0, self._count),
+        }
+
+    def __setstate__(self, state):
+        self.__init__(*state["limits"])
+        self.first_seq, self.evicted, self.evicted_bytes = state["counters"]
+        self._items, self._sizes, self._times = state["items"], state["sizes"], state["times"]
+        self._count = len(self._items)
+        self.bytes = sum(self._sizes)
+
+    def copy(self):
+        """Copy of the log without the budget, sharing the (unchanged) events."""
+        log = EventLog.__new__(EventLog)
+        log.__setstate__(self.__getstate__())
+        return log
+
+    def _slice(self, ring, start, stop):
+        """Slots ``[start:stop)`` (positions) of one ring array, oldest first."""
+        size = len(ring)
+        start += self._head
+        stop += self._head
+        if stop <= size:
+            return ring[start:stop]
+        if start >= size:
+            return ring[start - size:stop - size]
+        return ring[start:] + ring[:stop - size]
+
+    @property
+    def last_seq(self):
+        """Sequence number of the newest event, ``first_seq - 1`` when empty."""
+        return self.first_seq + self._count - 1
+
+    def sizes(self):
+        """Estimated sizes of the events kept, oldest first."""
+        return self._slice(self._sizes, 0, self._count)
+
+    def _push(self, item, size, now):
+        """Store an event after the newest one, growing the ring when full."""
+        ring = self._items
+        if self._count == len(ring):
+            if self._head:
+                # Unwrap before growing so positions stay contiguous
+                head = self._head
+                self._items = ring = ring[head:] + ring[:head]
+                self._sizes = self._sizes[head:] + self._sizes[:head]
+                self._times = self._times[head:] + self._times[:head]
+                self._head = 0
+            grow = min(max(len(ring), 8), self.max_messages - len(ring))
+            ring.extend([None] * grow)
+            self._sizes.extend([0] * grow)
+            self._times.extend([0.0] * grow)
+        i = (self._head + self._count) % len(ring)
+        ring[i] = item
+        self._sizes[i] = size
+        self._times[i] = now
+        self._count += 1
+        self.bytes += size
+
+    def _pop(self):
+        """
+        Evict the oldest event.
+
+        :rtype int: its estimated size.
+        """
+        i = self._head
+        size = self._sizes[i]
+        self._items[i] = None
+        self._head = (i + 1) % len(self._items)
+        self._count -= 1
+        self.first_seq += 1
+        self.bytes -= size
+        self.evicted += 1
+        self.evicted_bytes += size
+        if self.budget is not None:
+            self.budget.release(size)
+        return size
+
+    def append(self, item, now=None):
+        """
+        Number and append an event, evicting the oldest ones over the limits.
+
+        :param item: the event, a dict gets a ``seq`` field.
+        :param now (float): ``time.time()`` of the append.
+
+        :rtype int: its sequence number.
+        """
+        now = time.time() if now is None else now
+        seq = self.first_seq + self._count
+        if isinstance(item, dict):
+            item["seq"] = seq
+        size = event_size(item)
+        if self._count == self.max_messages:
+            self._pop()
+        self._push(item, size, now)
+        if self.max_bytes is not None:
+            while self.bytes > self.max_bytes and self._count > 1:
+                self._pop()
+        self.expire(now)
+        if self.budget is not None:
+            self.budget.charge(self, seq, size)
+        return seq
+
+    def expire(self, now=None):
+        """Evict the events older than :attr:`max_age`."""
+        if self.max_age is None or not self._count:
+            return
+        deadline = (time.time() if now is None else now) - self.max_age
+        while self._count and self._times[self._head] < deadline:
+            self._pop()
+
+    def position(self, seq):
+        """Position of the event numbered ``seq``, clamped to the log."""
+        return min(max(seq - self.first_seq, 0), self._count)
+
+    def page(self, after=None, before=None, limit=None):
+        """
+        Events numbered between two cursors, both excluded.
+
+        Without ``after`` the page is the newest ``limit`` events before
+        ``before`` (scrolling back), otherwise the oldest ``limit`` events
+        after ``after`` (catching up); evicted events are skipped.
+
+        :param after (int): sequence number the page starts after.
+        :param before (int): sequence number the page ends before.
+        :param limit (int): most events returned, ``None`` for all.
+
+        :rtype list: the events, oldest first.
+        """
+        self.expire()
+        start = 0 if after is None else self.position(after + 1)
+        stop = self._count if before is None else self.position(before)
+        if limit is not None and stop - start > limit:
+            if after is None:
+                start = stop - limit
+            else:
+                stop = start + limit
+        return self._slice(self._items, start, max(start, stop))
+
+    def stats(self):
+        """
+        Retention counters of the log.
+
+        :rtype dict: events and bytes kept, sequence bounds, evictions and limits.
+        """
+        return {
+            "messages": self._count,
+            "bytes": self.bytes,
+            "first_seq": self.first_seq,
+            "last_seq": self.last_seq,
+            "evicted": self.evicted,
+            "evicted_bytes": self.evicted_bytes,
+            "max_messages": self.max_messages,
+            "max_bytes": self.max_bytes,
+            "max_age": self.max_age,
+        }
+
+
+class HistoryBudget:
+    """
+    Memory budget shared by the event logs of one store.
+
+    Over :attr:`max_bytes`, the oldest events of all logs are evicted first,
+    in append order. The budget keeps a FIFO of ``(log, seq)`` references,
+    compacted once most of them point to events the logs already evicted,
+    so charging and evicting are amortized O(1).
+
+    :attrs max_bytes (int): most event bytes kept across the logs.
+    :attrs bytes (int): estimated bytes of the events kept.
+    :attrs events (int): events kept.
+    :attrs evicted (int): events evicted to stay within the budget.
+    :attrs evicted_bytes (int): their estimated bytes.
+    """
+
+    __slots__ = ("max_bytes", "bytes", "events", "evicted", "evicted_bytes", "_order")
+
+    def __init__(self, max_bytes):
+        """
+        Initialize a new HistoryBudget.
+
+        :param max_bytes (int): most event bytes kept across the logs.
+        """
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.events = 0
+        self.evicted = 0
+        self.evicted_bytes = 0
+        self._order = collections.deque()
+
+    def attach(self, log):
+        """Charge the events already in ``log`` and evict through it from now on."""
+        log.budget = self
+        first = log.first_seq
+        for offset, size in enumerate(log.sizes()):
+            self.charge(log, first + offset, size)
+
+    def detach(self, log):
+        """Stop charging ``log``, e.g. once it is removed from the store."""
+        if log.budget is self:
+            self.release(log.bytes, len(log))
+            log.budget = None
+
+    def charge(self, log, seq, size):
+        """Account for a new event, evicting the oldest events over the budget."""
+        self.bytes += size
+        self.events += 1
+        order = self._order
+        order.append((log, seq))
+        while self.bytes > self.max_bytes and order:
+            victim, victim_seq = order.popleft()
+            if victim.budget is self and victim_seq >= victim.first_seq and len(victim):
+                self.evicted_bytes += victim._pop()
+                self.evicted += 1
+        if len(order) > 2 * self.events + 64:
+            self._order = collections.deque(
+                (victim, victim_seq) for victim, victim_seq in order
+                if victim.budget is self and victim_seq >= victim.first_seq)
+
+    def release(self, size, events=1):
+        """Account for events a log evicted or dropped."""
+        self.bytes -= size
+        self.events -= events
+
+    def stats(self):
+        """
+        Counters of the budget.
+
+        :rtype dict: limit, bytes and events kept, evictions.
+        """
+        return {
+            "max_bytes": self.max_bytes,
+            "bytes": self.bytes,
+            "messages": self.events,
+            "evicted": self.evicted,
+            "evicted_bytes": self.evicted_bytes,
+        }
+
+
+def _last(items):
+    """Length of a list, last sequence number of an :class:`EventLog`."""
+    return items.last_seq if isinstance(items, EventLog) else len(items)
+
+
+def default_socket_path(port):
+    """
+    Default Unix socket path of the state server for a backend port.
+
+    :param port (int): port of the backend the state belongs to.
+
+    :rtype str: socket path in the temporary directory.
+    """
+    return os.path.join(tempfile.gettempdir(), "weaprous-state-{}.sock".format(port))
+
+
+class StateStore:
+    """
+    Interface of a state backend.
+
+    Subclasses implement :meth:`execute`; the helpers below wrap a single
+    operation each. Use :meth:`execute` directly to batch several operations.
+    """
+
+    def execute(self, ops):
+        """
+        Execute a batch of operations atomically.
+
+        :param ops (list): operation tuples, see :mod:`daemon.statestore`.
+
+        :rtype list: one result per operation, in order.
+        :raise StateStoreError: if an operation fails.
+        """
+        raise NotImplementedError
+
+    def _one(self, *op):
+        """Execute a single operation and return its result."""
+        return self.execute([op])[0]
+
+    def get(self, ns, key, default=None):
+        """Value of ``key`` in ``ns`` or ``default``."""
+        return self._one("get", ns, key, default)
+
+    def put(self, ns, key, value):
+        """Store ``value`` under ``key`` in ``ns``."""
+        return self._one("put", ns, key, value)
+
+    def setdefault(self, ns, key, default):
+        """Store ``default`` unless ``key`` exists, return the stored value."""
+        return self._one("setdefault", ns, key, default)
+
+    def create(self, ns, key, default):
+        """Store ``default`` unless ``key`` exists, return True if it was created."""
+        return self._one("create", ns, key, default)
+
+    def create_log(self, ns, key, max_messages=EVENT_LOG_CAPACITY, max_bytes=None,
+                   max_age=None):
+        """Store an empty :class:`EventLog` unless ``key`` exists, return True if created."""
+        return self._one("create_log", ns, key, max_messages, max_bytes, max_age)
+
+    def delete(self, ns, key):
+        """Remove ``key`` from ``ns``, return the removed value."""
+        return self._one("delete", ns, key)
+
+    def keys(self, ns):
+        """List of the keys of ``ns``."""
+        return self._one("keys", ns)
+
+    def items(self, ns):
+        """Copy of the whole ``ns`` mapping."""
+        return self._one("items", ns)
+
+    def add(self, ns, key, member):
+        """Add ``member`` to the set stored under ``key``."""
+        return self._one("add", ns, key, member)
+
+    def members(self, ns, key):
+        """Copy of the set stored under ``key``."""
+        return self._one("members", ns, key)
+
+    def append(self, ns, key, item):
+        """Append ``item`` to the list under ``key``, return its new length."""
+        return self._one("append", ns, key, item)
+
+    def range(self, ns, key, start=0, stop=None):
+        """Slice ``[start:stop]`` of the list stored under ``key``."""
+        return self._one("range", ns, key, start, stop)
+
+    def page(self, ns, key, after=None, before=None, limit=None):
+        """Events of the :class:`EventLog` under ``key`` between two cursors."""
+        return self._one("page", ns, key, after, before, limit)
+
+    def wait(self, ns, key, length, timeout, limit=None):
+        """Items appended to the list under ``key`` after ``length``, waiting for them."""
+        return self._one("wait", ns, key, length, timeout, limit)
+
+    def history(self, ns):
+        """Retention counters of the event logs of ``ns`` and of the budget."""
+        return self._one("history", ns)
+
+    def close(self):
+        """Release resources held by the backend."""
+
+
+class LocalStateStore(StateStore):
+    """
+    In-process state backend made of plain dictionaries guarded by one lock.
+
+    Results are copies, callers never hold references into the store.
+    ``wait`` operations park on a condition of their list (sharing the store
+    lock), notified by the appends to that list only.
+
+    With ``history_bytes``, the :class:`EventLog <EventLog>` values share a
+    :class:`HistoryBudget <HistoryBudget>` of that many bytes.
+    """
+
+    __attrs__ = [
+        "data",
+        "budget",
+    ]
+
+    def __init__(self, history_bytes=None):
+        """
+        Initialize a new, empty LocalStateStore.
+
+        :param history_bytes (int): memory budget of all the event logs,
+                                    ``None`` for per-log limits only.
+        """
+        #: namespace -> {key: value}
+        self.data = {}
+        #: HistoryBudget of the event logs
+        self.budget = HistoryBudget(history_bytes) if history_bytes else None
+        self._lock = threading.RLock()
+        #: (namespace id, key) -> threading.Condition of the waiters on that list
+        self._conditions = {}
+        #: time.time() given to the event log appends, ``None`` for the clock
+        self._clock = None
+
+    def execute(self, ops):
+        with self._lock:
+            return [self._execute_op(op) for op in ops]
+
+    def _execute_op(self, op):
+        """Run one operation, store lock held."""
+        try:
+            handler = getattr(self, "_op_" + op[0])
+        except (AttributeError, IndexError, TypeError):
+            raise StateStoreError("Unknown state operation {!r}".format(op))
+        try:
+            return handler(self.data.setdefault(op[1], {}), *op[2:])
+        except StateStoreError:
+            raise
+        except Exception as e:
+            raise StateStoreError("State operation {} failed: {}".format(op[0], e))
+
+    def _op_get(self, ns, key, default=None):
+        return _copy(ns.get(key, default))
+
+    def _op_put(self, ns, key, value):
+        self._discard(ns.get(key))
+        ns[key] = value
+
+    def _op_setdefault(self, ns, key, default):
+        return _copy(ns.setdefault(key, default))
+
+    def _op_create(self, ns, key, default):
+        if key in ns:
+            return False
+        ns[key] = default
+        return True
+
+    def _op_create_log(self, ns, key, max_messages=EVENT_LOG_CAPACITY, max_bytes=None,
+                       max_age=None):
+        if key in ns:
+            return False
+        ns[key] = EventLog(max_messages, max_bytes, max_age)
+        return True
+
+    def _op_delete(self, ns, key):
+        value = ns.pop(key, None)
+        self._discard(value)
+        return value
+
+    def _discard(self, value):
+        """Release the budget charged for a removed event log."""
+        if self.budget is not None and isinstance(value, EventLog):
+            self.budget.detach(value)
+
+    def _op_keys(self, ns):
+        return list(ns)
+
+    def _op_items(self, ns):
+        return {key: _copy(value) for key, value in ns.items()}
+
+    def _op_add(self, ns, key, member):
+        ns.setdefault(key, set()).add(member)
+
+    def _op_members(self, ns, key):
+        return set(ns.get(key, ()))
+
+    def _op_append(self, ns, key, item):
+        items = ns.setdefault(key, [])
+        if isinstance(items, EventLog):
+            if self.budget is not None and items.budget is None:
+                self.budget.attach(items)
+            items.append(item, self._clock)
+        else:
+            items.append(item)
+        condition = self._conditions.get((id(ns), key))
+        if condition is not None:
+            condition.notify_all()
+        return _last(items)
+
+    def _op_range(self, ns, key, start=0, stop=None):
+        return list(ns.get(key, ())[start:stop])
+
+    def _op_page(self, ns, key, after=None, before=None, limit=None):
+        log = ns.get(key)
+        if log is None:
+            return [], 0
+        if not isinstance(log, EventLog):
+            raise StateStoreError("{!r} is not an event log".format(key))
+        return log.page(after, before, limit), log.last_seq
+
+    def _op_history(self, ns):
+        return {
+            "logs": {key: value.stats() for key, value in ns.items()
+                     if isinstance(value, EventLog)},
+            "budget": self.budget.stats() if self.budget is not None else None,
+        }
+
+    def _op_wait(self, ns, key, length, timeout, limit=None):
+        ident = (id(ns), key)
+        condition = self._conditions.get(ident)
+        if condition is None:
+            condition = self._conditions[ident] = threading.Condition(self._lock)
+        # wait_for releases the store lock while parked
+        condition.wait_for(lambda: _last(ns.get(key, ())) != length, max(0.0, timeout))
+        items = ns.get(key, [])
+        last = _last(items)
+        if last < length:
+            # The list restarted (e.g. new process): everything is new
+            length = 0
+        if isinstance(items, EventLog):
+            return last, items.page(length, None, limit)
+        stop = None if limit is None else length + limit
+        return last, list(items[length:stop])
+
+
+#: Operations that may change the state, the ones journaled.
+MUTATIONS = frozenset(("put", "setdefault", "create", "create_log", "delete", "add",
+                       "append"))
+#: Default seconds between two snapshots of a DurableStateStore.
+SNAPSHOT_INTERVAL = 300.0
+#: Default journaled batches that trigger an early snapshot.
+SNAPSHOT_RECORDS = 100000
+
+
+class DurableStateStore(LocalStateStore):
+    """
+    :class:`LocalStateStore` whose changes survive a restart, journaled in
+    ``directory`` by a :class:`Journal <Journal>`.
+
+    The operations of a batch that change the state are appended to the
+    write-ahead log as one record, in execution order, with the time of the
+    batch (so event log ages replay alike). Operations that change nothing,
+    e.g. ``create`` of an existing key, are not logged. With
+    ``sync_commit``, :meth:`execute` returns once the record is durable
+    (concurrent batches share one ``fsync``); otherwise a crash loses at
+    most ``fsync_interval`` seconds of changes.
+
+    A snapshot of the whole state is taken every ``snapshot_interval``
+    seconds, after ``snapshot_records`` records, and on :meth:`close`; the
+    store is only locked while its containers are copied, the pickling and
+    writing happen in the background. On start the newest snapshot is
+    loaded and the log records after it replayed.
+
+    :attrs directory (str): directory of the journal.
+    :attrs journal (Journal): the write-ahead log.
+    :attrs sync_commit (bool): whether batches wait for their record to be durable.
+    :attrs snapshot_interval (float): seconds between two snapshots.
+    :attrs snapshot_records (int): records that trigger a snapshot.
+    """
+
+    __attrs__ = LocalStateStore.__attrs__ + [
+        "directory",
+        "journal",
+        "sync_commit",
+        "snapshot_interval",
+        "snapshot_records",
+    ]
+
+    def __init__(self, directory, history_bytes=None, fsync_interval=FSYNC_INTERVAL,
+                 sync_commit=False, snapshot_interval=SNAPSHOT_INTERVAL,
+                 snapshot_records=SNAPSHOT_RECORDS):
+        """
+        Initialize a DurableStateStore from the journal in ``directory``.
+
+        :param directory (str): directory of the journal, created if missing.
+        :param history_bytes (int): memory budget of all the event logs.
+        :param fsync_interval (float): seconds between two ``fsync`` of the
+                                       log, ``0`` after every write, ``None`` never.
+        :param sync_commit (bool): wait for the record of a batch to be durable.
+        :param snapshot_interval (float): seconds between two snapshots.
+        :param snapshot_records (int): records that trigger a snapshot.
+        """
+        LocalStateStore.__init__(self, history_bytes)
+        self.directory = directory
+        self.journal = Journal(directory, fsync_interval)
+        self.sync_commit = sync_commit
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_records = snapshot_records
+        self._records = 0
+        self._closed = False
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_due = threading.Event()
+
+        self._recover()
+        self.journal.start()
+        self._snapshotter = threading.Thread(
+            target=self._run_snapshots, name="state-snapshot", daemon=True)
+        self._snapshotter.start()
+        atexit.register(self.close)
+
+    def _recover(self):
+        """Load the newest snapshot and replay the log after it."""
+        started = time.perf_counter()
+        state, lsn = self.journal.load_snapshot()
+        replayed = 0
+        with self._lock:
+            if state is not None:
+                self.data = state
+            if self.budget is not None:
+                for values in self.data.values():
+                    for value in values.values():
+                        if isinstance(value, EventLog):
+                            self.budget.attach(value)
+            for _, now, ops in self.journal.replay(lsn):
+                self._clock = now
+                for op in ops:
+                    try:
+                        self._execute_op(op)
+                    except StateStoreError as e:
+                        log.warning("Replaying %s: %s", op[0], e)
+                replayed += 1
+            self._clock = None
+            # A short log tail is cheaper than a snapshot
+            self._records = replayed
+        log.info("Recovered state from %s: snapshot at record %s, %s records "
+                 "replayed in %.3fs", self.directory, lsn, replayed,
+                 time.perf_counter() - started)
+
+    def _logged(self, op):
+        """
+        What to journal of ``op`` before it runs, store lock held.
+
+        :rtype tuple: the operation, with a copy of the value it stores (a
+                      later operation of the batch may fill it), ``None``
+                      when it changes nothing.
+        """
+        if op[0] not in MUTATIONS:
+            return None
+        try:
+            ns = self.data.get(op[1], {})
+            if op[0] in ("create", "create_log", "setdefault") and op[2] in ns:
+                return None
+            if op[0] == "delete" and op[2] not in ns:
+                return None
+            if op[0] == "add" and op[3] in ns.get(op[2], ()):
+                return None
+            if op[0] in ("put", "setdefault", "create"):
+                return tuple(op[:3]) + (_freeze(op[3]),)
+        except (IndexError, TypeError):
+            pass
+        return op
+
+    def execute(self, ops):
+        results, changes, lsn = [], [], None
+        with self._lock:
+            self._clock = time.time()
+            try:
+                for op in ops:
+                    if op[0] == "wait" and changes:
+                        # The wait releases the lock: log what precedes it first
+                        lsn = self._commit(changes)
+                        changes = []
+                    logged = self._logged(op)
+                    results.append(self._execute_op(op))
+                    if logged is not None:
+                        changes.append(logged)
+            finally:
+                if changes:
+                    lsn = self._commit(changes)
+                self._clock = None
+        if lsn is not None and self.sync_commit:
+            try:
+                self.journal.wait(lsn)
+            except JournalError as e:
+                raise StateStoreError(str(e))
+        return results
+
+    def _commit(self, changes):
+        """Journal the applied ``changes`` of a batch, store lock held."""
+        try:
+            lsn = self.journal.append(changes, self._clock)
+        except JournalError as e:
+            raise StateStoreError(str(e))
+        self._records += 1
+        if self._records >= self.snapshot_records:
+            self._snapshot_due.set()
+        return lsn
+
+    def _run_snapshots(self):
+        while not self._closed:
+            self._snapshot_due.wait(self.snapshot_interval)
+            self._snapshot_due.clear()
+            if self._closed:
+                return
+            try:
+                self.snapshot()
+            except (OSError, JournalError) as e:
+                log.error("Cannot snapshot the state: %s", e)
+
+    def snapshot(self):
+        """
+        Write a snapshot of the state and drop the log before it.
+
+        :rtype str: path of the snapshot, ``None`` when nothing changed.
+        """
+        with self._snapshot_lock:
+            with self._lock:
+                if not self._records:
+                    return None
+                # Stored events never change: copying the containers is enough
+                state = {name: {key: _freeze(value) for key, value in values.items()}
+                         for name, values in self.data.items()}
+                lsn = self.journal.rotate()
+                self._records = 0
+            started = time.perf_counter()
+            path = self.journal.write_snapshot(state, lsn)
+            log.info("Snapshot %s written in %.3fs", path, time.perf_counter() - started)
+            return path
+
+    def close(self):
+        """Snapshot the state and close the journal."""
+        if self._closed:
+            return
+        self._closed = True
+        self._snapshot_due.set()
+        self._snapshotter.join()
+        try:
+            self.snapshot()
+        except (OSError, JournalError) as e:
+            log.error("Cannot snapshot the state: %s", e)
+        self.journal.close()
+
+
+def _freeze(value):
+    """Copy of a stored value that later operations leave untouched."""
+    if isinstance(value, EventLog):
+        return value.copy()
+    return _copy(value)
+
+
+def _copy(value):
+    """Shallow copy of mutable containers returned by the local store."""
+    if isinstance(value, (dict, list, set)):
+        return type(value)(value)
+    return value
+
+
+def _send_frame(sock, obj):
+    payload = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    sock.sendall(_FRAME.pack(len(payload)) + payload)
+
+
+def _recv_exact(sock, size):
+    buf = bytearray(size)
+    view = memoryview(buf)
+    got = 0
+    while got < size:
+        n = sock.recv_into(view[got:])
+        if n == 0:
+            return None
+        got += n
+    return buf
+
+
+def _recv_frame(sock):
+    header = _recv_exact(sock, _FRAME.size)
+    if header is None:
+        return None
+    (size,) = _FRAME.unpack(header)
+    if size > MAX_FRAME_SIZE:
+        raise StateStoreError("State frame too large: {} bytes".format(size))
+    payload = _recv_exact(sock, size)
+    if payload is None:
+        return None
+    return pickle.loads(payload)
+
+
+class SharedStateStore(StateStore):
+    """
+    Client of a :class:`StateServer <StateServer>` over a Unix socket.
+
+    Each thread of each process keeps its own connection, opened lazily, so
+    the store can be created before the backend forks its workers.
+
+    :attrs path (str): Unix socket path of the state server.
+    :attrs timeout (float): socket timeout of one round trip.
+    """
+
+    __attrs__ = [
+        "path",
+        "timeout",
+    ]
+
+    def __init__(self, path, timeout=10.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        local = self._local
+        sock = getattr(local, "sock", None)
+        if sock is not None and local.pid == os.getpid():
+            return sock
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.path)
+        except OSError as e:
+            sock.close()
+            raise StateStoreError("Cannot reach state server at {}: {}".format(self.path, e))
+        local.sock = sock
+        local.pid = os.getpid()
+        return sock
+
+    def _drop_connection(self):
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def execute(self, ops):
+        ops = list(ops)
+        sock = self._connection()
+        # A parked ``wait`` holds the reply back for up to its timeout
+        waits = [op[4] for op in ops if op[0] == "wait"]
+        sock.settimeout(self.timeout + max(waits) if waits else self.timeout)
+        try:
+            _send_frame(sock, ops)
+            reply = _recv_frame(sock)
+        except OSError as e:
+            self._drop_connection()
+            raise StateStoreError("State server I/O error: {}".format(e))
+        if reply is None:
+            self._drop_connection()
+            raise StateStoreError("State server closed the connection")
+        status, value = reply
+        if status != "ok":
+            raise StateStoreError(value)
+        return value
+
+    def close(self):
+        self._drop_connection()
+
+
+class _StateRequestHandler(socketserver.BaseRequestHandler):
+    """Serve operation batches of one client connection until it closes."""
+
+    def handle(self):
+        store = self.server.store
+        while True:
+            try:
+                ops = _recv_frame(self.request)
+            except (OSError, StateStoreError, pickle.UnpicklingError) as e:
+                log.warning("Dropping client: %s", e)
+                return
+            if ops is None:
+                return
+            try:
+                reply = ("ok", store.execute(ops))
+            except StateStoreError as e:
+                reply = ("error", str(e))
+            try:
+                _send_frame(self.request, reply)
+            except OSError:
+                return
+
+
+class StateServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Unix socket server exposing a :class:`LocalStateStore` to other processes.
+
+    :attrs store (StateStore): the store holding the shared state.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path, store=None):
+        """
+        Initialize a new StateServer listening on ``path``.
+
+        :param path (str): Unix socket path to listen on.
+        :param store (StateStore): the store to expose, a new
+                                   :class:`LocalStateStore` by default.
+        """
+        if os.path.exists(path):
+            os.unlink(path)
+        self.store = store if store is not None else LocalStateStore()
+        socketserver.UnixStreamServer.__init__(self, path, _StateRequestHandler)
+        # Only the owner may talk to the server: frames are pickled.
+        os.chmod(path, 0o600)
+
+    def server_close(self):
+        socketserver.UnixStreamServer.server_close(self)
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+        self.store.close()
+
+
+def run_state_server(path, ready=None, history_bytes=None, durability=None):
+    """
+    Run a state server in the current process until interrupted.
+
+    :param path (str): Unix socket path to listen on.
+    :param ready (multiprocessing.Event): set once the socket accepts clients.
+    :param history_bytes (int): memory budget of the event logs, see
+                                :class:`LocalStateStore`.
+    :param durability (dict): keyword arguments of a
+                              :class:`DurableStateStore`, ``None`` for
+                              state kept in memory only.
+    """
+    def terminate(signum, frame):
+        raise KeyboardInterrupt
+
+    # SIGTERM (Process.terminate) also removes the socket file on exit
+    signal.signal(signal.SIGTERM, terminate)
+    if durability:
+        store = DurableStateStore(history_bytes=history_bytes, **durability)
+    else:
+        store = LocalStateStore(history_bytes)
+    server = StateServer(path, store)
+    log.info("Listening on %s", path)
+    if ready is not None:
+        ready.set()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def start_state_server(path, timeout=10.0, history_bytes=None, durability=None):
+    """
+    Start a state server in a child process and wait until it is ready.
+
+    :param path (str): Unix socket path to listen on.
+    :param timeout (float): seconds to wait for the server to come up,
+                            recovery of a durable state included.
+    :param history_bytes (int): memory budget of the event logs, see
+                                :class:`LocalStateStore`.
+    :param durability (dict): keyword arguments of a
+                              :class:`DurableStateStore`, ``None`` for
+                              state kept in memory only.
+
+    :rtype multiprocessing.Process: the running server process.
+    :raise StateStoreError: if the server does not start in time.
+    """
+    ready = multiprocessing.Event()
+    process = multiprocessing.Process(
+        target=run_state_server, args=(path, ready, history_bytes, durability), name="weaprous-state",
+        daemon=True)
+    process.start()
+    if not ready.wait(timeout):
+        process.terminate()
+        raise StateStoreError("State server did not start on {}".format(path))
+    return process
@@ -0,0 +1,335 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.streaming
+~~~~~~~~~~~~~~~~~
+
+This module provides the helpers of streamed route handler results.
+
+A handler may return (alone or in a ``(status, data[, cookies])`` tuple) a
+generator or any iterator of ``bytes`` / ``str`` chunks, or a
+:class:`JSONStream <JSONStream>` built with :func:`stream_json`. The
+response is then sent with ``Transfer-Encoding: chunked`` while the chunks
+are produced, so the whole body never has to exist in memory.
+
+An :class:`EventStream <EventStream>` built with :func:`stream_events` is a
+live ``text/event-stream`` (Server-Sent Events) body: every event is written
+(and, when compressed, flushed) as soon as it is produced, ``None`` items
+become heartbeat comments keeping idle connections open.
+
+Chunks and events may also come from an async iterator (e.g. an ``async
+def`` generator waiting for new messages): the ``asyncio`` and
+``eventloop`` engines await every chunk without holding a thread, the
+``thread`` and ``pool`` engines drive it with :func:`iter_sync`.
+
+Usage Example:
+--------------
+>>> @app.route('/channel/export', methods=['POST'])
+>>> def export(request=None):
+>>>     messages = STATE.range("channels", "general")
+>>>     return stream_json({"channel": "general", "messages": iter(messages)})
+
+>>> @app.route('/ticks', methods=['GET'])
+>>> def ticks(request=None):
+>>>     return stream_events({"id": i, "data": {"tick": i}} for i in range(10))
+"""
+
+import asyncio
+import json
+import zlib
+from collections.abc import AsyncIterator, Iterator, Mapping
+
+#: Size of the chunks yielded by :func:`stream_json`.
+JSON_STREAM_CHUNK_SIZE = 16 * 1024
+
+_encode = json.JSONEncoder().encode
+
+
+class StreamError(Exception):
+    """Raised when a streamed body fails after its header was sent.
+
+    The response cannot be completed nor replaced by an error response; the
+    engine must close the connection so the client sees a truncated body.
+    """
+
+
+class JSONStream:
+    """
+    A JSON document serialized lazily, chunk by chunk.
+
+    Dicts, lists and tuples are walked recursively; any other iterator or
+    generator found in the value is written as a JSON array while it is
+    consumed, so a history can be streamed straight from its source.
+
+    :attrs data: the value to serialize.
+    :attrs chunk_size (int): approximate size of the yielded chunks.
+    """
+
+    content_type = "application/json"
+
+    __slots__ = ("data", "chunk_size")
+
+    def __init__(self, data, chunk_size=JSON_STREAM_CHUNK_SIZE):
+        self.data = data
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        pending, size = [], 0
+        for piece in _iter_json(self.data):
+            pending.append(piece)
+            size += len(piece)
+            if size >= self.chunk_size:
+                yield "".join(pending)
+                pending, size = [], 0
+        if pending:
+            yield "".join(pending)
+
+
+class EventStream:
+    """
+    A live Server-Sent Events body.
+
+    Items of ``events`` are dicts with the optional keys ``id``, ``event``,
+    ``data`` (a ``str``, anything else is JSON encoded) and ``retry``, or
+    ``None`` for a heartbeat comment.
+
+    :attrs events (iterable | async iterable): the events, produced while
+                                               the stream is sent.
+    :attrs retry (int): reconnection delay advertised to the client, in ms.
+    """
+
+    content_type = "text/event-stream; charset=utf-8"
+    #: Every chunk is delivered at once, compressed chunks are flushed.
+    live = True
+    #: Extra response headers, proxies must neither cache nor buffer events.
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+    __slots__ = ("events", "retry")
+
+    def __init__(self, events, retry=None):
+        self.events = events
+        self.retry = retry
+
+    @property
+    def is_async(self):
+        """Whether the events come from an async iterable."""
+        return hasattr(self.events, "__aiter__")
+
+    def __iter__(self):
+        if self.is_async:
+            yield from iter_sync(self)
+            return
+        if self.retry is not None:
+            yield "retry: {}\n\n".format(int(self.retry))
+        for event in self.events:
+            yield format_event(event)
+
+    async def __aiter__(self):
+        if self.retry is not None:
+            yield "retry: {}\n\n".format(int(self.retry))
+        if not self.is_async:
+            for event in self.events:
+                yield format_event(event)
+            return
+        async for event in self.events:
+            yield format_event(event)
+
+
+def format_event(event):
+    """
+    Frame one Server-Sent Event.
+
+    :param event (dict | None): ``id``, ``event``, ``data``, ``retry`` keys,
+                                ``None`` for a heartbeat comment.
+
+    :rtype str: the ``text/event-stream`` frame.
+    """
+    if event is None:
+        return ": heartbeat\n\n"
+    lines = []
+    if event.get("id") is not None:
+        lines.append("id: {}".format(event["id"]))
+    if event.get("event"):
+        lines.append("event: {}".format(event["event"]))
+    if event.get("retry") is not None:
+        lines.append("retry: {}".format(int(event["retry"])))
+    data = event.get("data", "")
+    if not isinstance(data, str):
+        data = _encode(data)
+    lines.extend("data: " + line for line in data.split("\n"))
+    return "\n".join(lines) + "\n\n"
+
+
+def stream_events(events, retry=None):
+    """
+    Stream ``events`` as a ``text/event-stream`` response body.
+
+    :param events (iterable | async iterable): event dicts or ``None``
+                                              heartbeats, see :class:`EventStream`.
+    :param retry (int): reconnection delay advertised to the client, in ms.
+
+    :rtype EventStream: a streamable handler result.
+    """
+    return EventStream(events, retry)
+
+
+def stream_json(data, chunk_size=JSON_STREAM_CHUNK_SIZE):
+    """
+    Stream ``data`` as a JSON response body.
+
+    :param data: JSON value, may contain iterators of JSON values.
+    :param chunk_size (int): approximate size of the sent chunks.
+
+    :rtype JSONStream: a streamable handler result.
+    """
+    return JSONStream(data, chunk_size)
+
+
+def _iter_json(value):
+    """Yield the JSON text of ``value`` in small pieces."""
+    if isinstance(value, Mapping):
+        yield "{"
+        first = True
+        for key, item in value.items():
+            if not first:
+                yield ", "
+            first = False
+            yield _encode(str(key) if not isinstance(key, str) else key)
+            yield ": "
+            yield from _iter_json(item)
+        yield "}"
+    elif isinstance(value, (list, tuple, Iterator)):
+        yield "["
+        first = True
+        for item in value:
+            if not first:
+                yield ", "
+            first = False
+            yield from _iter_json(item)
+        yield "]"
+    else:
+        yield _encode(value)
+
+
+def is_stream(data):
+    """
+    Whether a handler result must be streamed instead of JSON encoded.
+
+    :param data: the handler data.
+
+    :rtype bool: True for iterators, generators, async iterators,
+                 :class:`JSONStream` and :class:`EventStream`.
+    """
+    return isinstance(data, (Iterator, AsyncIterator, JSONStream, EventStream))
+
+
+def is_async_stream(data):
+    """
+    Whether a streamed handler result produces its chunks asynchronously.
+
+    :param data: a handler data accepted by :func:`is_stream`.
+
+    :rtype bool: True for async iterators and async :class:`EventStream`.
+    """
+    if isinstance(data, EventStream):
+        return data.is_async
+    return isinstance(data, AsyncIterator)
+
+
+def iter_sync(chunks):
+    """
+    Iterate an async iterable from synchronous code, on a private event loop.
+
+    The calling thread is held while each item is awaited.
+
+    :param chunks (async iterable): the items to produce.
+
+    :rtype generator: the items of ``chunks``.
+    """
+    loop = asyncio.new_event_loop()
+    iterator = chunks.__aiter__()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(iterator.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        # Close the generators left suspended (e.g. the client went away),
+        # nested ones included, while the loop still runs their cleanup
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+
+def _frame_chunk(chunk, compressor, flush):
+    """Encode, compress and frame one body chunk, ``b""`` when nothing to send."""
+    if isinstance(chunk, str):
+        chunk = chunk.encode("utf-8")
+    if compressor is not None:
+        chunk = compressor.compress(chunk)
+        if flush:
+            chunk += compressor.flush(zlib.Z_SYNC_FLUSH)
+    return b"%x\r\n%b\r\n" % (len(chunk), chunk) if chunk else b""
+
+
+def _last_chunks(compressor):
+    """The compressor tail and the last-chunk marker."""
+    if compressor is not None:
+        tail = compressor.flush()
+        if tail:
+            yield b"%x\r\n%b\r\n" % (len(tail), tail)
+    yield b"0\r\n\r\n"
+
+
+def iter_chunked(chunks, compressor=None, flush=False):
+    """
+    Frame body chunks with the HTTP/1.1 chunked transfer coding.
+
+    :param chunks (iterable): ``bytes`` or ``str`` chunks, empty ones skipped.
+    :param compressor: optional zlib compressor applied to the body.
+    :param flush (bool): flush the compressor after every chunk, so a live
+                         stream never waits in the compressor buffer.
+
+    :rtype generator: encoded chunks, ending with the last-chunk marker.
+    :raise StreamError: when producing a chunk fails.
+    """
+    try:
+        for chunk in chunks:
+            chunk = _frame_chunk(chunk, compressor, flush)
+            if chunk:
+                yield chunk
+    except Exception as e:
+        raise StreamError("Streamed body failed: {}".format(e)) from e
+    yield from _last_chunks(compressor)
+
+
+async def aiter_chunked(chunks, compressor=None, flush=False):
+    """
+    Async variant of :func:`iter_chunked` for chunks of an async iterable.
+
+    :param chunks (async iterable): ``bytes`` or ``str`` chunks.
+    :param compressor: optional zlib compressor applied to the body.
+    :param flush (bool): flush the compressor after every chunk.
+
+    :rtype async generator: encoded chunks, ending with the last-chunk marker.
+    :raise StreamError: when producing a chunk fails.
+    """
+    try:
+        async for chunk in chunks:
+            chunk = _frame_chunk(chunk, compressor, flush)
+            if chunk:
+                yield chunk
+    except Exception as e:
+        raise StreamError("Streamed body failed: {}".format(e)) from e
+    for chunk in _last_chunks(compressor):
+        yield chunk
@@ -10,6 +10,8 @@
 # while attending the course
 #
 
+import socket
+
 try:
     from urlparse import urlparse  # Python 2
 except ImportError:
@@ -28,4 +30,33 @@ def get_auth_from_url(url):
     except (AttributeError, TypeError):
         auth = ("", "")
 
-    return auth
\ No newline at end of file
+    return auth
+
+def create_server_socket(ip, port, backlog=50, reuse_port=False):
+    """Create a bound and listening TCP server socket.
+
+    With ``reuse_port`` several processes may bind the same address and the
+    kernel load-balances incoming connections between their accept queues.
+
+    :param ip (str): IP address to bind.
+    :param port (int): port number to listen on.
+    :param backlog (int): size of the accept queue.
+    :param reuse_port (bool): set ``SO_REUSEPORT`` before binding.
+
+    :rtype: socket.socket
+    :raise OSError: if ``SO_REUSEPORT`` is unavailable on this platform.
+    """
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        if not hasattr(socket, "SO_REUSEPORT"):
+            server.close()
+            raise OSError("SO_REUSEPORT is not supported on this platform")
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    try:
+        server.bind((ip, port))
+        server.listen(backlog)
+    except OSError:
+        server.close()
+        raise
+    return server
@@ -17,7 +17,12 @@ deamon.weaproute
 This module provides a WeApRous object to deploy RESTful url web app with routing
 """
 
-from .backend import create_backend
+import asyncio
+
+from .backend import create_backend, create_pool
+from .router import Router
+from .metrics import METRICS
+from .websocket import WEBSOCKET
 
 class WeApRous:
     """The fully mutable :class:`WeApRous <WeApRous>` object, which is a lightweight,
@@ -40,6 +45,20 @@ class WeApRous:
       >>> def hello(headers, body):
       >>>     return {'message': 'Hello, world!'}
 
+      >>> @app.route('/channel/<name>/messages', methods=['GET'])
+      >>> def messages(name, request=None):
+      >>>     return {'channel': name}
+
+      >>> @app.route('/wait', methods=['GET'])
+      >>> async def wait(request=None):
+      >>>     await asyncio.sleep(1)
+      >>>     return {'message': 'Done waiting'}
+
+      >>> @app.websocket('/echo')
+      >>> def echo(ws, request=None):
+      >>>     for message in ws:
+      >>>         ws.send(message)
+
       >>> app.run()
     """
 
@@ -49,9 +68,12 @@ class WeApRous:
 
         Sets up an empty route registry and prepares placeholders for IP and port.
         """
-        self.routes = {}
+        #: Compiled route table, see :class:`Router <Router>`.
+        self.routes = Router()
         self.ip = None
         self.port = None
+        #: Worker pool of the ``pool`` engine, exposes :meth:`WorkerPool.stats`.
+        self.pool = None
         return
 
     def prepare_address(self, ip, port):
@@ -68,34 +90,102 @@ class WeApRous:
         """
         Decorator to register a route handler for a specific path and HTTP methods.
 
+        Both plain functions and ``async def`` coroutine functions are accepted.
+        With the ``asyncio`` engine coroutines are awaited on the event loop and
+        plain functions run in an executor; the ``eventloop`` engine awaits
+        coroutines on a helper asyncio thread without blocking its loop, the
+        ``thread`` and ``pool`` engines run them to completion on the handling
+        thread.
+
+        Paths may contain parameters, ``<name>``, ``<int:name>`` or a trailing
+        ``<path:name>``, passed to the handler by name.
+
         :param path (str): The URL path to route.
         :param methods (list): A list of HTTP methods (e.g., ['GET', 'POST']) to bind.
 
         :rtype: function - A decorator that registers the handler function.
         """
         def decorator(func):
-            for method in methods:
-                self.routes[(method.upper(), path)] = func
+            self.routes.add(path, methods, func)
 
             # Optional attach route metadata to the function
             func._route_path = path
             func._route_methods = methods
+            func._route_async = asyncio.iscoroutinefunction(func)
+
+            return func
+        return decorator
+
+    def websocket(self, path):
+        """
+        Decorator to register a WebSocket handler, see :mod:`daemon.websocket`.
+
+        A ``GET`` request with ``Upgrade: websocket`` on ``path`` is switched
+        to the WebSocket protocol and the handler is called with the
+        connection as its ``ws`` parameter; the connection closes when it
+        returns. The path may also have plain HTTP routes. Served by the
+        ``thread`` and ``pool`` engines.
+
+        :param path (str): The URL path, may contain path parameters.
+        """
+        def decorator(func):
+            self.routes.add(path, [WEBSOCKET], func)
+
+            func._route_path = path
+            func._route_methods = [WEBSOCKET]
+            func._route_async = asyncio.iscoroutinefunction(func)
 
             return func
         return decorator
 
-    def run(self):
+    def enable_metrics(self, path="/metrics"):
+        """
+        Record the request metrics and serve them on ``path`` (``GET``) in
+        the Prometheus text format, see :mod:`daemon.metrics`.
+
+        :param path (str): route of the metrics endpoint.
+        """
+        METRICS.enable()
+
+        def metrics(request=None):
+            return METRICS.exposition()
+
+        self.routes.add(path, ["GET"], metrics)
+
+    def run(self, engine="thread", min_workers=None, max_workers=None, queue_size=None,
+            workers=1):
         """
         Start the backend server and begin handling requests.
 
         This method launches the TCP server using the configured IP and port,
         and dispatches incoming requests to the registered route handlers.
 
+        :param engine (str): backend engine, ``thread`` (one thread per
+                             connection), ``pool`` (bounded worker pool),
+                             ``eventloop`` (single-threaded selectors loop) or
+                             ``asyncio`` (coroutine per connection).
+        :param min_workers (int): pool engine, workers kept alive when idle.
+        :param max_workers (int): pool engine, maximum number of workers;
+                                  asyncio engine, executor threads.
+        :param queue_size (int): pool engine, maximum queued connections.
+        :param workers (int): number of pre-forked processes sharing the port
+                              with ``SO_REUSEPORT``; 1 serves in this process.
+
         :raise: Error if IP or port has not been configured.
         """
         if not self.ip or not self.port:
             print("Rous app need to preapre address"
                   "by calling app.prepare_address(ip,port)")
 
-        create_backend(self.ip, self.port, self.routes)
-        
+        if workers > 1:
+            # Each pre-forked worker builds its own pool after fork.
+            create_backend(self.ip, self.port, self.routes, engine=engine, workers=workers,
+                           min_workers=min_workers, max_workers=max_workers,
+                           queue_size=queue_size)
+            return
+
+        if engine == "pool":
+            self.pool = create_pool(min_workers, max_workers, queue_size)
+
+        create_backend(self.ip, self.port, self.routes, engine=engine, pool=self.pool,
+                       max_workers=max_workers)
@@ -0,0 +1,426 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.websocket
+~~~~~~~~~~~~~~~~~
+
+This module provides the WebSocket protocol (RFC 6455) of ``WeApRous``.
+
+A ``GET`` request with ``Upgrade: websocket`` on a path registered with
+``app.websocket(path)`` is answered ``101 Switching Protocols`` by
+:class:`HttpAdapter <HttpAdapter>`, which then hands the connection to the
+handler as a :class:`WebSocket <WebSocket>`:
+
+- :meth:`WebSocket.receive` returns the next message, ``str`` for text and
+  ``bytes`` for binary, reassembled from its fragments; ``None`` once the
+  connection is closed;
+- ping frames are answered with a pong, and an idle connection is pinged
+  every ``PING_INTERVAL`` seconds and dropped when it stays silent;
+- client frames must be masked, reserved bits must be clear (no extension
+  is negotiated), control frames must fit in one frame of 125 bytes and text
+  must be valid UTF-8, otherwise the connection is closed with the status
+  code of RFC 6455 section 7.4;
+- :meth:`WebSocket.send` may be called from any thread, e.g. to push events
+  while the handler thread is blocked in :meth:`WebSocket.receive`.
+
+Server frames are never masked nor fragmented.
+
+Notes:
+------
+- A WebSocket holds its thread for its whole life: it is served by the
+  ``thread`` and ``pool`` engines only (on ``pool``, a thread of its own
+  rather than a worker), the other engines answer ``501``.
+
+Usage Example:
+--------------
+>>> @app.websocket("/echo")
+>>> def echo(ws, request=None):
+>>>     for message in ws:
+>>>         ws.send(message)
+"""
+
+import base64
+import hashlib
+import logging
+import socket
+import struct
+import threading
+
+from .writer import status_line, header_line, send_buffers, CRLF
+
+log = logging.getLogger(__name__)
+
+#: Key suffix of the ``Sec-WebSocket-Accept`` digest (RFC 6455 section 1.3).
+WEBSOCKET_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+#: Protocol version this server speaks.
+WEBSOCKET_VERSION = "13"
+#: Pseudo-method under which the WebSocket routes are registered.
+WEBSOCKET = "WEBSOCKET"
+#: Largest reassembled message accepted from a client (close 1009 above).
+MAX_MESSAGE_SIZE = 1024 * 1024
+#: Idle seconds before the server pings a client; silence for a second
+#: interval closes the connection.
+PING_INTERVAL = 30
+#: Bytes requested per ``recv`` call.
+RECV_SIZE = 65536
+
+# Opcodes (RFC 6455 section 5.2)
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+# Close status codes (RFC 6455 section 7.4.1)
+CLOSE_NORMAL = 1000
+CLOSE_GOING_AWAY = 1001
+CLOSE_PROTOCOL_ERROR = 1002
+CLOSE_UNSUPPORTED = 1003
+CLOSE_NO_STATUS = 1005
+CLOSE_INVALID_DATA = 1007
+CLOSE_POLICY_VIOLATION = 1008
+CLOSE_TOO_BIG = 1009
+CLOSE_INTERNAL_ERROR = 1011
+
+_DATA_OPCODES = (OP_CONTINUATION, OP_TEXT, OP_BINARY)
+_CONTROL_OPCODES = (OP_CLOSE, OP_PING, OP_PONG)
+# Status codes a peer may not send in a close frame
+_RESERVED_CLOSE_CODES = (1004, CLOSE_NO_STATUS, 1006, 1015)
+
+
+class WebSocketError(Exception):
+    """Protocol violation, closes the connection with :attr:`code`."""
+
+    def __init__(self, code, reason):
+        super().__init__(reason)
+        self.code = code
+        self.reason = reason
+
+
+def is_upgrade_request(headers):
+    """
+    Whether a request asks to switch to the WebSocket protocol.
+
+    :param headers (dict): lower-cased request header names to values.
+
+    :rtype bool: ``Upgrade`` names ``websocket``.
+    """
+    upgrade = headers.get("upgrade")
+    return bool(upgrade) and "websocket" in upgrade.lower()
+
+
+def accept_key(key):
+    """
+    ``Sec-WebSocket-Accept`` value answering a ``Sec-WebSocket-Key``.
+
+    :param key (str): the client key, base64 of 16 random bytes.
+
+    :rtype str: base64 of the SHA-1 of the key and :data:`WEBSOCKET_GUID`.
+    """
+    digest = hashlib.sha1(key.strip().encode("ascii") + WEBSOCKET_GUID).digest()
+    return base64.b64encode(digest).decode("ascii")
+
+
+def handshake_error(request):
+    """
+    Check the opening handshake of a request (RFC 6455 section 4.2.1).
+
+    :param request (Request): a request routed to a WebSocket handler.
+
+    :rtype tuple: ``(status, message, headers)`` of the error response, or
+                  ``None`` when the handshake is valid.
+    """
+    headers = request.headers or {}
+    if request.method != "GET" or request.version != "HTTP/1.1":
+        return 400, "WebSocket handshake needs GET over HTTP/1.1", None
+    if "upgrade" not in headers.get("connection", "").lower():
+        return 400, "Missing Connection: Upgrade", None
+    if headers.get("sec-websocket-version", "").strip() != WEBSOCKET_VERSION:
+        return 426, "Unsupported WebSocket version", \
+            {"Sec-WebSocket-Version": WEBSOCKET_VERSION}
+    key = headers.get("sec-websocket-key", "").strip()
+    try:
+        valid = len(base64.b64decode(key, validate=True)) == 16
+    except ValueError:
+        valid = False
+    if not valid:
+        return 400, "Invalid Sec-WebSocket-Key", None
+    return None
+
+
+def handshake_response(request):
+    """
+    ``101 Switching Protocols`` head accepting the handshake of ``request``.
+
+    :param request (Request): a request that passed :func:`handshake_error`.
+
+    :rtype bytes: the encoded response head.
+    """
+    return b"".join([
+        status_line(101),
+        b"Upgrade: websocket\r\n",
+        b"Connection: Upgrade\r\n",
+        header_line("Sec-WebSocket-Accept", accept_key(request.headers["sec-websocket-key"])),
+        CRLF,
+    ])
+
+
+def encode_frame(opcode, payload=b""):
+    """
+    Head of an unmasked, final server frame.
+
+    :param opcode (int): frame opcode.
+    :param payload (bytes): frame payload, only its length is read.
+
+    :rtype bytes: the 2 to 10 bytes frame head.
+    """
+    length = len(payload)
+    if length < 126:
+        return struct.pack("!BB", 0x80 | opcode, length)
+    if length < 65536:
+        return struct.pack("!BBH", 0x80 | opcode, 126, length)
+    return struct.pack("!BBQ", 0x80 | opcode, 127, length)
+
+
+def unmask(payload, mask):
+    """
+    XOR ``payload`` with the 4-byte masking key, as one big integer
+    operation rather than a Python loop over the bytes.
+
+    :param payload (bytes): masked payload.
+    :param mask (bytes): the frame masking key.
+
+    :rtype bytes: the unmasked payload.
+    """
+    length = len(payload)
+    if not length:
+        return b""
+    key = (mask * (length // 4 + 1))[:length]
+    value = int.from_bytes(payload, "big") ^ int.from_bytes(key, "big")
+    return value.to_bytes(length, "big")
+
+
+class WebSocket:
+    """
+    Server side of an upgraded WebSocket connection.
+
+    :attrs sock (socket.socket): the client socket.
+    :attrs closed (bool): a close frame was sent (or the peer is gone).
+    :attrs close_code (int): status code of the peer close frame.
+    :attrs max_message_size (int): largest accepted message.
+    :attrs ping_interval (float): idle seconds before the server pings.
+    """
+
+    __attrs__ = [
+        "sock",
+        "closed",
+        "close_code",
+        "max_message_size",
+        "ping_interval",
+    ]
+
+    def __init__(self, sock, buffered=b"", max_message_size=MAX_MESSAGE_SIZE,
+                 ping_interval=PING_INTERVAL):
+        """
+        Initialize a new WebSocket instance.
+
+        :param sock (socket.socket): the client socket, after the 101 response.
+        :param buffered (bytes): bytes already received after the handshake.
+        :param max_message_size (int): largest accepted message.
+        :param ping_interval (float): idle seconds before the server pings.
+        """
+        self.sock = sock
+        self.closed = False
+        self.close_code = None
+        self.max_message_size = max_message_size
+        self.ping_interval = ping_interval
+        self._buf = bytearray(buffered)
+        self._send_lock = threading.Lock()
+        self._ping_pending = False
+        sock.settimeout(ping_interval)
+
+    def __iter__(self):
+        """Yield the received messages until the connection closes."""
+        while True:
+            message = self.receive()
+            if message is None:
+                return
+            yield message
+
+    def _read(self, n):
+        """Next ``n`` bytes of the connection, pinging the peer while idle."""
+        buf = self._buf
+        while len(buf) < n:
+            try:
+                chunk = self.sock.recv(max(RECV_SIZE, n - len(buf)))
+            except socket.timeout:
+                if self._ping_pending:
+                    raise WebSocketError(CLOSE_GOING_AWAY, "Ping timeout")
+                self._ping_pending = True
+                self.ping()
+                continue
+            if not chunk:
+                raise ConnectionError("Peer closed the connection")
+            self._ping_pending = False
+            buf += chunk
+        data = bytes(buf[:n])
+        del buf[:n]
+        return data
+
+    def _read_frame(self):
+        """
+        Read one client frame.
+
+        :rtype tuple: (fin, opcode, unmasked payload).
+        :raise WebSocketError: on a protocol violation.
+        """
+        first, second = self._read(2)
+        fin, opcode = first & 0x80, first & 0x0F
+        if first & 0x70:
+            raise WebSocketError(CLOSE_PROTOCOL_ERROR, "Reserved bits set")
+        if opcode not in _DATA_OPCODES and opcode not in _CONTROL_OPCODES:
+            raise WebSocketError(CLOSE_PROTOCOL_ERROR, "Unknown opcode {}".format(opcode))
+        if not second & 0x80:
+            raise WebSocketError(CLOSE_PROTOCOL_ERROR, "Client frames must be masked")
+        length = second & 0x7F
+        if opcode in _CONTROL_OPCODES and (length > 125 or not fin):
+            raise WebSocketError(CLOSE_PROTOCOL_ERROR, "Invalid control frame")
+        if length == 126:
+            length = struct.unpack("!H", self._read(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", self._read(8))[0]
+        if length > self.max_message_size:
+            raise WebSocketError(CLOSE_TOO_BIG, "Frame too large")
+        mask = self._read(4)
+        return fin, opcode, unmask(self._read(length), mask)
+
+    def receive(self):
+        """
+        Next message of the client, reassembled from its fragments.
+
+        Control frames interleaved with the fragments are handled here:
+        pings are answered, pongs dropped, and a close frame is echoed.
+
+        :rtype str | bytes: the message, ``None`` once the connection is
+                            closed (by the peer or on a protocol error).
+        """
+        opcode, parts, size = None, [], 0
+        try:
+            while not self.closed:
+                fin, frame_opcode, payload = self._read_frame()
+                if frame_opcode == OP_PING:
+                    self._send_frame(OP_PONG, payload)
+                    continue
+                if frame_opcode == OP_PONG:
+                    continue
+                if frame_opcode == OP_CLOSE:
+                    self._on_close(payload)
+                    return None
+
+                if frame_opcode == OP_CONTINUATION:
+                    if opcode is None:
+                        raise WebSocketError(CLOSE_PROTOCOL_ERROR, "Unexpected continuation")
+                elif opcode is not None:
+                    raise WebSocketError(CLOSE_PROTOCOL_ERROR, "Expected a continuation")
+                else:
+                    opcode = frame_opcode
+                size += len(payload)
+                if size > self.max_message_size:
+                    raise WebSocketError(CLOSE_TOO_BIG, "Message too large")
+                parts.append(payload)
+                if not fin:
+                    continue
+
+                data = parts[0] if len(parts) == 1 else b"".join(parts)
+                if opcode == OP_BINARY:
+                    return data
+                try:
+                    return data.decode("utf-8")
+                except UnicodeDecodeError:
+                    raise WebSocketError(CLOSE_INVALID_DATA, "Invalid UTF-8 text")
+        except WebSocketError as e:
+            log.info("Closing WebSocket %s: %s", self._peer(), e.reason)
+            self.close(e.code, e.reason)
+        except (ConnectionError, socket.error) as e:
+            log.debug("WebSocket %s lost: %s", self._peer(), e)
+            self.closed = True
+        return None
+
+    def _on_close(self, payload):
+        """Answer the close frame of the peer (RFC 6455 section 5.5.1)."""
+        code, reason = CLOSE_NO_STATUS, ""
+        if len(payload) == 1:
+            raise WebSocketError(CLOSE_PROTOCOL_ERROR, "Invalid close frame")
+        if payload:
+            code = struct.unpack("!H", payload[:2])[0]
+            if code < 1000 or code in _RESERVED_CLOSE_CODES or 1016 <= code < 3000:
+                raise WebSocketError(CLOSE_PROTOCOL_ERROR, "Invalid close code")
+            try:
+                reason = payload[2:].decode("utf-8")
+            except UnicodeDecodeError:
+                raise WebSocketError(CLOSE_INVALID_DATA, "Invalid close reason")
+        self.close_code = code
+        log.debug("WebSocket %s closed by peer: %s %s", self._peer(), code, reason)
+        self.close(code if code != CLOSE_NO_STATUS else CLOSE_NORMAL)
+
+    def _send_frame(self, opcode, payload):
+        """Write one frame, serialized with the other senders."""
+        with self._send_lock:
+            send_buffers(self.sock, (encode_frame(opcode, payload), payload))
+
+    def send(self, message):
+        """
+        Send one message, as a text frame for ``str``, binary otherwise.
+
+        :param message (str | bytes): the message.
+
+        :raise ConnectionError: when the connection is closed.
+        """
+        if self.closed:
+            raise ConnectionError("WebSocket is closed")
+        if isinstance(message, str):
+            self._send_frame(OP_TEXT, message.encode("utf-8"))
+        else:
+            self._send_frame(OP_BINARY, bytes(message))
+
+    def ping(self, payload=b""):
+        """
+        Send a ping, the peer answers with a pong.
+
+        :param payload (bytes): at most 125 bytes echoed by the pong.
+        """
+        if not self.closed:
+            self._send_frame(OP_PING, payload)
+
+    def close(self, code=CLOSE_NORMAL, reason=""):
+        """
+        Send the close frame once; the adapter then closes the socket.
+
+        :param code (int): close status code.
+        :param reason (str): short UTF-8 reason, at most 123 bytes.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        payload = struct.pack("!H", code) + reason.encode("utf-8")[:123]
+        try:
+            self._send_frame(OP_CLOSE, payload)
+        except socket.error:
+            pass
+
+    def _peer(self):
+        try:
+            return self.sock.getpeername()
+        except socket.error:
+            return None
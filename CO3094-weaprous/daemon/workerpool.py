@@ -0,0 +1,226 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.workerpool
+~~~~~~~~~~~~~~~~~
+
+This module provides a bounded :class:`WorkerPool <WorkerPool>` used by the
+``pool`` backend engine. Instead of spawning one thread per accepted socket,
+connections are queued and served by a limited set of worker threads.
+
+The pool grows on demand from ``min_workers`` up to ``max_workers`` and
+shrinks back when extra workers stay idle. The job queue is bounded by
+``queue_size`` so a burst of connections cannot exhaust memory; when the
+queue is full :meth:`submit <WorkerPool.submit>` raises :class:`queue.Full`
+and the caller decides how to reject the work.
+
+Usage Example:
+--------------
+>>> pool = WorkerPool(min_workers=4, max_workers=64, queue_size=1024)
+>>> pool.submit(handle_client, ip, port, conn, addr, routes)
+>>> pool.stats()
+{'workers': 4, 'idle': 3, 'busy': 1, 'queued': 0, ...}
+"""
+
+import logging
+import queue
+import threading
+
+#: Default number of threads kept alive even when idle.
+DEFAULT_MIN_WORKERS = 4
+#: Default upper bound of concurrently running worker threads.
+DEFAULT_MAX_WORKERS = 64
+#: Default number of accepted connections waiting for a worker.
+DEFAULT_QUEUE_SIZE = 1024
+#: Seconds an extra (above ``min_workers``) worker waits before retiring.
+DEFAULT_IDLE_TIMEOUT = 30.0
+
+log = logging.getLogger(__name__)
+
+
+class WorkerPool:
+    """A bounded, elastic pool of worker threads fed by a job queue.
+
+    :attrs min_workers (int): number of workers kept alive when idle.
+    :attrs max_workers (int): hard cap of worker threads.
+    :attrs queue_size (int): maximum number of queued jobs (0 is unbounded).
+    :attrs idle_timeout (float): idle seconds before an extra worker exits.
+    """
+
+    __attrs__ = [
+        "min_workers",
+        "max_workers",
+        "queue_size",
+        "idle_timeout",
+        "name",
+    ]
+
+    def __init__(self, min_workers=DEFAULT_MIN_WORKERS,
+                 max_workers=DEFAULT_MAX_WORKERS,
+                 queue_size=DEFAULT_QUEUE_SIZE,
+                 idle_timeout=DEFAULT_IDLE_TIMEOUT,
+                 name="backend-worker"):
+        """
+        Initialize a new WorkerPool instance and start ``min_workers`` threads.
+
+        :param min_workers (int): workers kept alive when idle.
+        :param max_workers (int): maximum number of worker threads.
+        :param queue_size (int): bound of the job queue, 0 means unbounded.
+        :param idle_timeout (float): idle seconds before an extra worker exits.
+        :param name (str): prefix used for worker thread names.
+
+        :raise ValueError: if the worker bounds are inconsistent.
+        """
+        if min_workers < 0 or max_workers < 1 or min_workers > max_workers:
+            raise ValueError("Invalid worker bounds min={} max={}".format(
+                min_workers, max_workers))
+
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self.idle_timeout = idle_timeout
+        self.name = name
+
+        self._jobs = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._workers = 0
+        self._idle = 0
+        self._seq = 0
+        self._shutdown = False
+
+        #: Counters exposed through :meth:`stats`.
+        self._submitted = 0
+        self._completed = 0
+        self._rejected = 0
+        self._failed = 0
+        self._peak_workers = 0
+        self._peak_queued = 0
+
+        with self._lock:
+            for _ in range(min_workers):
+                self._spawn_locked()
+
+    def _spawn_locked(self):
+        """Start one more worker thread. Caller must hold ``self._lock``."""
+        self._seq += 1
+        self._workers += 1
+        self._idle += 1
+        if self._workers > self._peak_workers:
+            self._peak_workers = self._workers
+        t = threading.Thread(
+            target=self._worker,
+            name="{}-{}".format(self.name, self._seq),
+        )
+        t.daemon = True
+        t.start()
+
+    def submit(self, func, *args):
+        """
+        Queue ``func(*args)`` for execution by a pooled worker.
+
+        A new worker is started when every current worker is busy and the
+        pool has not reached ``max_workers`` yet.
+
+        :param func (callable): job to run.
+        :param args: positional arguments passed to ``func``.
+
+        :raise queue.Full: if the job queue is at ``queue_size``.
+        :raise RuntimeError: if the pool has been shut down.
+        """
+        if self._shutdown:
+            raise RuntimeError("WorkerPool is shut down")
+
+        try:
+            self._jobs.put_nowait((func, args))
+        except queue.Full:
+            with self._lock:
+                self._rejected += 1
+            raise
+
+        with self._lock:
+            self._submitted += 1
+            queued = self._jobs.qsize()
+            if queued > self._peak_queued:
+                self._peak_queued = queued
+            if self._idle < queued and self._workers < self.max_workers:
+                self._spawn_locked()
+
+    def _worker(self):
+        """Worker loop: run queued jobs until shut down or retired when idle."""
+        while True:
+            try:
+                job = self._jobs.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                with self._lock:
+                    # Retire extra workers, keep ``min_workers`` alive.
+                    if self._workers > self.min_workers:
+                        self._workers -= 1
+                        self._idle -= 1
+                        return
+                continue
+
+            if job is None:
+                with self._lock:
+                    self._workers -= 1
+                    self._idle -= 1
+                return
+
+            func, args = job
+            with self._lock:
+                self._idle -= 1
+            try:
+                func(*args)
+            except Exception as e:
+                log.exception("Job failed in %s: %s", threading.current_thread().name, e)
+                with self._lock:
+                    self._failed += 1
+            finally:
+                with self._lock:
+                    self._idle += 1
+                    self._completed += 1
+
+    def stats(self):
+        """
+        Snapshot of the pool size, queue size and job counters.
+
+        :rtype dict: pool statistics.
+        """
+        with self._lock:
+            return {
+                "workers": self._workers,
+                "idle": self._idle,
+                "busy": self._workers - self._idle,
+                "queued": self._jobs.qsize(),
+                "min_workers": self.min_workers,
+                "max_workers": self.max_workers,
+                "queue_size": self.queue_size,
+                "peak_workers": self._peak_workers,
+                "peak_queued": self._peak_queued,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "failed": self._failed,
+            }
+
+    def shutdown(self):
+        """
+        Stop accepting jobs and ask every worker to exit once the queue drains.
+        """
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            workers = self._workers
+        for _ in range(workers):
+            # Sentinels go after the queued jobs; block rather than drop them.
+            self._jobs.put(None)
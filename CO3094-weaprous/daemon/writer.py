@@ -0,0 +1,238 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.writer
+~~~~~~~~~~~~~~~~~
+
+This module provides the response writer shared by :class:`Response
+<Response>` and the backend engines.
+
+Response heads are assembled from pre-encoded ``bytes`` fragments:
+
+- status lines of every ``http.HTTPStatus`` code, encoded once;
+- a ``Date`` header formatted at most once per second;
+- ``Connection`` / ``Keep-Alive`` lines memoized by their parameters;
+- constant lines (``Content-Type: application/json``, ``Vary``, ...) and
+  ``Set-Cookie`` lines, repeated once per cookie.
+
+An in-memory response is a :class:`BufferResponse <BufferResponse>` holding
+the head and the body as separate buffers. They are written together with
+``socket.sendmsg`` (scatter-gather I/O), so a body, e.g. a cached static file,
+is never copied into a new buffer just to be prefixed with its header.
+
+Usage Example:
+--------------
+>>> head = b"".join([status_line(200), CONTENT_TYPE_JSON,
+>>>                  content_length(len(body)), head_end(CONNECTION_CLOSE)])
+>>> send_buffers(sock, (head, body))
+"""
+
+import functools
+import time
+from email.utils import formatdate
+from http import HTTPStatus
+
+#: Most buffers passed to one ``sendmsg`` call (below every ``IOV_MAX``).
+IOV_MAX = 64
+
+CRLF = b"\r\n"
+CONTENT_TYPE_JSON = b"Content-Type: application/json\r\n"
+VARY_ACCEPT_ENCODING = b"Vary: Accept-Encoding\r\n"
+TRANSFER_CHUNKED = b"Transfer-Encoding: chunked\r\n"
+CONNECTION_CLOSE = b"Connection: close\r\n"
+#: ``Content-Encoding`` line of each supported coding.
+CONTENT_ENCODING = {
+    "gzip": b"Content-Encoding: gzip\r\n",
+    "deflate": b"Content-Encoding: deflate\r\n",
+}
+
+#: Encoded status line of every known status code.
+STATUS_LINES = {
+    status.value: "HTTP/1.1 {} {}\r\n".format(status.value, status.phrase).encode("ascii")
+    for status in HTTPStatus
+}
+# Current reason phrases of RFC 9110 where ``http.HTTPStatus`` is older
+STATUS_LINES.update({
+    413: b"HTTP/1.1 413 Payload Too Large\r\n",
+    414: b"HTTP/1.1 414 URI Too Long\r\n",
+    416: b"HTTP/1.1 416 Range Not Satisfiable\r\n",
+})
+
+_date = (0, b"")
+
+
+def status_line(status_code):
+    """
+    Status line of ``status_code``, e.g. ``b"HTTP/1.1 200 OK\\r\\n"``.
+
+    :param status_code (int): HTTP status code.
+
+    :rtype bytes: the encoded status line.
+    """
+    line = STATUS_LINES.get(status_code)
+    if line is None:
+        line = "HTTP/1.1 {} Unknown\r\n".format(int(status_code)).encode("ascii")
+    return line
+
+
+def date_header():
+    """
+    ``Date`` header line of the current second, formatted once per second.
+
+    :rtype bytes: e.g. ``b"Date: Sun, 18 Oct 2026 10:00:00 GMT\\r\\n"``.
+    """
+    global _date
+    now = int(time.time())
+    cached = _date
+    if cached[0] != now:
+        cached = _date = (now, "Date: {}\r\n".format(
+            formatdate(now, usegmt=True)).encode("ascii"))
+    return cached[1]
+
+
+@functools.lru_cache(maxsize=512)
+def connection_header(keep_alive, timeout=None, max_requests=None):
+    """
+    ``Connection`` (and ``Keep-Alive``) header lines.
+
+    :param keep_alive (bool): keep the connection open after the response.
+    :param timeout (int): idle seconds the server waits for the next request.
+    :param max_requests (int): requests still allowed on this connection.
+
+    :rtype bytes: the encoded header lines.
+    """
+    if not keep_alive:
+        return CONNECTION_CLOSE
+    params = []
+    if timeout is not None:
+        params.append("timeout={}".format(int(timeout)))
+    if max_requests is not None:
+        params.append("max={}".format(max_requests))
+    header = "Connection: keep-alive\r\n"
+    if params:
+        header += "Keep-Alive: {}\r\n".format(", ".join(params))
+    return header.encode("ascii")
+
+
+def head_end(connection):
+    """
+    Closing lines of every response head: ``Date``, connection headers and
+    the blank line.
+
+    :param connection (bytes): lines from :func:`connection_header`.
+
+    :rtype bytes: the encoded lines.
+    """
+    return date_header() + connection + CRLF
+
+
+def header_line(name, value):
+    """Encoded ``name: value`` header line."""
+    return "{}: {}\r\n".format(name, value).encode("utf-8")
+
+
+def content_length(length):
+    """Encoded ``Content-Length`` header line."""
+    return b"Content-Length: %d\r\n" % length
+
+
+def cookie_lines(cookies):
+    """
+    ``Set-Cookie`` lines of the cookies returned by a handler, one per cookie.
+
+    :param cookies (dict | list | str): ``{name: value}`` where a list value
+                                        sets the same name several times (e.g.
+                                        different ``Path``), a list of complete
+                                        ``Set-Cookie`` values, or one value.
+
+    :rtype list: encoded header lines.
+    """
+    if not cookies:
+        return []
+    if isinstance(cookies, str):
+        return [header_line("Set-Cookie", cookies)]
+    if isinstance(cookies, dict):
+        lines = []
+        for name, value in cookies.items():
+            for item in (value if isinstance(value, (list, tuple)) else (value,)):
+                lines.append(header_line("Set-Cookie", "{}={}".format(name, item)))
+        return lines
+    return [header_line("Set-Cookie", value) for value in cookies]
+
+
+class BufferResponse:
+    """
+    An in-memory response kept as separate buffers (head, body, parts),
+    written with one ``sendmsg`` instead of being concatenated.
+
+    :attrs buffers (tuple): ``bytes`` / ``memoryview`` buffers, in order.
+    """
+
+    __slots__ = ("buffers",)
+
+    def __init__(self, buffers):
+        self.buffers = buffers
+
+    def __len__(self):
+        return sum(len(buf) for buf in self.buffers)
+
+    def __bytes__(self):
+        """Whole response in one buffer, for callers that need ``bytes``."""
+        return b"".join(self.buffers)
+
+    def send(self, sock, flags=0):
+        """
+        Write the response to a blocking (or timeout) socket.
+
+        :param sock (socket.socket): connected client socket.
+        :param flags (int): send flags, e.g. ``MSG_MORE``.
+        """
+        send_buffers(sock, self.buffers, flags)
+
+
+def send_buffers(sock, buffers, flags=0):
+    """
+    Write ``buffers`` in order with scatter-gather ``sendmsg`` calls,
+    resuming after partial writes.
+
+    :param sock (socket.socket): blocking (or timeout) connected socket.
+    :param buffers (iterable): ``bytes`` / ``memoryview`` buffers.
+    :param flags (int): send flags, e.g. ``MSG_MORE``.
+    """
+    views = [memoryview(buf) for buf in buffers if len(buf)]
+    if not hasattr(sock, "sendmsg"):
+        # No scatter-gather on this platform
+        sock.sendall(b"".join(views), flags)
+        return
+    while views:
+        sent = sock.sendmsg(views[:IOV_MAX], (), flags)
+        consume(views, sent)
+
+
+def consume(views, sent):
+    """
+    Drop the first ``sent`` bytes from a list of memoryviews, in place.
+
+    :param views (list | collections.deque): pending memoryviews.
+    :param sent (int): bytes written by the last ``send``/``sendmsg``.
+    """
+    while sent:
+        first = views[0]
+        if sent < len(first):
+            views[0] = first[sent:]
+            return
+        sent -= len(first)
+        if isinstance(views, list):
+            del views[0]
+        else:
+            views.popleft()
@@ -20,6 +20,13 @@ Usage:
     python start_app.py --server-ip localhost    (localhost:9000)
     python start_app.py --server-port 8080       (0.0.0.0:8080)
     python start_app.py --server-ip 127.0.0.1 --server-port 5000
+    python start_app.py --engine pool --max-workers 32 --queue-size 512
+    python start_app.py --workers 4              (4 processes sharing port 9000)
+    python start_app.py --workers 4 --state local   (per-process chat state)
+    python start_app.py --log WARNING --access-log  (quiet, one line per request)
+    python start_app.py --log INFO,daemon.response=DEBUG
+    python start_app.py --metrics                (Prometheus metrics on GET /metrics)
+    python start_app.py --data-dir var/state     (chat state kept across restarts)
 
 This script:
     1. Imports the Task 1A application (apps.app)
@@ -29,7 +36,12 @@ This script:
 """
 
 if __name__ == "__main__":
-    from apps.app import app, PORT
+    from apps.app import app, PORT, configure_state, configure_history
+    from daemon.statestore import (LocalStateStore, SharedStateStore, DurableStateStore,
+                                   start_state_server, default_socket_path,
+                                   SNAPSHOT_INTERVAL, SNAPSHOT_RECORDS)
+    from daemon.journal import FSYNC_INTERVAL
+    from daemon.logger import setup_logging, parse_levels
     import argparse
     
     # Parse command-line arguments
@@ -49,15 +61,148 @@ if __name__ == "__main__":
         default=PORT,
         help=f'Server port (default: {PORT})'
     )
+    parser.add_argument(
+        '--engine',
+        choices=['thread', 'pool', 'eventloop', 'asyncio'],
+        default='thread',
+        help='Connection engine: thread per connection, bounded worker pool, '
+             'selectors event loop or asyncio (default: thread)'
+    )
+    parser.add_argument('--min-workers', type=int, default=None, help='Pool engine: idle workers kept alive')
+    parser.add_argument('--max-workers', type=int, default=None, help='Pool engine: maximum worker threads (asyncio: executor threads)')
+    parser.add_argument('--queue-size', type=int, default=None, help='Pool engine: maximum queued connections')
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Number of pre-forked backend processes sharing the port with SO_REUSEPORT (default: 1)'
+    )
+    parser.add_argument(
+        '--state',
+        choices=['auto', 'local', 'shared'],
+        default='auto',
+        help='Chat state backend: in-process dicts or a state server shared by all '
+             'workers over a Unix socket (default: auto, shared when --workers > 1)'
+    )
+    parser.add_argument(
+        '--state-socket',
+        default=None,
+        help='Unix socket path of the shared state server (default: in the temp directory)'
+    )
+    parser.add_argument(
+        '--history-messages',
+        type=int,
+        default=None,
+        help='Messages kept per channel, older ones are evicted (default: 10000)'
+    )
+    parser.add_argument(
+        '--history-bytes',
+        type=int,
+        default=None,
+        help='Message bytes kept per channel (default: 4 MiB)'
+    )
+    parser.add_argument(
+        '--history-age',
+        type=float,
+        default=None,
+        help='Seconds a message is kept (default: no age limit)'
+    )
+    parser.add_argument(
+        '--history-budget',
+        type=int,
+        default=None,
+        help='Message bytes kept across all channels, oldest evicted first (default: no budget)'
+    )
+    parser.add_argument(
+        '--data-dir',
+        default=None,
+        help='Journal the chat state (write-ahead log and snapshots) in this directory '
+             'and recover it on start (default: state kept in memory only)'
+    )
+    parser.add_argument(
+        '--fsync-interval',
+        type=float,
+        default=FSYNC_INTERVAL,
+        help=f'Seconds between two fsync of the journal, 0 after every write '
+             f'(default: {FSYNC_INTERVAL})'
+    )
+    parser.add_argument(
+        '--no-fsync',
+        action='store_true',
+        help='Never fsync the journal, leave flushing to the operating system'
+    )
+    parser.add_argument(
+        '--sync-commit',
+        action='store_true',
+        help='Answer a request only once its state changes are durable'
+    )
+    parser.add_argument(
+        '--snapshot-interval',
+        type=float,
+        default=SNAPSHOT_INTERVAL,
+        help=f'Seconds between two state snapshots (default: {SNAPSHOT_INTERVAL:g})'
+    )
+    parser.add_argument(
+        '--snapshot-records',
+        type=int,
+        default=SNAPSHOT_RECORDS,
+        help=f'Journal records that trigger a snapshot (default: {SNAPSHOT_RECORDS})'
+    )
+    parser.add_argument(
+        '--log',
+        default=None,
+        help='Log levels, "LEVEL[,logger=LEVEL...]" e.g. "INFO,daemon.response=DEBUG" '
+             '(default: $WEAPROUS_LOG or INFO)'
+    )
+    parser.add_argument(
+        '--access-log',
+        action='store_true',
+        help='Write one access log line per request'
+    )
+    parser.add_argument(
+        '--metrics',
+        action='store_true',
+        help='Serve request metrics in the Prometheus text format on GET /metrics'
+    )
     
     args = parser.parse_args()
+    log_level, log_levels = parse_levels(args.log)
+    setup_logging(log_level, log_levels, access_log=args.access_log or None)
     ip = args.server_ip
     port = args.server_port
+
+    configure_history(args.history_messages, args.history_bytes, args.history_age)
+    state = args.state
+    if state == 'auto':
+        state = 'shared' if args.workers > 1 else 'local'
+    durability = None
+    if args.data_dir:
+        if state == 'local' and args.workers > 1:
+            parser.error('--data-dir needs --state shared with several workers')
+        durability = dict(
+            directory=args.data_dir,
+            fsync_interval=None if args.no_fsync else args.fsync_interval,
+            sync_commit=args.sync_commit,
+            snapshot_interval=args.snapshot_interval,
+            snapshot_records=args.snapshot_records,
+        )
+    if state == 'shared':
+        # Start the state server before forking so every worker shares it
+        state_socket = args.state_socket or default_socket_path(port)
+        # Recovery of a large journal may take a while
+        start_state_server(state_socket, timeout=120.0, history_bytes=args.history_budget,
+                           durability=durability)
+        configure_state(SharedStateStore(state_socket))
+    elif durability:
+        configure_state(DurableStateStore(history_bytes=args.history_budget, **durability))
+    elif args.history_budget:
+        configure_state(LocalStateStore(history_bytes=args.history_budget))
     
     print(f"\n{'='*70}")
     print(f"Starting WeApRous Backend - Task 1A: Authentication Handling")
     print(f"{'='*70}")
     print(f"Server listening on: {ip}:{port}")
+    print(f"Engine: {args.engine} x {args.workers} process(es), state: {state}")
     # Print clickable startup info
     print("\n==============================================================")
     print("WeApRous Chat Application is running!")
@@ -70,6 +215,8 @@ if __name__ == "__main__":
     print("Task 1A APIs:")
     print(f"  • GET  http://127.0.0.1:{args.server_port}/")
     print(f"  • POST http://127.0.0.1:{args.server_port}/login")
+    if args.metrics:
+        print(f"  • GET  http://127.0.0.1:{args.server_port}/metrics")
     print("--------------------------------------------------------------")
     print("Press CTRL + C to stop the server")
     print("==============================================================\n")
@@ -81,10 +228,19 @@ if __name__ == "__main__":
     print(f"\nPress CTRL+C to stop the server")
     print(f"{'='*70}\n")
     
+    if args.metrics:
+        app.enable_metrics('/metrics')
+
     try:
         # Prepare and run the application
         app.prepare_address(ip, port)
-        app.run()
+        app.run(
+            engine=args.engine,
+            min_workers=args.min_workers,
+            max_workers=args.max_workers,
+            queue_size=args.queue_size,
+            workers=args.workers,
+        )
     except KeyboardInterrupt:
         print("\n\n" + "="*70)
         print("Server shutting down gracefully...")
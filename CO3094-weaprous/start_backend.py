@@ -26,6 +26,8 @@ import socket
 import argparse
 
 from daemon import create_backend
+from daemon.backend import ENGINES
+from daemon.logger import setup_logging, parse_levels
 
 # Default port number used if none is specified via command-line arguments.
 PORT = 9000 
@@ -40,6 +42,10 @@ if __name__ == "__main__":
 
     :arg --server-ip (str): IP address to bind the server (default: 127.0.0.1).
     :arg --server-port (int): Port number to bind the server (default: 9000).
+    :arg --engine (str): connection engine (default: thread).
+    :arg --workers (int): number of pre-forked processes (default: 1).
+    :arg --log (str): log levels, e.g. ``INFO,daemon.response=DEBUG``.
+    :arg --access-log: write one access log line per request.
     """
 
     parser = argparse.ArgumentParser(
@@ -58,9 +64,33 @@ if __name__ == "__main__":
         default=PORT,
         help='Port number to bind the server. Default is {}.'.format(PORT)
     )
+    parser.add_argument(
+        '--engine',
+        choices=ENGINES,
+        default='thread',
+        help='Connection engine. Default is thread.'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Number of pre-forked processes sharing the port with SO_REUSEPORT. Default is 1.'
+    )
+    parser.add_argument(
+        '--log',
+        default=None,
+        help='Log levels, "LEVEL[,logger=LEVEL...]". Default is $WEAPROUS_LOG or INFO.'
+    )
+    parser.add_argument(
+        '--access-log',
+        action='store_true',
+        help='Write one access log line per request.'
+    )
  
     args = parser.parse_args()
+    log_level, log_levels = parse_levels(args.log)
+    setup_logging(log_level, log_levels, access_log=args.access_log or None)
     ip = args.server_ip
     port = args.server_port
 
-    create_backend(ip, port)
+    create_backend(ip, port, engine=args.engine, workers=args.workers)
@@ -25,6 +25,7 @@ and can be configured via command-line arguments.
 """
 
 import json
+import logging
 import socket
 import argparse
 
@@ -33,6 +34,7 @@ from daemon.weaprous import WeApRous
 PORT = 9000  # Default port
 
 app = WeApRous()
+log = logging.getLogger("sampleapp")
 
 @app.route('/login', methods=['POST'])
 def login(headers="guest", body="anonymous"):
@@ -45,7 +47,7 @@ def login(headers="guest", body="anonymous"):
     :param headers (str): The request headers or user identifier.
     :param body (str): The request body or login payload.
     """
-    print("[SampleApp] Logging in {} to {}").format(headers, body)
+    log.info("Logging in %s to %s", headers, body)
 
 @app.route('/hello', methods=['PUT'])
 def hello(headers, body):
@@ -58,7 +60,7 @@ def hello(headers, body):
     :param headers (str): The request headers or user identifier.
     :param body (str): The request body or message payload.
     """
-    print("[SampleApp] ['PUT'] Hello in {} to {}").format(headers, body)
+    log.info("['PUT'] Hello in %s to %s", headers, body)
 
 if __name__ == "__main__":
     # Parse command-line arguments to configure server IP and port
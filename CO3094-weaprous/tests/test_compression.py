@@ -0,0 +1,74 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""Tests of ``Accept-Encoding`` negotiation and body coding in :mod:`daemon.compression`."""
+
+import json
+import zlib
+
+import pytest
+
+from daemon.compression import choose_encoding, compress, encode_json, ENCODINGS
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("", None),
+    ("gzip", "gzip"),
+    ("deflate", "deflate"),
+    ("br", None),
+    ("identity", None),
+    ("gzip, deflate", "gzip"),
+    ("deflate, gzip", "gzip"),
+    ("GZIP", "gzip"),
+    ("gzip;q=0.5, deflate", "deflate"),
+    ("gzip; q=0.8, deflate;q=0.9", "deflate"),
+    ("gzip;q=0", None),
+    ("gzip;q=0.0, deflate;q=0", None),
+    ("gzip;q=bad", None),
+])
+def test_choose_encoding_q_values(header, expected):
+    assert choose_encoding(header) == expected
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("*", "gzip"),
+    ("br, *;q=0.1", "gzip"),
+    ("*;q=0", None),
+    ("deflate, *", "deflate"),
+    # A coding refused with q=0 is not chosen through the wildcard
+    ("gzip;q=0, *", "deflate"),
+    ("*, gzip;q=0", "deflate"),
+    ("gzip;q=0, deflate;q=0, *", None),
+])
+def test_choose_encoding_wildcard(header, expected):
+    assert choose_encoding(header) == expected
+
+
+@pytest.mark.parametrize("encoding", sorted(ENCODINGS))
+def test_compress_round_trip(encoding):
+    data = b"hello " * 1000
+    assert zlib.decompress(compress(data, encoding), ENCODINGS[encoding]) == data
+
+
+@pytest.mark.parametrize("encoding", [None, "gzip", "deflate"])
+def test_encode_json_round_trip(encoding):
+    data = {"messages": [{"seq": i, "message": "x" * 50} for i in range(200)]}
+    body, used = encode_json(data, encoding)
+    assert used == encoding
+    if used is not None:
+        body = zlib.decompress(body, ENCODINGS[used])
+    assert json.loads(body) == data
+
+
+def test_encode_json_small_body_not_compressed():
+    assert encode_json({"a": 1}, "gzip") == (b'{"a": 1}', None)
@@ -0,0 +1,254 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""Tests of the write-ahead log (:mod:`daemon.journal`) and :class:`DurableStateStore`."""
+
+import os
+import time
+
+import pytest
+
+from daemon.journal import Journal, encode_record, read_records, _numbered, \
+    SEGMENT_PREFIX, SEGMENT_SUFFIX, SNAPSHOT_PREFIX, SNAPSHOT_SUFFIX
+from daemon.statestore import DurableStateStore, EventLog
+
+
+def segments(directory):
+    return [path for _, path in _numbered(str(directory), SEGMENT_PREFIX, SEGMENT_SUFFIX)]
+
+
+def snapshots(directory):
+    return [path for _, path in _numbered(str(directory), SNAPSHOT_PREFIX, SNAPSHOT_SUFFIX)]
+
+
+def write_journal(directory, count, **options):
+    """A started journal holding ``count`` records ``[("put", "ns", i, i)]``."""
+    journal = Journal(str(directory), **options)
+    journal.start()
+    for i in range(1, count + 1):
+        journal.append([("put", "ns", i, i)], float(i))
+    journal.wait(journal.last_lsn)
+    return journal
+
+
+def replayed(directory, after=0):
+    journal = Journal(str(directory))
+    return journal, [record[0] for record in journal.replay(after)]
+
+
+def crash(store):
+    """Stop a DurableStateStore like a killed process: no final snapshot."""
+    store._closed = True
+    store._snapshot_due.set()
+    store._snapshotter.join()
+    store.journal.close()
+
+
+def channel(store, name="general"):
+    log = store.data["channels"][name]
+    return [(event["seq"], event["m"]) for event in log]
+
+
+# ---------------------------------------------------------------- records
+
+def test_read_records_round_trip():
+    data = encode_record((1, 0.0, ["a"])) + encode_record((2, 0.0, ["b"]))
+    assert [payload for _, payload in read_records(data)] == [(1, 0.0, ["a"]), (2, 0.0, ["b"])]
+    assert [end for end, _ in read_records(data)][-1] == len(data)
+
+
+@pytest.mark.parametrize("cut", [1, 4, 7, 8, 12])
+def test_read_records_stops_at_truncated_record(cut):
+    first = encode_record((1, 0.0, ["a"]))
+    second = encode_record((2, 0.0, ["b" * 20]))
+    records = list(read_records(first + second[:len(second) - cut]))
+    assert [payload[0] for _, payload in records] == [1]
+    assert records[-1][0] == len(first)
+
+
+def test_read_records_stops_at_crc_mismatch():
+    first = encode_record((1, 0.0, ["a"]))
+    second = bytearray(encode_record((2, 0.0, ["b"])))
+    second[-1] ^= 0xFF
+    third = encode_record((3, 0.0, ["c"]))
+    records = list(read_records(first + bytes(second) + third))
+    assert [payload[0] for _, payload in records] == [1]
+
+
+# ----------------------------------------------------------------- replay
+
+def test_replay_in_order_after_snapshot_lsn(tmp_path):
+    write_journal(tmp_path, 5).close()
+    _, lsns = replayed(tmp_path)
+    assert lsns == [1, 2, 3, 4, 5]
+    _, lsns = replayed(tmp_path, after=3)
+    assert lsns == [4, 5]
+
+
+def test_torn_tail_is_cut_and_appends_continue(tmp_path):
+    write_journal(tmp_path, 3).close()
+    [path] = segments(tmp_path)
+    size = os.path.getsize(path)
+    os.truncate(path, size - 5)
+
+    journal, lsns = replayed(tmp_path)
+    assert lsns == [1, 2]
+    assert os.path.getsize(path) < size - 5
+    assert [payload[0] for _, payload in read_records(open(path, "rb").read())] == [1, 2]
+
+    # The next record takes the sequence number of the lost one
+    journal.start()
+    journal.wait(journal.append([("put", "ns", "x", 1)], 0.0))
+    journal.close()
+    _, lsns = replayed(tmp_path)
+    assert lsns == [1, 2, 3]
+
+
+def test_corrupt_record_stops_replay(tmp_path):
+    write_journal(tmp_path, 4).close()
+    [path] = segments(tmp_path)
+    data = bytearray(open(path, "rb").read())
+    ends = [end for end, _ in read_records(bytes(data))]
+    # Flip a payload byte of the third record
+    data[ends[2] - 1] ^= 0xFF
+    open(path, "wb").write(bytes(data))
+
+    _, lsns = replayed(tmp_path)
+    assert lsns == [1, 2]
+    assert os.path.getsize(path) == ends[1]
+
+
+# -------------------------------------------------------------- snapshots
+
+def test_snapshot_rotates_and_removes_old_segments(tmp_path):
+    journal = write_journal(tmp_path, 3)
+    lsn = journal.rotate()
+    journal.write_snapshot({"ns": {1: 1}}, lsn)
+    for i in range(4, 6):
+        journal.append([("put", "ns", i, i)], float(i))
+    journal.close()
+
+    assert [os.path.basename(path) for path in snapshots(tmp_path)] == [
+        "{}{:020d}{}".format(SNAPSHOT_PREFIX, 3, SNAPSHOT_SUFFIX)]
+    assert [os.path.basename(path) for path in segments(tmp_path)] == [
+        "{}{:020d}{}".format(SEGMENT_PREFIX, 4, SEGMENT_SUFFIX)]
+
+    journal = Journal(str(tmp_path))
+    state, lsn = journal.load_snapshot()
+    assert (state, lsn) == ({"ns": {1: 1}}, 3)
+    assert [record[0] for record in journal.replay(lsn)] == [4, 5]
+
+
+def test_corrupt_snapshot_falls_back_to_older(tmp_path):
+    journal = write_journal(tmp_path, 2)
+    journal.write_snapshot({"old": {}}, journal.rotate())
+    journal.close()
+    # A newer snapshot torn before its rename completed its content
+    newer = os.path.join(str(tmp_path), "{}{:020d}{}".format(SNAPSHOT_PREFIX, 9, SNAPSHOT_SUFFIX))
+    open(newer, "wb").write(encode_record((9, {"new": {}}))[:-3])
+
+    state, lsn = Journal(str(tmp_path)).load_snapshot()
+    assert (state, lsn) == ({"old": {}}, 2)
+
+
+# ------------------------------------------------------ DurableStateStore
+
+def test_store_recovers_after_crash(tmp_path):
+    store = DurableStateStore(str(tmp_path), fsync_interval=0, sync_commit=True)
+    store.execute([("create_log", "channels", "general", 3, None, None),
+                   ("append", "channels", "general", {"m": 1})])
+    for i in range(2, 6):
+        store.append("channels", "general", {"m": i})
+    store.add("members", "general", "alice")
+    store.put("peers", "bob", {"port": 1})
+    store.delete("peers", "bob")
+    store.put("peers", "carol", {"port": 2})
+    crash(store)
+
+    store = DurableStateStore(str(tmp_path))
+    assert channel(store) == [(3, 3), (4, 4), (5, 5)]
+    assert store.data["members"] == {"general": {"alice"}}
+    assert store.data["peers"] == {"carol": {"port": 2}}
+    store.close()
+
+
+def test_store_skips_no_op_changes(tmp_path):
+    store = DurableStateStore(str(tmp_path), fsync_interval=0, sync_commit=True)
+    store.create_log("channels", "general")
+    lsn = store.journal.last_lsn
+    store.create_log("channels", "general")
+    store.create("channels", "general", EventLog())
+    store.delete("peers", "nobody")
+    store.get("peers", "nobody")
+    assert store.journal.last_lsn == lsn
+    store.close()
+
+
+def test_store_value_logged_as_stored(tmp_path):
+    # The list is filled by a later operation of the same batch
+    store = DurableStateStore(str(tmp_path), fsync_interval=0, sync_commit=True)
+    store.execute([("put", "lists", "l", []), ("append", "lists", "l", "a")])
+    crash(store)
+    store = DurableStateStore(str(tmp_path))
+    assert store.data["lists"] == {"l": ["a"]}
+    store.close()
+
+
+def test_store_recovers_snapshot_and_tail_across_cleanup(tmp_path):
+    store = DurableStateStore(str(tmp_path), fsync_interval=0, sync_commit=True)
+    store.create_log("channels", "general")
+    for i in range(1, 4):
+        store.append("channels", "general", {"m": i})
+    assert store.snapshot() is not None
+    for i in range(4, 6):
+        store.append("channels", "general", {"m": i})
+    crash(store)
+    assert len(snapshots(tmp_path)) == 1
+    assert len(segments(tmp_path)) == 1
+
+    store = DurableStateStore(str(tmp_path))
+    assert channel(store) == [(i, i) for i in range(1, 6)]
+    store.close()
+    # A clean close leaves one snapshot and an empty segment
+    assert len(snapshots(tmp_path)) == 1
+    assert [os.path.getsize(path) for path in segments(tmp_path)] == [0]
+
+    store = DurableStateStore(str(tmp_path))
+    assert channel(store) == [(i, i) for i in range(1, 6)]
+    store.append("channels", "general", {"m": 6})
+    crash(store)
+    store = DurableStateStore(str(tmp_path))
+    assert channel(store)[-1] == (6, 6)
+    store.close()
+
+
+def test_store_snapshot_after_record_count(tmp_path):
+    store = DurableStateStore(str(tmp_path), snapshot_records=10)
+    store.create_log("channels", "general")
+    for i in range(1, 12):
+        store.append("channels", "general", {"m": i})
+    deadline = time.monotonic() + 5
+    while not snapshots(tmp_path) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert snapshots(tmp_path)
+    store.close()
+
+
+def test_store_replays_event_times(tmp_path):
+    store = DurableStateStore(str(tmp_path), fsync_interval=0, sync_commit=True)
+    store.create_log("channels", "general", 100, None, 60)
+    store.append("channels", "general", {"m": 1})
+    times = list(store.data["channels"]["general"]._times)
+    crash(store)
+    store = DurableStateStore(str(tmp_path))
+    assert list(store.data["channels"]["general"]._times) == times
+    store.close()
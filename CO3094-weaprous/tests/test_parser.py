@@ -0,0 +1,201 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""Tests of :class:`daemon.parser.HttpParser` framing and buffer management."""
+
+import pytest
+
+from daemon.parser import HttpParser, BUFFER_SIZE
+from daemon.request import HttpParseError
+
+
+class ChunkSocket:
+    """Socket stand-in returning the given chunks from ``recv_into``, then EOF."""
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    def recv_into(self, view):
+        if not self.chunks:
+            return 0
+        chunk = self.chunks.pop(0)
+        n = min(len(chunk), len(view))
+        view[:n] = chunk[:n]
+        if n < len(chunk):
+            self.chunks.insert(0, chunk[n:])
+        return n
+
+
+def request(method="GET", path="/", body=b"", headers=()):
+    lines = ["{} {} HTTP/1.1".format(method, path), "Host: localhost"]
+    lines.extend(headers)
+    if body or method == "POST":
+        lines.append("Content-Length: {}".format(len(body)))
+    return ("\r\n".join(lines) + "\r\n\r\n").encode() + body
+
+
+def drain(parser):
+    """Every complete request buffered in ``parser``."""
+    requests = []
+    while True:
+        req = parser.next_request()
+        if req is None:
+            return requests
+        requests.append(req)
+
+
+def test_single_request():
+    parser = HttpParser()
+    parser.feed(request("POST", "/login?next=/", b"user=a"))
+    req = parser.next_request()
+    assert (req.method, req.path, req.query_string) == ("POST", "/login", "next=/")
+    assert req.headers["host"] == "localhost"
+    assert req.body == "user=a"
+    assert parser.next_request() is None
+    assert len(parser) == 0
+
+
+@pytest.mark.parametrize("split", range(1, len(request("POST", "/a", b"xyz"))))
+def test_request_split_in_two_reads(split):
+    data = request("POST", "/a", b"xyz")
+    parser = HttpParser()
+    parser.feed(data[:split])
+    assert parser.next_request() is None
+    parser.feed(data[split:])
+    req = parser.next_request()
+    assert (req.method, req.path, req.body) == ("POST", "/a", "xyz")
+    assert parser.next_request() is None
+
+
+def test_request_fed_byte_by_byte():
+    data = request("POST", "/bytes", b"0123456789", ["X-Long: " + "v" * 200])
+    parser = HttpParser()
+    requests = []
+    for i in range(len(data)):
+        parser.feed(data[i:i + 1])
+        requests.extend(drain(parser))
+    assert [req.body for req in requests] == ["0123456789"]
+    assert requests[0].headers["x-long"] == "v" * 200
+
+
+def test_split_terminator_resumes_search():
+    data = request("GET", "/split")
+    parser = HttpParser()
+    # Every cut inside the CRLFCRLF terminator
+    for cut in range(len(data) - 3, len(data)):
+        parser.feed(data[:cut])
+        assert parser.next_request() is None
+        parser.feed(data[cut:])
+        assert parser.next_request().path == "/split"
+
+
+def test_pipelined_requests_in_one_read():
+    data = (request("GET", "/one") + request("POST", "/two", b"2")
+            + b"\r\n\r\n" + request("GET", "/three"))
+    parser = HttpParser()
+    parser.feed(data)
+    requests = drain(parser)
+    assert [req.path for req in requests] == ["/one", "/two", "/three"]
+    assert requests[1].body == "2"
+    assert len(parser) == 0
+
+
+def test_pipelined_request_split_after_first():
+    first, second = request("POST", "/one", b"a" * 10), request("POST", "/two", b"b" * 10)
+    data = first + second
+    parser = HttpParser()
+    parser.feed(data[:len(first) + 7])
+    assert [req.path for req in drain(parser)] == ["/one"]
+    parser.feed(data[len(first) + 7:])
+    assert [req.body for req in drain(parser)] == ["b" * 10]
+
+
+def test_header_too_large_without_terminator():
+    parser = HttpParser(max_header_size=256)
+    parser.feed(b"GET / HTTP/1.1\r\nX-Big: " + b"a" * 300)
+    with pytest.raises(HttpParseError) as exc:
+        parser.next_request()
+    assert exc.value.status_code == 431
+
+
+def test_header_too_large_with_terminator():
+    parser = HttpParser(max_header_size=256)
+    parser.feed(request("GET", "/", headers=["X-Big: " + "a" * 300]))
+    with pytest.raises(HttpParseError) as exc:
+        parser.next_request()
+    assert exc.value.status_code == 431
+
+
+def test_header_at_limit_is_accepted():
+    data = request("GET", "/")
+    parser = HttpParser(max_header_size=len(data) - 4)
+    parser.feed(data)
+    assert parser.next_request().path == "/"
+
+
+def test_body_too_large():
+    parser = HttpParser(max_body_size=100)
+    parser.feed(b"POST /upload HTTP/1.1\r\nContent-Length: 101\r\n\r\n")
+    with pytest.raises(HttpParseError) as exc:
+        parser.next_request()
+    assert exc.value.status_code == 413
+
+
+def test_body_larger_than_buffer_received_in_place():
+    body = bytes(range(256)) * (3 * BUFFER_SIZE // 256)
+    data = request("POST", "/big", body)
+    parser = HttpParser(max_body_size=len(body))
+    sock = ChunkSocket(data[i:i + 5000] for i in range(0, len(data), 5000))
+    requests = []
+    while parser.recv_into(sock):
+        requests.extend(drain(parser))
+    assert len(requests) == 1
+    assert requests[0]._raw_body == body
+    # The room grown for the body is released once it is consumed
+    assert len(parser.buf) == BUFFER_SIZE
+
+
+def test_body_growth_rebases_pending_head():
+    # A consumed request in front forces the buffer to slide while a
+    # parsed head waits for its body
+    first = request("GET", "/first")
+    body = b"x" * 200
+    second = request("POST", "/second", body)
+    parser = HttpParser(buffer_size=128, max_body_size=len(body))
+    parser.feed(first + second[:len(second) - len(body) + 10])
+    assert [req.path for req in drain(parser)] == ["/first"]
+    # Reserving room for the body slid the second request to the front
+    assert parser.start == 0
+    assert parser._head[4] == len(second) - len(body)
+    parser.feed(second[len(second) - len(body) + 10:])
+    req = parser.next_request()
+    assert (req.path, req._raw_body) == ("/second", body)
+    assert len(parser) == 0
+
+
+def test_recv_into_compacts_before_growing():
+    parser = HttpParser(buffer_size=128)
+    sock = ChunkSocket([request("GET", "/a") + request("GET", "/b")[:20],
+                        request("GET", "/b")[20:]])
+    parser.recv_into(sock, size=64)
+    assert [req.path for req in drain(parser)] == ["/a"]
+    parser.recv_into(sock, size=64)
+    assert len(parser.buf) == 128
+    assert [req.path for req in drain(parser)] == ["/b"]
+
+
+def test_detach_returns_unconsumed_bytes():
+    parser = HttpParser()
+    parser.feed(request("GET", "/ws") + b"\x81\x00")
+    assert parser.next_request().path == "/ws"
+    assert parser.detach() == b"\x81\x00"
+    assert len(parser) == 0
@@ -0,0 +1,186 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""Tests of the compiled route table (:mod:`daemon.router`) and handler binding."""
+
+import pytest
+
+from daemon.request import Request
+from daemon.response import Response
+from daemon.router import Router, RouteError, as_router, make_invoker
+from daemon.websocket import WEBSOCKET
+
+
+def handler(request=None):
+    return "handler"
+
+
+def router(*routes):
+    """A Router holding ``(path, methods)`` routes, each handler named after its path."""
+    r = Router()
+    for path, methods in routes:
+        r.add(path, methods, lambda request=None, _path=path: _path)
+    return r
+
+
+def matched(r, method, path):
+    """``(route path, params, allow)`` of a request."""
+    route, params, allow = r.match(method, path)
+    return (route.path if route else None), params, allow
+
+
+def prepared(raw, routes):
+    req = Request()
+    req.prepare(raw, routes)
+    return req
+
+
+def response_bytes(req):
+    resp = Response()
+    resp.reset(req)
+    return bytes(resp.build_response(req))
+
+
+# ---------------------------------------------------------------- matching
+
+def test_static_and_root_paths():
+    r = router(("/", ["GET"]), ("/login", ["POST"]))
+    assert matched(r, "GET", "/") == ("/", {}, None)
+    assert matched(r, "POST", "/login") == ("/login", {}, None)
+    assert matched(r, "GET", "/missing") == (None, {}, None)
+
+
+def test_parameters_are_extracted():
+    r = router(("/channel/<name>/messages", ["GET"]))
+    assert matched(r, "GET", "/channel/general/messages") == (
+        "/channel/<name>/messages", {"name": "general"}, None)
+    assert matched(r, "GET", "/channel/general") == (None, {}, None)
+    assert matched(r, "GET", "/channel//messages")[0] is None
+
+
+def test_literal_before_parameter():
+    r = router(("/users/<name>", ["GET"]), ("/users/me", ["GET"]))
+    assert matched(r, "GET", "/users/me") == ("/users/me", {}, None)
+    assert matched(r, "GET", "/users/bob") == ("/users/<name>", {"name": "bob"}, None)
+
+
+def test_int_converter_before_str():
+    r = router(("/items/<name>", ["GET"]), ("/items/<int:item_id>", ["GET"]))
+    assert matched(r, "GET", "/items/42") == ("/items/<int:item_id>", {"item_id": 42}, None)
+    assert matched(r, "GET", "/items/abc") == ("/items/<name>", {"name": "abc"}, None)
+
+
+def test_backtracks_to_parameter_when_literal_branch_fails():
+    r = router(("/a/b/c", ["GET"]), ("/a/<x>/d", ["GET"]))
+    assert matched(r, "GET", "/a/b/d") == ("/a/<x>/d", {"x": "b"}, None)
+
+
+def test_path_converter_takes_the_rest():
+    r = router(("/files/<path:rest>", ["GET"]), ("/files/<int:n>/meta", ["GET"]))
+    assert matched(r, "GET", "/files/a/b/c.txt") == (
+        "/files/<path:rest>", {"rest": "a/b/c.txt"}, None)
+    assert matched(r, "GET", "/files/7/meta") == ("/files/<int:n>/meta", {"n": 7}, None)
+    assert matched(r, "GET", "/files/7/other") == (
+        "/files/<path:rest>", {"rest": "7/other"}, None)
+
+
+def test_as_router_from_legacy_dict():
+    r = as_router({("GET", "/a"): handler, ("POST", "/a"): handler})
+    assert isinstance(r, Router) and len(r) == 2
+    assert as_router(r) is r
+
+
+# ------------------------------------------------------ registration errors
+
+@pytest.mark.parametrize("path", [
+    "no-slash",
+    "/a/<bad:name>",
+    "/a/<not an identifier>",
+    "/a/<x>/<x>",
+    "/a/<path:rest>/b",
+])
+def test_invalid_patterns(path):
+    with pytest.raises(RouteError):
+        Router().add(path, ["GET"], handler)
+
+
+def test_duplicate_route():
+    r = router(("/a/<x>", ["GET"]))
+    with pytest.raises(RouteError):
+        r.add("/a/<x>", ["GET"], handler)
+    with pytest.raises(RouteError):
+        r.add("/a/<y>", ["POST"], handler)
+
+
+# ------------------------------------------------------------ 405 and 426
+
+def test_method_not_allowed_lists_allow():
+    r = router(("/channel/<name>", ["GET", "POST"]), ("/login", ["POST"]))
+    assert matched(r, "DELETE", "/channel/x") == (None, {"name": "x"}, "GET, POST")
+    assert matched(r, "GET", "/login") == (None, {}, "POST")
+
+
+def test_websocket_only_path_has_empty_allow():
+    r = router(("/ws", [WEBSOCKET]), ("/both", [WEBSOCKET, "GET"]))
+    assert matched(r, "GET", "/ws") == (None, {}, "")
+    assert matched(r, "POST", "/both") == (None, {}, "GET")
+    assert matched(r, WEBSOCKET, "/ws")[0] == "/ws"
+
+
+def test_405_and_426_responses():
+    r = router(("/login", ["POST"]), ("/ws", [WEBSOCKET]))
+    head = response_bytes(prepared("GET /login HTTP/1.1\r\nHost: x\r\n\r\n", r))
+    assert head.startswith(b"HTTP/1.1 405 ") and b"Allow: POST\r\n" in head
+    head = response_bytes(prepared("GET /ws HTTP/1.1\r\nHost: x\r\n\r\n", r))
+    assert head.startswith(b"HTTP/1.1 426 ") and b"Upgrade: websocket\r\n" in head
+
+
+def test_upgrade_request_routed_to_websocket_handler():
+    r = router(("/chat", [WEBSOCKET]), ("/chat", ["GET"]))
+    upgrade = "GET /chat HTTP/1.1\r\nHost: x\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n\r\n"
+    assert prepared(upgrade, r).route.method == WEBSOCKET
+    assert prepared("GET /chat HTTP/1.1\r\nHost: x\r\n\r\n", r).route.method == "GET"
+
+
+# --------------------------------------------------------- handler binding
+
+def test_invoker_binds_by_name():
+    def view(headers, body, name, query, request=None):
+        return headers["x-a"], body, name, query, request.method
+
+    r = Router()
+    r.add("/items/<name>", ["POST"], view)
+    req = prepared("POST /items/box?x=1 HTTP/1.1\r\nHost: x\r\nX-A: 1\r\n"
+                   "Content-Length: 4\r\n\r\ndata", r)
+    assert req.call_hook() == ("1", "data", "box", "x=1", "POST")
+
+
+def test_invoker_positional_parameters_get_the_request():
+    seen = []
+    invoke = make_invoker(lambda req: seen.append(req))
+    invoke("the request", {})
+    assert seen == ["the request"]
+
+
+def test_invoker_var_keyword_gets_request_and_params():
+    invoke = make_invoker(lambda **kwargs: kwargs, ("name",))
+    assert invoke("req", {"name": "general"}) == {"request": "req", "name": "general"}
+
+
+def test_invoker_skips_optional_unknown_parameters():
+    invoke = make_invoker(lambda request=None, limit=10, *, flag=False: (request, limit, flag))
+    assert invoke("req", {}) == ("req", 10, False)
+
+
+def test_invoker_of_builtin_gets_request_keyword():
+    invoke = make_invoker(dict)
+    assert invoke("req", {}) == {"request": "req"}
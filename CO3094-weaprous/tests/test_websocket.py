@@ -0,0 +1,282 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""Tests of the WebSocket handshake and frame codec (:mod:`daemon.websocket`)."""
+
+import os
+import socket
+import struct
+
+import pytest
+
+from daemon.request import Request
+from daemon.websocket import WebSocket, accept_key, encode_frame, handshake_error, \
+    handshake_response, unmask, OP_CONTINUATION, OP_TEXT, OP_BINARY, OP_CLOSE, \
+    OP_PING, OP_PONG, CLOSE_NORMAL, CLOSE_PROTOCOL_ERROR, CLOSE_INVALID_DATA, CLOSE_TOO_BIG
+
+
+def client_frame(opcode, payload=b"", fin=True, mask=True, rsv=0):
+    """A client frame, masked unless ``mask`` is false."""
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    first = (0x80 if fin else 0) | rsv | opcode
+    flag = 0x80 if mask else 0
+    length = len(payload)
+    if length < 126:
+        head = struct.pack("!BB", first, flag | length)
+    elif length < 65536:
+        head = struct.pack("!BBH", first, flag | 126, length)
+    else:
+        head = struct.pack("!BBQ", first, flag | 127, length)
+    if not mask:
+        return head + payload
+    key = os.urandom(4)
+    return head + key + bytes(b ^ key[i % 4] for i, b in enumerate(payload))
+
+
+def read_frame(sock):
+    """``(opcode, payload)`` of the next (unmasked) server frame."""
+    def read(n):
+        data = b""
+        while len(data) < n:
+            chunk = sock.recv(n - len(data))
+            assert chunk, "connection closed"
+            data += chunk
+        return data
+
+    first, second = read(2)
+    assert first & 0x80 and not second & 0x80
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack("!H", read(2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", read(8))[0]
+    return first & 0x0F, read(length)
+
+
+def close_code(payload):
+    return struct.unpack("!H", payload[:2])[0]
+
+
+@pytest.fixture
+def pair():
+    """``(server WebSocket, client socket)`` connected by a socketpair."""
+    server, client = socket.socketpair()
+    client.settimeout(2)
+    ws = WebSocket(server, max_message_size=1024 * 1024, ping_interval=2)
+    yield ws, client
+    server.close()
+    client.close()
+
+
+def handshake_request(**headers):
+    fields = {"Host": "x", "Upgrade": "websocket", "Connection": "Upgrade",
+              "Sec-WebSocket-Key": "dGhlIHNhbXBsZSBub25jZQ==", "Sec-WebSocket-Version": "13"}
+    fields.update(headers)
+    lines = ["GET /ws HTTP/1.1"] + ["{}: {}".format(k, v) for k, v in fields.items() if v]
+    req = Request()
+    req.prepare("\r\n".join(lines) + "\r\n\r\n")
+    return req
+
+
+# ---------------------------------------------------------------- handshake
+
+def test_accept_key_rfc_example():
+    # RFC 6455 section 1.3
+    assert accept_key("dGhlIHNhbXBsZSBub25jZQ==") == "s3pPLMBiTxaQ9kYGzzhZRbK+xOo="
+
+
+def test_handshake_valid():
+    req = handshake_request()
+    assert handshake_error(req) is None
+    head = handshake_response(req)
+    assert head.startswith(b"HTTP/1.1 101 ")
+    assert b"Sec-WebSocket-Accept: s3pPLMBiTxaQ9kYGzzhZRbK+xOo=\r\n" in head
+    assert head.endswith(b"\r\n\r\n")
+
+
+@pytest.mark.parametrize("headers, status", [
+    ({"Connection": "keep-alive"}, 400),
+    ({"Sec-WebSocket-Version": "8"}, 426),
+    ({"Sec-WebSocket-Version": ""}, 426),
+    ({"Sec-WebSocket-Key": "short"}, 400),
+    ({"Sec-WebSocket-Key": ""}, 400),
+])
+def test_handshake_errors(headers, status):
+    assert handshake_error(handshake_request(**headers))[0] == status
+
+
+# -------------------------------------------------------------------- codec
+
+@pytest.mark.parametrize("length", [0, 1, 3, 4, 5, 8, 125, 1000])
+def test_unmask(length):
+    payload, mask = os.urandom(length), os.urandom(4)
+    expected = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    assert unmask(payload, mask) == expected
+    assert unmask(expected, mask) == payload
+
+
+@pytest.mark.parametrize("length, head_size, marker", [
+    (0, 2, 0), (125, 2, 125), (126, 4, 126), (65535, 4, 126), (65536, 10, 127),
+])
+def test_encode_frame_length_forms(length, head_size, marker):
+    head = encode_frame(OP_BINARY, b"x" * length)
+    assert len(head) == head_size
+    assert head[0] == 0x80 | OP_BINARY
+    assert head[1] == marker
+    if marker == 126:
+        assert struct.unpack("!H", head[2:])[0] == length
+    elif marker == 127:
+        assert struct.unpack("!Q", head[2:])[0] == length
+
+
+# ---------------------------------------------------------------- receiving
+
+def test_text_and_binary_messages(pair):
+    ws, client = pair
+    client.sendall(client_frame(OP_TEXT, "héllo") + client_frame(OP_BINARY, b"\x00\xff"))
+    assert ws.receive() == "héllo"
+    assert ws.receive() == b"\x00\xff"
+
+
+@pytest.mark.parametrize("length", [126, 65535, 65536, 70000])
+def test_extended_lengths(pair, length):
+    ws, client = pair
+    payload = os.urandom(length)
+    client.sendall(client_frame(OP_BINARY, payload))
+    assert ws.receive() == payload
+
+
+def test_buffered_bytes_are_read_first():
+    server, client = socket.socketpair()
+    data = client_frame(OP_TEXT, "first") + client_frame(OP_TEXT, "second")
+    ws = WebSocket(server, data[:5])
+    client.sendall(data[5:])
+    assert [ws.receive(), ws.receive()] == ["first", "second"]
+    server.close()
+    client.close()
+
+
+def test_fragments_with_interleaved_ping(pair):
+    ws, client = pair
+    client.sendall(client_frame(OP_TEXT, "hel", fin=False)
+                   + client_frame(OP_PING, b"pp")
+                   + client_frame(OP_CONTINUATION, "lo ", fin=False)
+                   + client_frame(OP_PONG, b"ignored")
+                   + client_frame(OP_CONTINUATION, "world"))
+    assert ws.receive() == "hello world"
+    assert read_frame(client) == (OP_PONG, b"pp")
+
+
+def test_send_and_iteration(pair):
+    ws, client = pair
+    ws.send("hi")
+    ws.send(b"\x01")
+    assert read_frame(client) == (OP_TEXT, b"hi")
+    assert read_frame(client) == (OP_BINARY, b"\x01")
+    client.sendall(client_frame(OP_TEXT, "a") + client_frame(OP_CLOSE, struct.pack("!H", 1000)))
+    assert list(ws) == ["a"]
+
+
+# ------------------------------------------------------- protocol violations
+
+@pytest.mark.parametrize("frames, code", [
+    ([client_frame(OP_TEXT, "x", mask=False)], CLOSE_PROTOCOL_ERROR),
+    ([client_frame(OP_TEXT, "x", rsv=0x40)], CLOSE_PROTOCOL_ERROR),
+    ([client_frame(0x3, "x")], CLOSE_PROTOCOL_ERROR),
+    ([client_frame(OP_PING, b"x" * 126)], CLOSE_PROTOCOL_ERROR),
+    ([client_frame(OP_PING, b"x", fin=False)], CLOSE_PROTOCOL_ERROR),
+    ([client_frame(OP_CONTINUATION, "x")], CLOSE_PROTOCOL_ERROR),
+    ([client_frame(OP_TEXT, "a", fin=False), client_frame(OP_TEXT, "b")], CLOSE_PROTOCOL_ERROR),
+    ([client_frame(OP_TEXT, b"\xff\xfe")], CLOSE_INVALID_DATA),
+    # UTF-8 is checked once reassembled: a split code point with a bad continuation
+    ([client_frame(OP_TEXT, "é".encode("utf-8")[:1], fin=False),
+      client_frame(OP_CONTINUATION, b"\xff")], CLOSE_INVALID_DATA),
+])
+def test_protocol_errors_close_the_connection(pair, frames, code):
+    ws, client = pair
+    client.sendall(b"".join(frames))
+    assert ws.receive() is None
+    assert ws.closed
+    opcode, payload = read_frame(client)
+    assert (opcode, close_code(payload)) == (OP_CLOSE, code)
+
+
+def test_split_code_point_is_reassembled(pair):
+    ws, client = pair
+    data = "é".encode("utf-8")
+    client.sendall(client_frame(OP_TEXT, data[:1], fin=False)
+                   + client_frame(OP_CONTINUATION, data[1:]))
+    assert ws.receive() == "é"
+
+
+def test_message_too_big():
+    server, client = socket.socketpair()
+    client.settimeout(2)
+    ws = WebSocket(server, max_message_size=10)
+    client.sendall(client_frame(OP_TEXT, "x" * 6, fin=False) + client_frame(OP_CONTINUATION, "y" * 6))
+    assert ws.receive() is None
+    assert close_code(read_frame(client)[1]) == CLOSE_TOO_BIG
+    server.close()
+    client.close()
+
+
+# -------------------------------------------------------------- close codes
+
+@pytest.mark.parametrize("payload, echoed", [
+    (b"", CLOSE_NORMAL),
+    (struct.pack("!H", 1000) + b"bye", 1000),
+    (struct.pack("!H", 1001), 1001),
+    (struct.pack("!H", 3000), 3000),
+    (struct.pack("!H", 4999), 4999),
+])
+def test_close_is_echoed(pair, payload, echoed):
+    ws, client = pair
+    client.sendall(client_frame(OP_CLOSE, payload))
+    assert ws.receive() is None
+    assert ws.closed
+    assert close_code(read_frame(client)[1]) == echoed
+
+
+@pytest.mark.parametrize("payload, code", [
+    (b"\x03", CLOSE_PROTOCOL_ERROR),
+    (struct.pack("!H", 999), CLOSE_PROTOCOL_ERROR),
+    (struct.pack("!H", 1004), CLOSE_PROTOCOL_ERROR),
+    (struct.pack("!H", 1005), CLOSE_PROTOCOL_ERROR),
+    (struct.pack("!H", 1006), CLOSE_PROTOCOL_ERROR),
+    (struct.pack("!H", 1015), CLOSE_PROTOCOL_ERROR),
+    (struct.pack("!H", 1016), CLOSE_PROTOCOL_ERROR),
+    (struct.pack("!H", 2999), CLOSE_PROTOCOL_ERROR),
+    (struct.pack("!H", 1000) + b"\xff", CLOSE_INVALID_DATA),
+])
+def test_invalid_close_frames(pair, payload, code):
+    ws, client = pair
+    client.sendall(client_frame(OP_CLOSE, payload))
+    assert ws.receive() is None
+    assert close_code(read_frame(client)[1]) == code
+
+
+def test_send_after_close_raises(pair):
+    ws, client = pair
+    ws.close()
+    ws.close()
+    opcode, payload = read_frame(client)
+    assert (opcode, close_code(payload)) == (OP_CLOSE, CLOSE_NORMAL)
+    with pytest.raises(ConnectionError):
+        ws.send("late")
+
+
+def test_peer_gone(pair):
+    ws, client = pair
+    client.close()
+    assert ws.receive() is None
+    assert ws.closed